@@ -0,0 +1,392 @@
+import copy
+import math
+from dataclasses import dataclass
+
+CONFIG_VERSION = 4
+
+class FieldSpec:
+    """Type, default, inclusive range and allowed values of one configuration item"""
+
+    __slots__ = ('type', 'default', 'minimum', 'maximum', 'choices')
+
+    def __init__(self, value_type, default, minimum=None, maximum=None, choices=None):
+        self.type = value_type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+
+
+TEMPERATURE_SOURCES = ("cpu", "case", "max")
+
+SCHEMA = {
+    "Monitor": {
+        "screen_orientation":        FieldSpec(int, 0, 0, 1),
+        "follow_led_color":          FieldSpec(int, 0, 0, 1),
+    },
+    "LED": {
+        # 4 is the UI's custom-code test mode, it has no board mode and is never saved
+        "mode":                      FieldSpec(int, 0, 0, 5, choices=(0, 1, 2, 3, 5)),
+        "red_value":                 FieldSpec(int, 0, 0, 255),
+        "green_value":               FieldSpec(int, 0, 0, 255),
+        "blue_value":                FieldSpec(int, 255, 0, 255),
+        "task_name":                 FieldSpec(str, "task_led.py"),
+        "is_run_on_startup":         FieldSpec(bool, True),
+    },
+    "Fan": {
+        "mode":                      FieldSpec(int, 0, 0, 4),
+        "mode1_fan_group1":          FieldSpec(int, 75, 0, 255),
+        "mode1_fan_group2":          FieldSpec(int, 75, 0, 255),
+        "mode1_fan_group3":          FieldSpec(int, 75, 0, 255),
+        "mode2_low_temp_threshold":  FieldSpec(int, 30, 10, 40),
+        "mode2_high_temp_threshold": FieldSpec(int, 50, 50, 80),
+        "mode2_temp_schmitt":        FieldSpec(int, 3, 1, 5),
+        "mode2_low_speed":           FieldSpec(int, 75, 0, 255),
+        "mode2_middle_speed":        FieldSpec(int, 125, 0, 255),
+        "mode2_high_speed":          FieldSpec(int, 175, 0, 255),
+        "mode3_min_speed_mapping":   FieldSpec(int, 0, 0, 255),
+        "mode3_max_speed_mapping":   FieldSpec(int, 255, 0, 255),
+        # Closed-loop control by task_fan.py, "pid" or "curve"; the group sources, sample interval
+        # and minimum change apply to both. Sources are "cpu", "case" or "max" (the hotter one)
+        "controller":                FieldSpec(str, "pid", choices=("pid", "curve")),
+        "pid_group1_source":         FieldSpec(str, "cpu", choices=TEMPERATURE_SOURCES),
+        "pid_group2_source":         FieldSpec(str, "cpu", choices=TEMPERATURE_SOURCES),
+        "pid_group3_source":         FieldSpec(str, "case", choices=TEMPERATURE_SOURCES),
+        "pid_group1_setpoint":       FieldSpec(int, 55, 30, 85),
+        "pid_group2_setpoint":       FieldSpec(int, 55, 30, 85),
+        "pid_group3_setpoint":       FieldSpec(int, 40, 30, 85),
+        "pid_kp":                    FieldSpec(float, 8.0, 0.0, 100.0),
+        "pid_ki":                    FieldSpec(float, 0.5, 0.0, 50.0),
+        "pid_kd":                    FieldSpec(float, 2.0, 0.0, 100.0),
+        "pid_min_duty":              FieldSpec(int, 40, 0, 255),
+        "pid_max_duty":              FieldSpec(int, 255, 0, 255),
+        "pid_sample_interval":       FieldSpec(float, 1.0, 0.1, 10.0),
+        "pid_min_change":            FieldSpec(int, 3, 1, 64),
+        # Fan curves: [temperature (-40..150), duty (0..255)] points, hysteresis in degrees, ramps in duty per second (0 = unlimited)
+        "curve_group1_points":       FieldSpec(list, [[40, 40], [50, 80], [60, 160], [70, 255]]),
+        "curve_group2_points":       FieldSpec(list, [[40, 40], [50, 80], [60, 160], [70, 255]]),
+        "curve_group3_points":       FieldSpec(list, [[30, 40], [40, 120], [50, 255]]),
+        "curve_hysteresis":          FieldSpec(float, 2.0, 0.0, 10.0),
+        "curve_ramp_up":             FieldSpec(float, 50.0, 0.0, 255.0),
+        "curve_ramp_down":           FieldSpec(float, 10.0, 0.0, 255.0),
+        "task_name":                 FieldSpec(str, "task_fan.py"),
+        "is_run_on_startup":         FieldSpec(bool, True),
+    },
+    "OLED": {
+        "task_name":                 FieldSpec(str, "task_oled.py"),
+        "is_run_on_startup":         FieldSpec(bool, True),
+    },
+    "Service": {
+        "is_exist_on_rpi":           FieldSpec(bool, False),
+        "is_run_on_startup":         FieldSpec(bool, False),
+    },
+}
+
+
+@dataclass
+class MonitorConfig:
+    __slots__ = tuple(SCHEMA["Monitor"])
+    screen_orientation: int
+    follow_led_color: int
+
+
+@dataclass
+class LEDConfig:
+    __slots__ = tuple(SCHEMA["LED"])
+    mode: int
+    red_value: int
+    green_value: int
+    blue_value: int
+    task_name: str
+    is_run_on_startup: bool
+
+
+@dataclass
+class FanConfig:
+    __slots__ = tuple(SCHEMA["Fan"])
+    mode: int
+    mode1_fan_group1: int
+    mode1_fan_group2: int
+    mode1_fan_group3: int
+    mode2_low_temp_threshold: int
+    mode2_high_temp_threshold: int
+    mode2_temp_schmitt: int
+    mode2_low_speed: int
+    mode2_middle_speed: int
+    mode2_high_speed: int
+    mode3_min_speed_mapping: int
+    mode3_max_speed_mapping: int
+    controller: str
+    pid_group1_source: str
+    pid_group2_source: str
+    pid_group3_source: str
+    pid_group1_setpoint: int
+    pid_group2_setpoint: int
+    pid_group3_setpoint: int
+    pid_kp: float
+    pid_ki: float
+    pid_kd: float
+    pid_min_duty: int
+    pid_max_duty: int
+    pid_sample_interval: float
+    pid_min_change: int
+    curve_group1_points: list
+    curve_group2_points: list
+    curve_group3_points: list
+    curve_hysteresis: float
+    curve_ramp_up: float
+    curve_ramp_down: float
+    task_name: str
+    is_run_on_startup: bool
+
+
+@dataclass
+class OLEDConfig:
+    __slots__ = tuple(SCHEMA["OLED"])
+    task_name: str
+    is_run_on_startup: bool
+
+
+@dataclass
+class ServiceConfig:
+    __slots__ = tuple(SCHEMA["Service"])
+    is_exist_on_rpi: bool
+    is_run_on_startup: bool
+
+
+@dataclass
+class AppConfig:
+    __slots__ = ('version', 'monitor', 'led', 'fan', 'oled', 'service')
+    version: int
+    monitor: MonitorConfig
+    led: LEDConfig
+    fan: FanConfig
+    oled: OLEDConfig
+    service: ServiceConfig
+
+
+SECTION_CLASSES = {
+    "Monitor": MonitorConfig,
+    "LED": LEDConfig,
+    "Fan": FanConfig,
+    "OLED": OLEDConfig,
+    "Service": ServiceConfig,
+}
+
+
+# Strings accepted for boolean items
+BOOL_STRINGS = {"true": True, "false": False, "1": True, "0": False, "yes": True, "no": False, "on": True, "off": False}
+
+
+def parse_bool(value):
+    """
+    Convert a JSON boolean, 0/1 or a string such as "false" or "on" to a bool
+
+    Args:
+        value: Raw value
+
+    Returns:
+        bool: Parsed value
+
+    Raises:
+        ValueError: Anything else, bool("false") would be True
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in BOOL_STRINGS:
+        return BOOL_STRINGS[value.strip().lower()]
+    raise ValueError("boolean expected")
+
+
+def get_range(section, key):
+    """
+    Get the allowed range of a numeric configuration item
+
+    Args:
+        section (str): Configuration section name
+        key (str): Configuration item name
+
+    Returns:
+        list: [minimum, maximum]
+    """
+    spec = SCHEMA[section][key]
+    return [spec.minimum, spec.maximum]
+
+
+def get_defaults(section, prefix=""):
+    """
+    Get the default values of configuration items
+
+    Args:
+        section (str): Configuration section name
+        prefix (str): Only items whose names start with this prefix
+
+    Returns:
+        dict: Item name -> copy of its default value, in schema order
+    """
+    return {key: copy.deepcopy(spec.default) for key, spec in SCHEMA[section].items() if key.startswith(prefix)}
+
+
+def validate_value(spec, value):
+    """
+    Convert a raw JSON value to the field type, check it against the allowed values and clamp it into range
+
+    Args:
+        spec (FieldSpec): Field specification
+        value: Raw value, None for missing
+
+    Returns:
+        tuple: (validated value, error message or None)
+    """
+    if value is None:
+        return copy.deepcopy(spec.default), None
+    try:
+        if spec.type is list:
+            if not isinstance(value, list):
+                raise ValueError("list expected")
+            converted = value
+        elif spec.type is bool:
+            converted = parse_bool(value)
+        elif spec.type is int:
+            if isinstance(value, bool):
+                raise ValueError("boolean given")
+            converted = int(value)
+        else:
+            converted = spec.type(value)
+    except (TypeError, ValueError, OverflowError):
+        return copy.deepcopy(spec.default), f"invalid value {value!r}, using {spec.default!r}"
+    if isinstance(converted, float) and not math.isfinite(converted):
+        # NaN fails every range comparison and would pass unclamped
+        return copy.deepcopy(spec.default), f"non-finite value {value!r}, using {spec.default!r}"
+    if spec.choices is not None and converted not in spec.choices:
+        return copy.deepcopy(spec.default), f"{converted!r} not one of {spec.choices!r}, using {spec.default!r}"
+    if spec.minimum is not None and converted < spec.minimum:
+        return spec.minimum, f"{converted} below minimum {spec.minimum}"
+    if spec.maximum is not None and converted > spec.maximum:
+        return spec.maximum, f"{converted} above maximum {spec.maximum}"
+    return converted, None
+
+
+def compile_section(section, data):
+    """
+    Validate one configuration section into its slotted dataclass
+
+    Args:
+        section (str): Configuration section name
+        data (dict): Raw section data
+
+    Returns:
+        tuple: (dataclass instance, list of error messages)
+    """
+    values = []
+    errors = []
+    for key, spec in SCHEMA[section].items():
+        value, error = validate_value(spec, data.get(key))
+        if error:
+            errors.append(f"{section}.{key}: {error}")
+        values.append(value)
+    return SECTION_CLASSES[section](*values), errors
+
+
+def compile_config(config_data):
+    """
+    Validate the whole configuration once so hot loops can read plain attributes
+
+    Args:
+        config_data (dict): All configuration data
+
+    Returns:
+        tuple: (AppConfig, list of error messages)
+    """
+    sections = {}
+    errors = []
+    for section in SCHEMA:
+        sections[section], section_errors = compile_section(section, config_data.get(section) or {})
+        errors += section_errors
+    config = AppConfig(config_data.get("version", 1), sections["Monitor"], sections["LED"],
+                       sections["Fan"], sections["OLED"], sections["Service"])
+    return config, errors
+
+
+# Items each version added, frozen with the defaults of that version: a migration must keep
+# producing the same result when SCHEMA changes later, new items get their own migration
+V2_FIELDS = {
+    "Monitor": {"screen_orientation": 0, "follow_led_color": 0},
+    "LED": {"mode": 0, "red_value": 0, "green_value": 0, "blue_value": 255,
+            "task_name": "task_led.py", "is_run_on_startup": True},
+    "Fan": {"mode": 0, "mode1_fan_group1": 75, "mode1_fan_group2": 75, "mode1_fan_group3": 75,
+            "mode2_low_temp_threshold": 30, "mode2_high_temp_threshold": 50, "mode2_temp_schmitt": 3,
+            "mode2_low_speed": 75, "mode2_middle_speed": 125, "mode2_high_speed": 175,
+            "mode3_min_speed_mapping": 0, "mode3_max_speed_mapping": 255,
+            "task_name": "task_fan.py", "is_run_on_startup": True},
+    "OLED": {"task_name": "task_oled.py", "is_run_on_startup": True},
+    "Service": {"is_exist_on_rpi": False, "is_run_on_startup": False},
+}
+
+V3_FIELDS = {
+    "Fan": {"pid_group1_source": "cpu", "pid_group2_source": "cpu", "pid_group3_source": "case",
+            "pid_group1_setpoint": 55, "pid_group2_setpoint": 55, "pid_group3_setpoint": 40,
+            "pid_kp": 8.0, "pid_ki": 0.5, "pid_kd": 2.0, "pid_min_duty": 40, "pid_max_duty": 255,
+            "pid_sample_interval": 1.0, "pid_min_change": 3},
+}
+
+V4_FIELDS = {
+    "Fan": {"controller": "pid",
+            "curve_group1_points": [[40, 40], [50, 80], [60, 160], [70, 255]],
+            "curve_group2_points": [[40, 40], [50, 80], [60, 160], [70, 255]],
+            "curve_group3_points": [[30, 40], [40, 120], [50, 255]],
+            "curve_hysteresis": 2.0, "curve_ramp_up": 50.0, "curve_ramp_down": 10.0},
+}
+
+
+def _add_fields(config_data, fields):
+    # Fill in the missing items, values already present are kept
+    for section, items in fields.items():
+        data = config_data.setdefault(section, {})
+        for key, default in items.items():
+            data.setdefault(key, copy.deepcopy(default))
+
+
+def _migrate_v1_to_v2(config_data):
+    # Version 1 files have no version key and may lack sections added later
+    _add_fields(config_data, V2_FIELDS)
+
+
+def _migrate_v2_to_v3(config_data):
+    # Version 3 adds the closed-loop fan controller settings
+    _add_fields(config_data, V3_FIELDS)
+
+
+def _migrate_v3_to_v4(config_data):
+    # Version 4 adds the controller selection and the fan curves
+    _add_fields(config_data, V4_FIELDS)
+
+
+# version -> function upgrading a configuration dict from that version to the next one, in place
+MIGRATIONS = {
+    1: _migrate_v1_to_v2,
+    2: _migrate_v2_to_v3,
+    3: _migrate_v3_to_v4,
+}
+
+
+def migrate_config(config_data):
+    """
+    Upgrade configuration data to CONFIG_VERSION
+
+    Args:
+        config_data (dict): All configuration data, modified in place
+
+    Returns:
+        bool: True if any migration was applied
+    """
+    version = config_data.get("version", 1)
+    migrated = False
+    while version < CONFIG_VERSION:
+        MIGRATIONS[version](config_data)
+        version += 1
+        config_data["version"] = version
+        migrated = True
+    return migrated
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import os
 import smbus
+import threading
 import time
+from api_runtime import write_file_atomic
 
 class Expansion:
     IIC_ADDRESS = 0x21
@@ -35,29 +38,57 @@ class Expansion:
     REG_VERSION = 0xfe                   # Get version
     REG_SAVE_FLASH = 0xff                # Save data
 
+    STATS_DIR_ENV = 'EXPANSION_I2C_STATS_DIR'
+    STATS_INTERVAL = 1.0                # Minimum seconds between two stats file updates
+    transaction_count = 0               # I2C transactions of this process, over all instances
+    stats_time = 0.0
+
     def __init__(self, bus_number=1, address=IIC_ADDRESS):
         # Initialize I2C bus and address
         self.bus_number = bus_number
         self.bus = smbus.SMBus(self.bus_number)
         self.address = address
+        self.lock = threading.RLock()   # Serializes bus transactions when tasks share one instance
+        # Set by TaskManager: publish the transaction count to <dir>/<pid> for per-task accounting
+        self.stats_dir = os.environ.get(self.STATS_DIR_ENV)
+
+    def count_transaction(self):
+        # Count one bus transaction and publish the total at most once per STATS_INTERVAL
+        Expansion.transaction_count += 1
+        if self.stats_dir is None:
+            return
+        now = time.monotonic()
+        if now - Expansion.stats_time < self.STATS_INTERVAL:
+            return
+        Expansion.stats_time = now
+        path = os.path.join(self.stats_dir, str(os.getpid()))
+        try:
+            write_file_atomic(path, str(Expansion.transaction_count))
+        except OSError:
+            self.stats_dir = None    # Stop trying when the directory is gone
 
     def write(self, reg, values):
-        # Write data to I2C register
+        # Write data to I2C register, returns False if the bus reported an error
         try:
-            if isinstance(values, list):
-                self.bus.write_i2c_block_data(self.address, reg, values)
-            else:
-                self.bus.write_byte_data(self.address, reg, values)
+            with self.lock:
+                self.count_transaction()
+                if isinstance(values, list):
+                    self.bus.write_i2c_block_data(self.address, reg, values)
+                else:
+                    self.bus.write_byte_data(self.address, reg, values)
+            return True
         except IOError as e:
             #print("Error writing to I2C bus:", e)
-            pass
+            return False
 
     def read(self, reg, length=1):
         # Read data from I2C register
-        if length == 1:
-            return self.bus.read_byte_data(self.address, reg)
-        else:
-            return self.bus.read_i2c_block_data(self.address, reg, length)
+        with self.lock:
+            self.count_transaction()
+            if length == 1:
+                return self.bus.read_byte_data(self.address, reg)
+            else:
+                return self.bus.read_i2c_block_data(self.address, reg, length)
 
     def end(self):
         # Close I2C bus
@@ -77,15 +108,15 @@ class Expansion:
     def set_all_led_color(self, r, g, b):
         # Set color for all LEDs
         cmd = [r, g, b]
-        self.write(self.REG_LED_ALL, cmd)
+        return self.write(self.REG_LED_ALL, cmd)
 
     def set_led_mode(self, mode):
         # Set LED running mode
-        self.write(self.REG_LED_MODE, mode)
+        return self.write(self.REG_LED_MODE, mode)
 
     def set_fan_mode(self, mode):
         # Set fan running mode
-        self.write(self.REG_FAN_MODE, mode)
+        return self.write(self.REG_FAN_MODE, mode)
 
     def set_fan_frequency(self, freq):
         # Set fan frequency
@@ -100,12 +131,12 @@ class Expansion:
     def set_fan_duty(self, duty0, duty1, duty2):
         # Set fan duty cycle
         duty = [duty0, duty1, duty2]
-        self.write(self.REG_FAN_DUTY, duty)
+        return self.write(self.REG_FAN_DUTY, duty)
 
     def set_fan_threshold(self, low_threshold, high_threshold, schmitt = 3):
         # Set fan temperature threshold
         cmd = [low_threshold, high_threshold, schmitt]
-        self.write(self.REG_FAN_THRESHOLD, cmd)
+        return self.write(self.REG_FAN_THRESHOLD, cmd)
 
     def set_power_on_check(self, state):
         # Set power-on check state
@@ -114,7 +145,7 @@ class Expansion:
     def set_fan_temp_mode_speed(self, low_speed, mid_speed, high_speed):
         # Set fan temperature mode speed
         cmd = [low_speed, mid_speed, high_speed]
-        self.write(self.REG_FAN_TEMP_MODE_SPEED, cmd)
+        return self.write(self.REG_FAN_TEMP_MODE_SPEED, cmd)
 
     def set_fan_power_switch(self, state):
         # Set fan power switch state
@@ -123,7 +154,7 @@ class Expansion:
     def set_fan_pi_following(self, min_duty, max_duty):
         # Set fan PI following state
         cmd = [min_duty, max_duty]
-        self.write(self.REG_FAN_PI_FOLLOWING, cmd)
+        return self.write(self.REG_FAN_PI_FOLLOWING, cmd)
 
     def get_fan_power_switch(self):
         # Get fan power switch state
@@ -0,0 +1,213 @@
+import time
+
+CURVE_TEMPERATURE_RANGE = (-40, 150)    # Degrees Celsius a curve point may use, bounds the lookup table
+
+class PIDController:
+    """
+    PID controller turning a temperature into a fan duty
+
+    The error is measurement - setpoint, so a positive output means more cooling. The integral
+    is kept in duty units and starts at output_min; it is only advanced while the output is not
+    saturated in the direction of the error (conditional integration), and clamped to the output
+    range, so a long heat soak cannot wind it up past full speed. The derivative acts on the
+    measurement rather than the error to avoid a kick on setpoint changes, and is low-pass filtered
+    because the case sensor reports whole degrees.
+    """
+
+    def __init__(self, setpoint, kp, ki, kd, output_min=0, output_max=255, derivative_smoothing=0.7):
+        """
+        Initialize the PIDController
+
+        Args:
+            setpoint (float): Target temperature in degrees Celsius
+            kp (float): Proportional gain, duty per degree
+            ki (float): Integral gain, duty per degree and second
+            kd (float): Derivative gain, duty per degree per second
+            output_min (float): Lowest output duty
+            output_max (float): Highest output duty
+            derivative_smoothing (float): Weight of the previous derivative, 0 disables filtering
+        """
+        self.setpoint = setpoint
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_min = output_min
+        self.output_max = output_max
+        self.derivative_smoothing = derivative_smoothing
+        self.reset()
+
+    def reset(self):
+        # Forget the history, the next update starts from output_min plus the P term
+        self.integral = float(self.output_min)
+        self.derivative = 0.0
+        self.last_measurement = None
+        self.last_time = None
+        self.output = float(self.output_min)
+
+    def set_limits(self, output_min, output_max):
+        self.output_min = output_min
+        self.output_max = output_max
+        self.integral = min(max(self.integral, output_min), output_max)
+
+    def update(self, measurement, now=None):
+        """
+        Compute the output for a new measurement
+
+        Args:
+            measurement (float): Current temperature in degrees Celsius
+            now (float): time.monotonic() of the measurement, defaults to the current time
+
+        Returns:
+            float: Output duty between output_min and output_max
+        """
+        now = time.monotonic() if now is None else now
+        error = measurement - self.setpoint
+        dt = now - self.last_time if self.last_time is not None else 0.0
+        if dt > 0:
+            rate = (measurement - self.last_measurement) / dt
+            self.derivative = self.derivative_smoothing * self.derivative + (1.0 - self.derivative_smoothing) * rate
+        proportional = self.kp * error
+        derivative = self.kd * self.derivative
+        integral = self.integral + self.ki * error * dt
+        unclamped = proportional + integral + derivative
+        # Conditional integration: hold the integral while the output is pinned in the error's direction
+        if not ((unclamped > self.output_max and error > 0) or (unclamped < self.output_min and error < 0)):
+            self.integral = min(max(integral, self.output_min), self.output_max)
+        self.output = min(max(proportional + self.integral + derivative, self.output_min), self.output_max)
+        self.last_measurement = measurement
+        self.last_time = now
+        return self.output
+
+class FanCurve:
+    """
+    Piecewise-linear temperature to duty curve with hysteresis and ramp limits
+
+    The curve is sampled once per degree into a table when it is configured; a lookup is then a
+    clamp, an index and one interpolation between neighbouring entries, whatever the number of
+    points. Hysteresis works like mechanical play: the curve follows rising temperatures at once
+    but falling ones only after they dropped by the hysteresis, so a temperature wobbling around
+    a breakpoint does not toggle the duty. The ramp limits bound how fast the output may rise and
+    fall, in duty per second.
+    """
+
+    def __init__(self, points, hysteresis=0.0, ramp_up=0.0, ramp_down=0.0):
+        """
+        Initialize the FanCurve
+
+        Args:
+            points (list): [temperature, duty] pairs, any number, in any order
+            hysteresis (float): Degrees a temperature must fall before the duty follows it down
+            ramp_up (float): Maximum duty increase per second, 0 for unlimited
+            ramp_down (float): Maximum duty decrease per second, 0 for unlimited
+
+        Raises:
+            ValueError: The points do not describe a curve
+        """
+        self.configure(points, hysteresis, ramp_up, ramp_down)
+        self.reset()
+
+    @staticmethod
+    def parse_points(points):
+        """
+        Validate curve points
+
+        Args:
+            points (list): [temperature, duty] pairs
+
+        Returns:
+            list: (temperature, duty) tuples sorted by temperature, the last duty wins for a repeated temperature
+
+        Raises:
+            ValueError: Not a list of numeric pairs, a temperature outside CURVE_TEMPERATURE_RANGE or a duty outside 0..255
+        """
+        if not isinstance(points, list) or not points:
+            raise ValueError("curve needs at least one [temperature, duty] point")
+        curve = {}
+        for point in points:
+            if not isinstance(point, (list, tuple)) or len(point) != 2 \
+                    or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in point):
+                raise ValueError(f"invalid curve point {point!r}, expected [temperature, duty]")
+            if not CURVE_TEMPERATURE_RANGE[0] <= point[0] <= CURVE_TEMPERATURE_RANGE[1]:
+                raise ValueError(f"temperature {point[0]} of curve point {point!r} is outside "
+                                 f"{CURVE_TEMPERATURE_RANGE[0]}..{CURVE_TEMPERATURE_RANGE[1]}")
+            if not 0 <= point[1] <= 255:
+                raise ValueError(f"duty {point[1]} of curve point {point!r} is outside 0..255")
+            curve[float(point[0])] = float(point[1])
+        return sorted(curve.items())
+
+    def configure(self, points, hysteresis=0.0, ramp_up=0.0, ramp_down=0.0):
+        # Rebuild the table, the hysteresis reference and current output are kept
+        points = self.parse_points(points)
+        self.points = points
+        self.hysteresis = max(0.0, hysteresis)
+        self.ramp_up = max(0.0, ramp_up)
+        self.ramp_down = max(0.0, ramp_down)
+        self.output_min = min(duty for _, duty in points)
+        self.output_max = max(duty for _, duty in points)
+        # One entry per degree from the first point's (floored) to the last point's (ceiled) temperature
+        self.table_base = int(points[0][0] // 1)
+        size = int(-(-points[-1][0] // 1)) - self.table_base + 1
+        self.table = [self._evaluate(self.table_base + i) for i in range(size)]
+
+    def _evaluate(self, temperature):
+        # Exact curve value, only used to fill the table
+        points = self.points
+        if temperature <= points[0][0]:
+            return points[0][1]
+        for (t0, d0), (t1, d1) in zip(points, points[1:]):
+            if temperature <= t1:
+                return d0 + (d1 - d0) * (temperature - t0) / (t1 - t0)
+        return points[-1][1]
+
+    def lookup(self, temperature):
+        """
+        Get the duty of the curve at a temperature, without hysteresis or ramp limits
+
+        Args:
+            temperature (float): Degrees Celsius
+
+        Returns:
+            float: Duty
+        """
+        position = temperature - self.table_base
+        if position <= 0:
+            return self.table[0]
+        index = int(position)
+        if index >= len(self.table) - 1:
+            return self.table[-1]
+        low = self.table[index]
+        return low + (self.table[index + 1] - low) * (position - index)
+
+    def reset(self):
+        self.reference = None     # Temperature the curve is evaluated at, trails falling temperatures
+        self.output = None
+        self.last_time = None
+
+    def update(self, temperature, now=None):
+        """
+        Compute the output for a new measurement
+
+        Args:
+            temperature (float): Current temperature in degrees Celsius
+            now (float): time.monotonic() of the measurement, defaults to the current time
+
+        Returns:
+            float: Output duty
+        """
+        now = time.monotonic() if now is None else now
+        if self.reference is None or temperature > self.reference:
+            self.reference = temperature
+        elif temperature < self.reference - self.hysteresis:
+            self.reference = temperature + self.hysteresis
+        target = self.lookup(self.reference)
+        if self.output is None or self.last_time is None:
+            self.output = target
+        else:
+            dt = max(0.0, now - self.last_time)
+            if target > self.output and self.ramp_up:
+                target = min(target, self.output + self.ramp_up * dt)
+            elif target < self.output and self.ramp_down:
+                target = max(target, self.output - self.ramp_down * dt)
+            self.output = target
+        self.last_time = now
+        return self.output
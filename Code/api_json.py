@@ -1,45 +1,460 @@
+import copy
 import json
 import os
-from api_expansion import Expansion
+import ctypes
+import ctypes.util
+import errno
+import select
+import struct
+import threading
+import tempfile
+import atexit
+import weakref
+from api_reconcile import LED_MODE_FROM_BOARD, FAN_MODE_FROM_BOARD
+from api_config_schema import CONFIG_VERSION, compile_config, get_defaults, migrate_config
+
+class ConfigWatcher:
+    """inotify watch on the directory that holds the configuration file"""
+
+    IN_CLOSE_WRITE = 0x00000008         # File opened for writing was closed
+    IN_MOVED_TO = 0x00000080            # File renamed into the directory (atomic replace)
+    IN_DELETE = 0x00000200              # File deleted from the directory
+    IN_DELETE_SELF = 0x00000400         # Watched directory deleted
+    IN_Q_OVERFLOW = 0x00004000          # Event queue overflowed, state must be rechecked
+    EVENT_HEADER = struct.Struct('iIII') # wd, mask, cookie, len
+
+    def __init__(self, config_file):
+        """
+        Initialize configuration file watcher
+
+        Args:
+            config_file (str): Configuration file path
+        """
+        self.config_file = os.path.abspath(config_file)
+        self.directory = os.path.dirname(self.config_file)
+        self.filename = os.fsencode(os.path.basename(self.config_file))
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        # Watch the directory, not the file, so a rename over the file is still seen
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_DELETE | self.IN_DELETE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(self.directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err))
+
+    def fileno(self):
+        return self.fd
+
+    def read_events(self):
+        """
+        Drain pending inotify events
+
+        Returns:
+            bool: True if any event concerns the configuration file
+        """
+        relevant = False
+        while True:
+            try:
+                buf = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not buf:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(buf, offset)
+                offset += self.EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & (self.IN_Q_OVERFLOW | self.IN_DELETE_SELF) or name == self.filename:
+                    relevant = True
+        return relevant
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+# Every live ConfigManager, flushed by one exit hook instead of one registration per instance
+_instances = weakref.WeakSet()
+_MISSING = object()          # Marks a key absent from the file in the base of an unsaved edit
+
+def _flush_all():
+    for manager in list(_instances):
+        manager.flush()
+
+atexit.register(_flush_all)
+
 
 class ConfigManager:
-    def __init__(self, config_file='app_config.json'):
+    def __init__(self, config_file='app_config.json', save_debounce=0.2, expansion=None):
         """
         Initialize configuration manager
         
         Args:
             config_file (str): Configuration file path
+            save_debounce (float): Seconds over which save_config requests are coalesced, 0 writes immediately
+            expansion (Expansion): Board handle used for default values, opened on demand if not given
         """
-        self.expansion = Expansion()
+        self.expansion = expansion
         self.config_file = config_file
         self.config_data = {}
+        self.file_signature = None   # (st_ino, st_size, st_mtime_ns) of the last parsed or written file
+        self.parse_count = 0         # Number of times the file was parsed with json.load
+        self.cache_hit_count = 0     # Number of reload checks answered from the cached data
+        self.subscribers = []        # (callback, section) pairs notified when a reload changes a section
+        self.typed_config = None     # AppConfig compiled from config_data, see get_typed_config
+        self.typed_config_source = None
+        self.generation = 0          # Incremented whenever config_data is loaded or modified
+        self.load_error = None       # Why the last load failed, None after a successful load
+        # One lock for loading, editing and writing config_data; never held while calling subscribers
+        self.lock = threading.RLock()
+        self.save_debounce = save_debounce
+        self.unsaved_edits = []      # Edits not yet written, replayed onto the data of an external reload
+        self.file_data = {}          # Data as last read from or written to the file, the base of unsaved_edits
+        self.save_timer = None
+        self.save_pending = False
+        self.save_request_count = 0  # Number of save_config calls
+        self.write_count = 0         # Number of times the file was actually written
+        _instances.add(self)
+        self.watcher = None
+        self.watch_thread = None
+        self.watch_stop_pipe = None
         self.load_config()
 
+    def _stat_signature(self, st):
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
     def load_config(self):
         """
-        Load configuration data from JSON file
+        Load configuration data from JSON file, keeping the current data if the file cannot be parsed
         """
+        signature = None
         try:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.config_data = json.load(f)
+                    signature = self._stat_signature(os.fstat(f.fileno()))
+                    config_data = json.load(f)
+                # Older files are upgraded in memory and written in the new format on the next save
+                migrate_config(config_data)
+                file_data = copy.deepcopy(config_data)
+                self._replay_edits(config_data)
+                self.file_data = file_data
+                self.config_data = config_data
+                self.file_signature = signature
+                self.parse_count += 1
+                self.generation += 1
+                self.load_error = None
             else:
                 # If file does not exist, create default configuration
                 self.create_config_file()
         except Exception as e:
             print(f"Error loading configuration file: {e}")
-            # Create default configuration
-            self.config_data = {}
+            self.load_error = str(e)
+            # Keep the last good data; remember the broken file so it is not parsed again until it changes
+            self.file_signature = signature
+
+    def _edit_base(self, data, kind, section, key):
+        # The part of the data an edit replaces, compared between the file before and after a reload
+        if kind == 'all':
+            return data
+        if kind == 'section':
+            return data.get(section)
+        return data.get(section, {}).get(key, _MISSING)
+
+    def _record_edit(self, kind, section, key, value):
+        self.unsaved_edits.append((kind, section, key, value, self._edit_base(self.file_data, kind, section, key)))
+
+    def _replay_edits(self, config_data):
+        # Apply edits that were not written yet onto freshly loaded data, so an external change
+        # arriving within the save debounce window does not discard them. An edit whose key the
+        # external writer changed as well is dropped, the newer file wins
+        kept = []
+        for edit in self.unsaved_edits:
+            kind, section, key, value, base = edit
+            if self._edit_base(config_data, kind, section, key) != base:
+                continue
+            if kind == 'all':
+                config_data.clear()
+                config_data.update(copy.deepcopy(value))
+            elif kind == 'section':
+                config_data[section] = copy.deepcopy(value)
+            else:
+                config_data.setdefault(section, {})[key] = copy.deepcopy(value)
+            kept.append(edit)
+        self.unsaved_edits = kept
+
+    def close(self):
+        """
+        Write pending changes and stop watching, for managers created for a limited time
+        """
+        self.flush()
+        self.stop_watching()
+        _instances.discard(self)
+
+    def reload_if_changed(self):
+        """
+        Reload the configuration only if the file changed since it was last read or written
+
+        Subscribers are notified here, whichever caller notices the change first.
+
+        Returns:
+            bool: True if the file was parsed again
+        """
+        return self._reload() is not None
+
+    def _reload(self):
+        # Returns None if the file is unchanged, else the names of the sections that changed
+        with self.lock:
+            try:
+                signature = self._stat_signature(os.stat(self.config_file))
+            except OSError:
+                signature = None
+            if signature is not None and signature == self.file_signature:
+                self.cache_hit_count += 1
+                return None
+            old_data = self.config_data
+            self.load_config()
+            new_data = self.config_data
+        if new_data is old_data:
+            return []
+        # Callbacks run outside the lock, they may read the configuration themselves
+        changed = [name for name in set(old_data) | set(new_data) if old_data.get(name) != new_data.get(name)]
+        for name in changed:
+            for callback, section in list(self.subscribers):
+                if section is not None and section != name:
+                    continue
+                try:
+                    callback(name, old_data.get(name), new_data.get(name))
+                except Exception as e:
+                    print(f"Error in configuration change callback: {e}")
+        return changed
+
+    def subscribe(self, callback, section=None):
+        """
+        Register a configuration change callback
+
+        Args:
+            callback: Called as callback(section, old_data, new_data) for each changed section
+            section (str): Only report changes of this section, None for all sections
+        """
+        self.subscribers.append((callback, section))
+
+    def unsubscribe(self, callback):
+        """
+        Remove every registration of a configuration change callback
+
+        Args:
+            callback: Callback previously passed to subscribe
+        """
+        self.subscribers = [(cb, sec) for cb, sec in self.subscribers if cb != callback]
+
+    def check_for_changes(self):
+        """
+        Reload the file if it changed and notify subscribers of every changed section
+
+        Returns:
+            list: Names of the sections that changed
+        """
+        return self._reload() or []
+
+    def create_watcher(self):
+        """
+        Create the inotify watcher without starting a thread, for callers running their own event loop
+
+        Returns:
+            ConfigWatcher: Watcher whose fileno() becomes readable when the directory changes
+        """
+        if self.watcher is None:
+            self.watcher = ConfigWatcher(self.config_file)
+        return self.watcher
+
+    def process_watch_events(self):
+        """
+        Handle readable watcher events, call after the watcher fd was reported readable
+
+        Returns:
+            list: Names of the sections that changed
+        """
+        if self.watcher is not None and self.watcher.read_events():
+            return self.check_for_changes()
+        return []
+
+    def _watch_loop(self, poll_interval):
+        read_fds = [self.watch_stop_pipe[0]]
+        if self.watcher is not None:
+            read_fds.append(self.watcher.fileno())
+            poll_interval = None    # Block until inotify or the stop pipe wakes us
+        while True:
+            readable, _, _ = select.select(read_fds, [], [], poll_interval)
+            if self.watch_stop_pipe[0] in readable:
+                break
+            try:
+                if self.watcher is not None:
+                    self.process_watch_events()
+                else:
+                    self.check_for_changes()
+            except Exception as e:
+                print(f"Error watching configuration file: {e}")
+
+    def start_watching(self, poll_interval=1.0):
+        """
+        Start a background thread delivering change events to subscribers
+
+        Args:
+            poll_interval (float): File check interval used only when inotify is unavailable
+        """
+        if self.watch_thread is not None:
+            return
+        try:
+            self.create_watcher()
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, polling configuration file: {e}")
+            self.watcher = None
+        self.watch_stop_pipe = os.pipe()
+        self.watch_thread = threading.Thread(target=self._watch_loop, args=(poll_interval,), daemon=True)
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        """
+        Stop the background watch thread and release the inotify descriptor
+        """
+        if self.watch_thread is not None:
+            os.write(self.watch_stop_pipe[1], b'x')
+            self.watch_thread.join()
+            self.watch_thread = None
+        if self.watch_stop_pipe is not None:
+            os.close(self.watch_stop_pipe[0])
+            os.close(self.watch_stop_pipe[1])
+            self.watch_stop_pipe = None
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+
+    def get_typed_config(self):
+        """
+        Get the configuration as validated slotted dataclasses
+
+        The configuration is validated once per parse, range errors are clamped and reported then.
+
+        Returns:
+            AppConfig: Typed configuration, e.g. get_typed_config().fan.mode2_low_speed
+        """
+        self.reload_if_changed()
+        if self.typed_config is None or self.typed_config_source is not self.config_data:
+            typed_config, errors = compile_config(self.config_data)
+            for error in errors:
+                print(f"Configuration error: {error}")
+            self.typed_config = typed_config
+            self.typed_config_source = self.config_data
+        return self.typed_config
+
+    def get_cache_stats(self):
+        """
+        Get configuration cache counters
+
+        Returns:
+            dict: Parse and cache hit counts
+        """
+        return {
+            "parse_count": self.parse_count,
+            "cache_hit_count": self.cache_hit_count
+        }
     
-    def save_config(self):
+    def save_config(self, immediate=False):
         """
         Save configuration data to JSON file
+
+        Requests arriving within save_debounce seconds are coalesced into one write.
+
+        Args:
+            immediate (bool): Write now instead of waiting for the debounce window
+        """
+        with self.lock:
+            self.save_request_count += 1
+            self.save_pending = True
+            if immediate or self.save_debounce <= 0:
+                self.flush()
+            elif self.save_timer is None:
+                self.save_timer = threading.Timer(self.save_debounce, self.flush)
+                self.save_timer.daemon = True
+                self.save_timer.start()
+
+    def flush(self):
+        """
+        Write a pending save now, called automatically at the end of the debounce window and on exit
         """
+        with self.lock:
+            if self.save_timer is not None:
+                self.save_timer.cancel()
+                self.save_timer = None
+            if not self.save_pending:
+                return
+            self.save_pending = False
+            try:
+                self._write_config()
+            except Exception as e:
+                print(f"Error saving configuration file: {e}")
+
+    def _write_config(self):
+        # Write to a temporary file in the same directory, fsync it and rename it over the
+        # configuration file, so readers see either the old or the new file, never a partial one
+        data = json.dumps(self.config_data, indent=2, ensure_ascii=False)
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(self.config_file), suffix='.tmp')
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config_data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving configuration file: {e}")
+            try:
+                st = os.stat(self.config_file)
+                os.fchmod(fd, st.st_mode & 0o777)
+                os.fchown(fd, st.st_uid, st.st_gid)
+            except FileNotFoundError:
+                os.fchmod(fd, 0o644)
+            except PermissionError:
+                pass
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                # The data in memory now matches the file, no need to parse our own write
+                signature = self._stat_signature(os.fstat(f.fileno()))
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        self.file_signature = signature
+        self.write_count += 1
+        self.unsaved_edits = []
+        self.file_data = json.loads(data)
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def get_write_stats(self):
+        """
+        Get configuration save counters
+
+        Returns:
+            dict: Save requests, actual writes and whether a write is pending
+        """
+        return {
+            "save_request_count": self.save_request_count,
+            "write_count": self.write_count,
+            "save_pending": self.save_pending
+        }
     
     def get_value(self, section, key):
         """
@@ -63,9 +478,13 @@ class ConfigManager:
             key (str): Configuration item name
             value: Value to set
         """
-        if section not in self.config_data:
-            self.config_data[section] = {}
-        self.config_data[section][key] = value
+        with self.lock:
+            if section not in self.config_data:
+                self.config_data[section] = {}
+            self.config_data[section][key] = value
+            self._record_edit('value', section, key, value)
+            self.typed_config = None
+            self.generation += 1
     
     def get_section(self, section):
         """
@@ -77,7 +496,7 @@ class ConfigManager:
         Returns:
             dict: Configuration section data
         """
-        self.load_config()
+        self.reload_if_changed()
         return self.config_data.get(section, {})
     
     def set_section(self, section, data):
@@ -88,7 +507,11 @@ class ConfigManager:
             section (str): Configuration section name
             data (dict): Data to set
         """
-        self.config_data[section] = data
+        with self.lock:
+            self.config_data[section] = data
+            self._record_edit('section', section, None, data)
+            self.typed_config = None
+            self.generation += 1
     
     def get_all_config(self):
         """
@@ -106,7 +529,12 @@ class ConfigManager:
         Args:
             config_data (dict): All configuration data
         """
-        self.config_data = config_data
+        with self.lock:
+            self.config_data = config_data
+            self.unsaved_edits = []
+            self._record_edit('all', None, None, config_data)
+            self.typed_config = None
+            self.generation += 1
  
     def delete_config_file(self):
         """ Delete configuration file """
@@ -123,38 +551,30 @@ class ConfigManager:
         fan_temp_speed_default = [75, 125, 175]
         fan_map_default = [0, 255]
         
-        # Safely get configuration from expansion board
+        # Safely get configuration from expansion board, the bus is only opened here when no handle was injected
+        owns_expansion = self.expansion is None
         try:
-            led_mode = self.expansion.get_led_mode()
-            if led_mode == 4:
-                led_mode_default = 0
-            elif led_mode == 3:
-                led_mode_default = 1
-            elif led_mode == 2:
-                led_mode_default = 2
-            elif led_mode == 1:
-                led_mode_default = 3
-            elif led_mode == 0:
-                led_mode_default = 5
-                
-            fan_mode = self.expansion.get_fan_mode()
-            if fan_mode == 2:
-                fan_mode_default = 0
-            elif fan_mode == 3:
-                fan_mode_default = 1
-            elif fan_mode == 1:
-                fan_mode_default = 2
-            elif fan_mode == 0:
-                fan_mode_default = 4
-                
+            if owns_expansion:
+                from api_expansion import Expansion
+                self.expansion = Expansion()
+            led_mode_default = LED_MODE_FROM_BOARD.get(self.expansion.get_led_mode(), led_mode_default)
+            fan_mode_default = FAN_MODE_FROM_BOARD.get(self.expansion.get_fan_mode(), fan_mode_default)
             fan_temp_threshold_default = self.expansion.get_fan_threshold()
             fan_temp_speed_default = self.expansion.get_fan_temp_mode_speed()
             fan_map_default = self.expansion.get_fan_pi_following()
         except Exception as e:
             print(f"Error getting configuration from expansion board: {e}")
+        finally:
+            if owns_expansion and self.expansion is not None:
+                try:
+                    self.expansion.end()
+                except Exception:
+                    pass
+                self.expansion = None
         try:
             if not os.path.exists(self.config_file):
                 self.config_data = {
+                    "version": CONFIG_VERSION,
                     "Monitor": {
                         "screen_orientation": 0,
                         "follow_led_color": 0
@@ -180,6 +600,9 @@ class ConfigManager:
                         "mode2_high_speed": fan_temp_speed_default[2],
                         "mode3_min_speed_mapping": fan_map_default[0],
                         "mode3_max_speed_mapping": fan_map_default[1],
+                        **get_defaults("Fan", "controller"),
+                        **get_defaults("Fan", "pid_"),
+                        **get_defaults("Fan", "curve_"),
                         "task_name": "task_fan.py",
                         "is_run_on_startup": True
                     },
@@ -190,9 +613,11 @@ class ConfigManager:
                     "Service": {
                         "is_exist_on_rpi": False,
                         "is_run_on_startup": False
-                    }
+                    },
+                    "Tasks": {}
                 }
-                self.save_config()
+                self.generation += 1
+                self.save_config(immediate=True)
             else:
                 print(f"Configuration file already exists: {self.config_file}")
         except Exception as e:
@@ -202,7 +627,7 @@ class ConfigManager:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end()
+        self.flush()
 
 
 if __name__ == '__main__':
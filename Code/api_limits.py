@@ -0,0 +1,82 @@
+import json
+import os
+import resource
+import sys
+
+SCHED_POLICIES = {
+    'other': getattr(os, 'SCHED_OTHER', None), 'batch': getattr(os, 'SCHED_BATCH', None),
+    'idle': getattr(os, 'SCHED_IDLE', None), 'fifo': getattr(os, 'SCHED_FIFO', None),
+    'rr': getattr(os, 'SCHED_RR', None),
+}
+
+# Limits set on the process itself; rss_limit_mb is enforced by the manager while the task runs
+SPAWN_LIMIT_KEYS = ('nice', 'cpu_affinity', 'sched_policy', 'memory_limit_mb')
+
+def has_spawn_limits(limits):
+    """
+    Check whether a task has limits that must be applied when its process starts
+
+    Args:
+        limits (dict): Task limits, see TaskRegistry.LIMIT_KEYS
+
+    Returns:
+        bool: True if any of SPAWN_LIMIT_KEYS is set
+    """
+    return any(key in limits for key in SPAWN_LIMIT_KEYS)
+
+def apply_limits(limits):
+    """
+    Apply the scheduling and memory limits of a task to the calling process
+
+    Called in the new process before the task's code runs, so the task never executes
+    a line without them and every thread it creates inherits nice, affinity and policy.
+
+    Args:
+        limits (dict): Task limits, see TaskRegistry.LIMIT_KEYS
+
+    Raises:
+        OSError: A limit was refused, e.g. lowering nice or real-time policies need CAP_SYS_NICE
+        ValueError: A limit value is out of range
+    """
+    if 'nice' in limits:
+        os.setpriority(os.PRIO_PROCESS, 0, limits['nice'])
+    if 'cpu_affinity' in limits:
+        os.sched_setaffinity(0, limits['cpu_affinity'])
+    if 'sched_policy' in limits:
+        policy = SCHED_POLICIES.get(limits['sched_policy'])
+        if policy is None:
+            raise ValueError(f"sched_policy {limits['sched_policy']} is not supported here")
+        # Real-time policies reject priority 0, the other policies only accept 0
+        priority = limits.get('sched_priority', 1) if limits['sched_policy'] in ('fifo', 'rr') else 0
+        os.sched_setscheduler(0, policy, os.sched_param(priority))
+    if 'memory_limit_mb' in limits:
+        limit = limits['memory_limit_mb'] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def limits_command(limits, command):
+    """
+    Wrap a command line so the limits are applied before it is executed
+
+    The wrapper is this file run by the same interpreter: it applies the limits to itself and
+    replaces itself with the command, so no preexec_fn runs in the threaded manager.
+
+    Args:
+        limits (dict): Task limits
+        command (list): Command line, the interpreter first
+
+    Returns:
+        list: Command line starting the wrapper
+    """
+    return [command[0], os.path.abspath(__file__), json.dumps(limits), '--'] + command
+
+if __name__ == '__main__':
+    # Usage: api_limits.py LIMITS_JSON -- COMMAND...
+    if len(sys.argv) < 4 or sys.argv[2] != '--':
+        print("usage: api_limits.py LIMITS_JSON -- COMMAND...", file=sys.stderr)
+        sys.exit(2)
+    try:
+        apply_limits(json.loads(sys.argv[1]))
+    except (OSError, ValueError) as e:
+        # The task still starts, as it did when limits were refused after the spawn
+        print(f"Could not apply limits {sys.argv[1]}: {e}", file=sys.stderr)
+    os.execv(sys.argv[3], sys.argv[3:])
@@ -0,0 +1,44 @@
+class ProcessStat:
+    """
+    The fields of /proc/[pid]/stat used by the monitors
+
+    start_time (clock ticks after boot) never changes for a process, so (pid, start_time)
+    identifies one process even after its pid was reused.
+    """
+    __slots__ = ('name', 'ppid', 'cpu_ticks', 'start_time', 'rss_pages')
+
+    def __init__(self, name, ppid, cpu_ticks, start_time, rss_pages):
+        self.name = name
+        self.ppid = ppid
+        self.cpu_ticks = cpu_ticks
+        self.start_time = start_time
+        self.rss_pages = rss_pages
+
+def read_process_stat(pid, proc_path='/proc'):
+    """
+    Read and parse /proc/[pid]/stat
+
+    Args:
+        pid (int): Process ID
+        proc_path (str): Mount point of the proc filesystem
+
+    Returns:
+        ProcessStat: Parsed fields, None if the process is gone or the line is malformed
+    """
+    try:
+        with open(f'{proc_path}/{pid}/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces or brackets, so split on the last ')'
+    name_start = data.find(b'(')
+    name_end = data.rfind(b')')
+    if name_start < 0 or name_end < 0:
+        return None
+    fields = data[name_end + 2:].split()
+    try:
+        # Fields after the name start at field 3 (state): ppid is 4, utime/stime 14/15, starttime 22, rss 24
+        return ProcessStat(data[name_start + 1:name_end].decode('utf-8', 'replace'), int(fields[1]),
+                           int(fields[11]) + int(fields[12]), int(fields[19]), int(fields[21]))
+    except (IndexError, ValueError):
+        return None
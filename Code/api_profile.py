@@ -0,0 +1,260 @@
+import copy
+import threading
+import time
+
+class ProfileManager:
+    """Named LED/Fan configurations stored in the Profiles section and switched as a whole"""
+
+    PROFILE_SECTIONS = ('LED', 'Fan')
+    # Keys that describe which task runs rather than how the hardware behaves
+    EXCLUDED_KEYS = ('task_name', 'is_run_on_startup')
+    # The mode keys reach the board when no task owns the Fan section; the controller and pid_ keys
+    # are what task_fan.py drives the fans with when it runs, both profiles set the same ones
+    DEFAULT_PROFILES = {
+        "quiet": {
+            "LED": {"mode": 5},
+            "Fan": {"mode": 0, "mode2_low_temp_threshold": 40, "mode2_high_temp_threshold": 65, "mode2_temp_schmitt": 3,
+                    "mode2_low_speed": 40, "mode2_middle_speed": 80, "mode2_high_speed": 150,
+                    "controller": "pid", "pid_group1_setpoint": 65, "pid_group2_setpoint": 65, "pid_group3_setpoint": 50,
+                    "pid_min_duty": 0, "pid_max_duty": 150}
+        },
+        "max_cooling": {
+            "Fan": {"mode": 2, "mode1_fan_group1": 255, "mode1_fan_group2": 255, "mode1_fan_group3": 255,
+                    "controller": "pid", "pid_group1_setpoint": 30, "pid_group2_setpoint": 30, "pid_group3_setpoint": 30,
+                    "pid_min_duty": 255, "pid_max_duty": 255}
+        }
+    }
+
+    def __init__(self, config_manager, reconciler=None):
+        """
+        Initialize profile manager
+
+        Args:
+            config_manager (ConfigManager): Configuration holding the Profiles section
+            reconciler (BoardReconciler): Applies a switched profile to the board, optional
+        """
+        self.config_manager = config_manager
+        self.reconciler = reconciler
+
+    def _profiles_section(self):
+        section = self.config_manager.get_section('Profiles')
+        if not section:
+            section = {"active": None, "profiles": copy.deepcopy(self.DEFAULT_PROFILES), "schedule": []}
+        return section
+
+    def list_profiles(self):
+        """
+        Get the names of all stored profiles
+
+        Returns:
+            list: Profile names
+        """
+        return sorted(self._profiles_section().get('profiles', {}))
+
+    def get_active_profile(self):
+        """
+        Get the name of the profile applied last
+
+        Returns:
+            str: Profile name, None if no profile was applied
+        """
+        return self._profiles_section().get('active')
+
+    def get_profile(self, name):
+        """
+        Get the stored settings of a profile
+
+        Args:
+            name (str): Profile name
+
+        Returns:
+            dict: {section: {key: value}}, None if the profile does not exist
+        """
+        return self._profiles_section().get('profiles', {}).get(name)
+
+    def save_profile(self, name, profile=None):
+        """
+        Store a profile, by default a copy of the current LED and Fan settings
+
+        Args:
+            name (str): Profile name
+            profile (dict): {section: {key: value}} to store instead of the current settings
+        """
+        if profile is None:
+            profile = {}
+            for section in self.PROFILE_SECTIONS:
+                data = self.config_manager.get_section(section)
+                profile[section] = {k: v for k, v in data.items() if k not in self.EXCLUDED_KEYS}
+        profiles_section = copy.deepcopy(self._profiles_section())
+        profiles_section.setdefault('profiles', {})[name] = profile
+        self.config_manager.set_section('Profiles', profiles_section)
+        self.config_manager.save_config()
+
+    def delete_profile(self, name):
+        """
+        Remove a stored profile
+
+        Args:
+            name (str): Profile name
+
+        Returns:
+            bool: True if the profile existed
+        """
+        profiles_section = copy.deepcopy(self._profiles_section())
+        if profiles_section.get('profiles', {}).pop(name, None) is None:
+            return False
+        if profiles_section.get('active') == name:
+            profiles_section['active'] = None
+        self.config_manager.set_section('Profiles', profiles_section)
+        self.config_manager.save_config()
+        return True
+
+    def apply_profile(self, name):
+        """
+        Switch to a profile: merge it into the LED and Fan sections in one atomic write,
+        then push only the differing registers to the board in one batch
+
+        A section whose task runs on startup (is_run_on_startup) is only saved: its task owns the
+        registers, so the board is not written. task_fan.py rereads the Fan section by itself and
+        follows the profile's controller and pid_/curve_ keys, not the board fan mode; task_led.py
+        does not use the LED settings. Such sections are listed under "saved_only".
+
+        Args:
+            name (str): Profile name
+
+        Returns:
+            dict: Board reconcile report, None without a reconciler or if the profile does not exist
+        """
+        profile = self.get_profile(name)
+        if profile is None:
+            print(f"Profile {name} not found")
+            return None
+        with self.config_manager.lock:
+            for section in self.PROFILE_SECTIONS:
+                if section in profile:
+                    data = dict(self.config_manager.get_section(section))
+                    data.update({k: v for k, v in profile[section].items() if k not in self.EXCLUDED_KEYS})
+                    self.config_manager.set_section(section, data)
+            profiles_section = copy.deepcopy(self._profiles_section())
+            profiles_section['active'] = name
+            self.config_manager.set_section('Profiles', profiles_section)
+            self.config_manager.save_config(immediate=True)
+        print(f"Profile {name} applied")
+        if self.reconciler is None:
+            return None
+        config = self.config_manager.get_all_config()
+        saved_only = [section for section in self.reconciler.task_owned_sections(config) if section in profile]
+        if saved_only:
+            print(f"Profile {name}: {', '.join(saved_only)} only saved, driven by their task instead of the board settings")
+        report = self.reconciler.apply_targets(self.reconciler.compute_targets(config))
+        report["saved_only"] = saved_only
+        return report
+
+    def _time_in_window(self, now, start, end):
+        # Windows are "HH:MM" strings, a window whose end is before its start spans midnight
+        minutes = now.tm_hour * 60 + now.tm_min
+        start_h, start_m = (int(v) for v in start.split(':'))
+        end_h, end_m = (int(v) for v in end.split(':'))
+        start_minutes = start_h * 60 + start_m
+        end_minutes = end_h * 60 + end_m
+        if start_minutes <= end_minutes:
+            return start_minutes <= minutes < end_minutes
+        return minutes >= start_minutes or minutes < end_minutes
+
+    def select_scheduled_profile(self, now=None, snapshot=None):
+        """
+        Pick the profile the schedule asks for, the first matching rule wins
+
+        A rule is {"profile": name} plus any of "start"/"end" ("HH:MM"),
+        "cpu_temp_above" (Celsius) and "cpu_usage_above" (percent); all given conditions must hold.
+
+        Args:
+            now (time.struct_time): Local time, defaults to the current time
+            snapshot (SystemSnapshot): Current metrics used by load based rules
+
+        Returns:
+            str: Profile name, None if no rule matches
+        """
+        if now is None:
+            now = time.localtime()
+        for rule in self._profiles_section().get('schedule', []):
+            if 'start' in rule and 'end' in rule and not self._time_in_window(now, rule['start'], rule['end']):
+                continue
+            if 'cpu_temp_above' in rule and not (snapshot is not None and snapshot.cpu_temperature > rule['cpu_temp_above']):
+                continue
+            if 'cpu_usage_above' in rule and not (snapshot is not None and snapshot.cpu_usage > rule['cpu_usage_above']):
+                continue
+            return rule.get('profile')
+        return None
+
+    def run_scheduler(self, interval=30.0, stop_event=None):
+        """
+        Evaluate the schedule periodically and switch when the selected profile changes
+
+        Args:
+            interval (float): Seconds between evaluations
+            stop_event (threading.Event): Ends the loop when set
+        """
+        from api_systemInfo import SystemInformation, SystemSnapshot
+        system_information = SystemInformation()
+        snapshot = SystemSnapshot()
+        if stop_event is None:
+            stop_event = threading.Event()
+        while not stop_event.is_set():
+            try:
+                snapshot = system_information.snapshot(snapshot)
+                name = self.select_scheduled_profile(snapshot=snapshot)
+                if name is not None and name != self.get_active_profile():
+                    self.apply_profile(name)
+            except Exception as e:
+                print(f"Error running profile schedule: {e}")
+            stop_event.wait(interval)
+
+
+if __name__ == '__main__':
+    import argparse
+    from api_json import ConfigManager
+    parser = argparse.ArgumentParser(description="Manage LED/Fan performance profiles")
+    parser.add_argument('command', choices=['list', 'show', 'save', 'apply', 'delete', 'schedule'])
+    parser.add_argument('name', nargs='?', help="Profile name")
+    parser.add_argument('--config', default='app_config.json', help="Configuration file path")
+    parser.add_argument('--no-board', action='store_true', help="Only update the configuration file")
+    args = parser.parse_args()
+
+    config_manager = ConfigManager(args.config)
+    reconciler = None
+    expansion = None
+    if args.command in ('apply', 'schedule') and not args.no_board:
+        from api_expansion import Expansion
+        from api_reconcile import BoardReconciler
+        expansion = Expansion()
+        reconciler = BoardReconciler(expansion, config_manager)
+    profile_manager = ProfileManager(config_manager, reconciler)
+
+    if args.command != 'list' and args.command != 'schedule' and not args.name:
+        parser.error(f"{args.command} requires a profile name")
+    try:
+        if args.command == 'list':
+            active = profile_manager.get_active_profile()
+            for name in profile_manager.list_profiles():
+                print(f"{'*' if name == active else ' '} {name}")
+        elif args.command == 'show':
+            print(profile_manager.get_profile(args.name))
+        elif args.command == 'save':
+            profile_manager.save_profile(args.name)
+        elif args.command == 'apply':
+            report = profile_manager.apply_profile(args.name)
+            if report is not None:
+                print(f"Board writes: {report['writes']}")
+        elif args.command == 'delete':
+            if not profile_manager.delete_profile(args.name):
+                print(f"Profile {args.name} not found")
+        elif args.command == 'schedule':
+            try:
+                profile_manager.run_scheduler()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        config_manager.flush()
+        if expansion is not None:
+            expansion.end()
@@ -0,0 +1,276 @@
+import threading
+import time
+
+# UI mode (stored in app_config.json) -> expansion board mode register value.
+# UI LED mode 4 and fan mode 3 run a custom task script and have no board target.
+LED_MODE_TO_BOARD = {0: 4, 1: 3, 2: 2, 3: 1, 5: 0}     # Rainbow, Breathing, Following, RGB, Close
+FAN_MODE_TO_BOARD = {0: 2, 1: 3, 2: 1, 4: 0}           # Auto temp, Pi following, Manual, Close
+LED_MODE_FROM_BOARD = {board: ui for ui, board in LED_MODE_TO_BOARD.items()}
+FAN_MODE_FROM_BOARD = {board: ui for ui, board in FAN_MODE_TO_BOARD.items()}
+LED_COUNT = 6                                          # get_all_led_color returns 3 bytes per LED
+
+class BoardReconciler:
+    """Bring the expansion board registers in line with the LED and Fan configuration sections"""
+
+    def __init__(self, expansion, config_manager=None):
+        """
+        Initialize reconciler
+
+        Args:
+            expansion (Expansion): Board handle used for read back and writes
+            config_manager (ConfigManager): Source of the desired state for reconcile()
+        """
+        self.expansion = expansion
+        self.config_manager = config_manager
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.change_event = threading.Event()
+        self.last_report = None
+
+        # name: (read function, write function, read back normalizer)
+        self.registers = {
+            "led_mode":            (expansion.get_led_mode, expansion.set_led_mode, int),
+            "led_color":           (expansion.get_all_led_color, lambda v: expansion.set_all_led_color(*v), self._normalize_led_color),
+            "fan_mode":            (expansion.get_fan_mode, expansion.set_fan_mode, int),
+            "fan_threshold":       (expansion.get_fan_threshold, lambda v: expansion.set_fan_threshold(*v), list),
+            "fan_temp_mode_speed": (expansion.get_fan_temp_mode_speed, lambda v: expansion.set_fan_temp_mode_speed(*v), list),
+            "fan_pi_following":    (expansion.get_fan_pi_following, lambda v: expansion.set_fan_pi_following(*v), list),
+            "fan_duty":            (expansion.get_fan_duty, lambda v: expansion.set_fan_duty(*v), list),
+        }
+
+    def _normalize_led_color(self, values):
+        # All LEDs share one color when set through set_all_led_color, otherwise keep every value
+        # so the read back never matches a single [r, g, b] target
+        values = list(values)
+        first = values[:3]
+        if all(values[i:i + 3] == first for i in range(0, 3 * LED_COUNT, 3)):
+            return first
+        return values
+
+    def led_targets(self, led):
+        """
+        Map an LED configuration section to target register values
+
+        Args:
+            led (dict): LED section
+
+        Returns:
+            list: (register name, value) pairs in write order
+        """
+        board_mode = LED_MODE_TO_BOARD.get(led.get('mode', 0))
+        if board_mode is None:
+            return []
+        targets = [("led_mode", board_mode)]
+        if board_mode in (1, 2, 3):     # RGB, Following and Breathing use the configured color
+            targets.append(("led_color", [led.get('red_value', 0), led.get('green_value', 0), led.get('blue_value', 255)]))
+        return targets
+
+    def fan_targets(self, fan):
+        """
+        Map a Fan configuration section to target register values
+
+        Args:
+            fan (dict): Fan section
+
+        Returns:
+            list: (register name, value) pairs in write order
+        """
+        board_mode = FAN_MODE_TO_BOARD.get(fan.get('mode', 0))
+        if board_mode is None:
+            return []
+        targets = [("fan_mode", board_mode)]
+        if board_mode == 2:
+            targets.append(("fan_threshold", [fan.get('mode2_low_temp_threshold', 30),
+                                              fan.get('mode2_high_temp_threshold', 50),
+                                              fan.get('mode2_temp_schmitt', 3)]))
+            targets.append(("fan_temp_mode_speed", [fan.get('mode2_low_speed', 75),
+                                                    fan.get('mode2_middle_speed', 125),
+                                                    fan.get('mode2_high_speed', 175)]))
+        elif board_mode == 3:
+            targets.append(("fan_pi_following", [fan.get('mode3_min_speed_mapping', 0),
+                                                 fan.get('mode3_max_speed_mapping', 255)]))
+        elif board_mode == 1:
+            targets.append(("fan_duty", [fan.get('mode1_fan_group1', 75),
+                                         fan.get('mode1_fan_group2', 75),
+                                         fan.get('mode1_fan_group3', 75)]))
+        else:
+            targets.append(("fan_duty", [0, 0, 0]))
+        return targets
+
+    def task_owned_sections(self, config):
+        """
+        Get the sections whose task script runs on startup, the task owns those registers
+
+        Args:
+            config (dict): All configuration data
+
+        Returns:
+            list: Section names, subset of ['LED', 'Fan']
+        """
+        return [section for section in ('LED', 'Fan') if config.get(section, {}).get('is_run_on_startup', False)]
+
+    def compute_targets(self, config):
+        """
+        Map the whole configuration to target register values
+
+        Sections owned by a task (see task_owned_sections) are skipped.
+
+        Args:
+            config (dict): All configuration data
+
+        Returns:
+            list: (register name, value) pairs in write order
+        """
+        owned = self.task_owned_sections(config)
+        targets = []
+        if 'LED' not in owned:
+            targets += self.led_targets(config.get('LED', {}))
+        if 'Fan' not in owned:
+            targets += self.fan_targets(config.get('Fan', {}))
+        return targets
+
+    def read_state(self, names):
+        """
+        Read back the current board value of each register
+
+        Args:
+            names (list): Register names
+
+        Returns:
+            dict: name -> value, None when the read failed
+        """
+        state = {}
+        for name in names:
+            read, _, normalize = self.registers[name]
+            try:
+                state[name] = normalize(read())
+            except Exception:
+                state[name] = None
+        return state
+
+    def apply_targets(self, targets, dry_run=False):
+        """
+        Write only the registers whose read back value differs from the target
+
+        Args:
+            targets (list): (register name, value) pairs in write order
+            dry_run (bool): Report drift without writing
+
+        Returns:
+            dict: Report with drift found, writes issued and write errors (including I2C errors
+                  the Expansion write swallowed and reported by returning False)
+        """
+        with self.lock:
+            current = self.read_state([name for name, _ in targets])
+            report = {"checked": len(targets), "drift": {}, "writes": [], "errors": {}}
+            for name, value in targets:
+                if current[name] == value:
+                    continue
+                report["drift"][name] = {"board": current[name], "target": value}
+                if dry_run:
+                    continue
+                try:
+                    if self.registers[name][1](value) is False:
+                        report["errors"][name] = "I2C write failed"
+                    else:
+                        report["writes"].append(name)
+                except Exception as e:
+                    report["errors"][name] = str(e)
+            self.last_report = report
+            return report
+
+    def reconcile_section(self, section, data, dry_run=False):
+        """
+        Reconcile a single LED or Fan section, e.g. unsaved values from the GUI
+
+        Args:
+            section (str): 'LED' or 'Fan'
+            data (dict): Section data
+            dry_run (bool): Report drift without writing
+
+        Returns:
+            dict: Reconcile report
+        """
+        targets = self.led_targets(data) if section == 'LED' else self.fan_targets(data)
+        return self.apply_targets(targets, dry_run)
+
+    def reconcile(self, dry_run=False):
+        """
+        Reconcile the board against the configuration file
+
+        Args:
+            dry_run (bool): Report drift without writing
+
+        Returns:
+            dict: Reconcile report
+        """
+        self.config_manager.reload_if_changed()
+        return self.apply_targets(self.compute_targets(self.config_manager.get_all_config()), dry_run)
+
+    def _on_config_change(self, section, old_data, new_data):
+        if section in ('LED', 'Fan'):
+            self.change_event.set()
+
+    def _run(self, interval):
+        while not self.stop_event.is_set():
+            try:
+                report = self.reconcile()
+                if report["drift"]:
+                    print(f"Board drift corrected: {report['drift']}")
+            except Exception as e:
+                print(f"Error reconciling board state: {e}")
+            self.change_event.wait(interval)
+            self.change_event.clear()
+
+    def start(self, interval=60.0, watch=True):
+        """
+        Reconcile in a background thread periodically and whenever LED or Fan configuration changes
+
+        Args:
+            interval (float): Seconds between periodic checks
+            watch (bool): Start the configuration watcher, False when the caller's own event loop
+                          already reloads the configuration (TaskManager, TaskHost)
+        """
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.config_manager.subscribe(self._on_config_change)
+        if watch:
+            self.config_manager.start_watching()
+        self.thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the background reconcile thread
+        """
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.change_event.set()
+        self.thread.join()
+        self.thread = None
+        self.config_manager.unsubscribe(self._on_config_change)
+
+
+if __name__ == '__main__':
+    import sys
+    from api_expansion import Expansion
+    from api_json import ConfigManager
+    expansion = Expansion()
+    config_manager = ConfigManager('app_config.json', expansion=expansion)
+    reconciler = BoardReconciler(expansion, config_manager)
+    if '--watch' in sys.argv:
+        # Keep the board in line with the configuration until interrupted
+        reconciler.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            reconciler.stop()
+    else:
+        print(reconciler.reconcile(dry_run='--dry-run' in sys.argv))
+    expansion.end()
@@ -0,0 +1,83 @@
+import errno
+import os
+import stat
+import tempfile
+
+SERVICE_RUNTIME_DIR = '/run/freenove_task_manager'   # RuntimeDirectory= of the generated service unit
+
+def get_runtime_dir():
+    """
+    Get the directory for the task manager's sockets, usage dump and I2C counters
+
+    Under the service systemd creates it (RuntimeDirectory=) and exports $RUNTIME_DIRECTORY;
+    the CLI finds the same directory under /run. Otherwise a per-user directory is used, in
+    $XDG_RUNTIME_DIR or, as the last resort, in the temporary directory with the uid in the name.
+
+    Returns:
+        str: Directory path, not created yet
+    """
+    if os.environ.get('RUNTIME_DIRECTORY'):
+        return os.environ['RUNTIME_DIRECTORY'].split(':')[0]
+    if os.path.isdir(SERVICE_RUNTIME_DIR):
+        return SERVICE_RUNTIME_DIR
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'freenove_task_manager')
+    return os.path.join(tempfile.gettempdir(), f'freenove_task_manager-{os.getuid()}')
+
+RUNTIME_DIR = get_runtime_dir()
+
+def ensure_private_dir(path):
+    """
+    Create a directory only this user can enter, or check that an existing one is such a directory
+
+    A directory in a shared location may have been created by someone else first, so an existing
+    path must be a real directory (not a symlink) owned by us; group and other permissions are
+    removed from it.
+
+    Args:
+        path (str): Directory to create or check
+
+    Returns:
+        str: path
+
+    Raises:
+        OSError: The path cannot be created or belongs to another user
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise OSError(errno.ENOTDIR, f"{path} is not a directory")
+    if info.st_uid != os.geteuid():
+        raise PermissionError(errno.EPERM, f"{path} is owned by uid {info.st_uid}, not by us")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+def write_file_atomic(path, text):
+    """
+    Replace a file with new text, readers never see a partial file
+
+    The text goes to a fresh mkstemp file in the same directory first, so an existing file or
+    symlink at a predictable temporary name is never followed.
+
+    Args:
+        path (str): File to write
+        text (str): New content
+
+    Raises:
+        OSError: The file cannot be written
+    """
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
@@ -2,11 +2,80 @@ import os
 import time
 import sys
 import shutil
+import socket
+
+class SystemdNotifier:
+    """Send sd_notify messages (READY, STATUS, WATCHDOG, STOPPING) to $NOTIFY_SOCKET"""
+
+    def __init__(self, socket_path=None):
+        """
+        Args:
+            socket_path (str): Notify socket, defaults to $NOTIFY_SOCKET; '@' prefixes an abstract socket
+        """
+        self.socket_path = socket_path if socket_path is not None else os.environ.get('NOTIFY_SOCKET')
+        self.sock = None
+        if self.socket_path:
+            address = self.socket_path
+            if address.startswith('@'):
+                address = '\0' + address[1:]
+            self.address = address
+            try:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+            except OSError as e:
+                print(f"Error creating notify socket: {e}")
+
+    @property
+    def enabled(self):
+        return self.sock is not None
+
+    def notify(self, state):
+        """Send one notification such as 'READY=1', return True if it was delivered"""
+        if self.sock is None:
+            return False
+        try:
+            self.sock.sendto(state.encode('utf-8'), self.address)
+            return True
+        except OSError as e:
+            print(f"Error sending notification to systemd: {e}")
+            return False
+
+    def ready(self, status=None):
+        """Tell systemd that start-up finished"""
+        return self.notify("READY=1" + (f"\nSTATUS={status}" if status else ""))
+
+    def status(self, text):
+        """Set the status line shown by systemctl status"""
+        return self.notify(f"STATUS={text}")
+
+    def watchdog(self):
+        """Reset the service watchdog timer"""
+        return self.notify("WATCHDOG=1")
+
+    def stopping(self):
+        """Tell systemd that shutdown started"""
+        return self.notify("STOPPING=1")
+
+    def watchdog_interval(self):
+        """Seconds between watchdog pings (half of WatchdogSec), or None if the watchdog is off"""
+        usec = os.environ.get('WATCHDOG_USEC')
+        pid = os.environ.get('WATCHDOG_PID')
+        if self.sock is None or not usec or (pid and pid != str(os.getpid())):
+            return None
+        try:
+            return int(usec) / 1e6 / 2
+        except ValueError:
+            return None
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
 
 class ServiceGenerator:
-    def __init__(self, filename="task_manager.py", service_name="my_app_running.service"):
+    def __init__(self, filename="task_manager.py", service_name="my_app_running.service", watchdog_sec=30):
         self.filename = filename
         self.service_name = service_name
+        self.watchdog_sec = watchdog_sec
         self.current_directory = None
         self.current_username = None
         self.get_current_directory()
@@ -43,16 +112,25 @@ class ServiceGenerator:
             print("Error: Directory or username not set.")
             sys.exit(1)
             
+        # Type=notify: the task manager reports READY=1 once its tasks are started and pings
+        # the watchdog from its event loop, so a hung manager is restarted. RuntimeDirectory gives
+        # it a private /run directory for its sockets and usage files instead of a shared /tmp path
         service_content = f"""[Unit]
 Description=My Python Script Service
 
 [Service]
+Type=notify
+NotifyAccess=main
+WatchdogSec={self.watchdog_sec}
+TimeoutStopSec=10
 ExecStart=/usr/bin/python3 {self.current_directory}/{self.filename}
 WorkingDirectory={self.current_directory}
 StandardOutput=inherit
 StandardError=inherit
 Restart=always
 User={self.current_username}
+RuntimeDirectory=freenove_task_manager
+RuntimeDirectoryMode=0700
 
 [Install]
 WantedBy=multi-user.target
@@ -1,17 +1,338 @@
 import os
+import abc
 import sys
 import time
 import psutil
 import atexit
 import signal
 import threading
-import datetime
 import socket
+import heapq
+import math
+from api_procfs import read_process_stat
+
+NAN = float('nan')
+MEMINFO_FIELDS = (b'MemTotal', b'MemAvailable', b'MemFree', b'Buffers', b'Cached', b'SReclaimable')
+
+
+class SystemSnapshot:
+    """One sample of all system metrics, unavailable values are NaN"""
+
+    __slots__ = ('timestamp', 'date', 'weekday', 'time', 'ip_address',
+                 'cpu_usage', 'cpu_temperature', 'fan_duty',
+                 'memory_percent', 'memory_used_gb', 'memory_total_gb',
+                 'disk_percent', 'disk_used_gb', 'disk_total_gb',
+                 'disk_read_rate', 'disk_write_rate', 'network_rx_rate', 'network_tx_rate')
+
+    timestamp: float        # time.monotonic() when the sample was taken
+    date: str               # YYYY-MM-DD
+    weekday: str            # Weekday name
+    time: str               # HH:MM:SS
+    ip_address: str
+    cpu_usage: float        # Percent
+    cpu_temperature: float  # Celsius
+    fan_duty: float         # Raspberry Pi fan PWM, 0~255
+    memory_percent: float
+    memory_used_gb: float
+    memory_total_gb: float
+    disk_percent: float
+    disk_used_gb: float
+    disk_total_gb: float
+    disk_read_rate: float   # Bytes per second
+    disk_write_rate: float
+    network_rx_rate: float
+    network_tx_rate: float
+
+    def __init__(self):
+        self.timestamp = 0.0
+        self.date = "1990-1-1"
+        self.weekday = "Error"
+        self.time = "0:0:0"
+        self.ip_address = "0.0.0.0"
+        self.cpu_usage = NAN
+        self.cpu_temperature = NAN
+        self.fan_duty = NAN
+        self.memory_percent = NAN
+        self.memory_used_gb = NAN
+        self.memory_total_gb = NAN
+        self.disk_percent = NAN
+        self.disk_used_gb = NAN
+        self.disk_total_gb = NAN
+        self.disk_read_rate = NAN
+        self.disk_write_rate = NAN
+        self.network_rx_rate = NAN
+        self.network_tx_rate = NAN
+
+    def __repr__(self):
+        return "SystemSnapshot({})".format(", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__))
+
+
+class ClockProvider:
+    """Date, weekday and time strings built from one timestamp and cached until the next second"""
+
+    def __init__(self):
+        self._second = None
+        self._fields = ("1990-1-1", "Error", "0:0:0")   # date, weekday, time
+
+    def get_fields(self):
+        """
+        Get the formatted clock fields for the current second
+
+        Returns:
+            tuple: (date 'YYYY-MM-DD', weekday name, time 'HH:MM:SS')
+        """
+        second = int(time.time())
+        if second != self._second:
+            local = time.localtime(second)
+            self._fields = (time.strftime('%Y-%m-%d', local),
+                            time.strftime('%A', local),
+                            time.strftime('%H:%M:%S', local))
+            self._second = second
+        return self._fields
+
+    def sleep_until_next_second(self, stop_event=None):
+        """
+        Sleep until the wall clock reaches the next whole second
+
+        Args:
+            stop_event (threading.Event): Optional event that ends the sleep early
+        """
+        delay = 1.0 - (time.time() % 1.0)
+        if stop_event is not None:
+            stop_event.wait(delay)
+        else:
+            time.sleep(delay)
+
+
+class ProcessMonitor:
+    """Incremental per-process CPU/memory scanner based on /proc/[pid]/stat"""
+
+    def __init__(self, scan_budget=32, min_interval=1.0, proc_path='/proc'):
+        """
+        Initialize process monitor
+
+        Args:
+            scan_budget (int): Maximum number of processes read per sample() call, well below the
+                               150~300 pids of a typical Pi so one sweep is spread over several calls
+            min_interval (float): Minimum seconds between two CPU readings of one process
+            proc_path (str): Mount point of the proc filesystem
+        """
+        self.scan_budget = max(1, scan_budget)
+        self.min_interval = min_interval
+        self.proc_path = proc_path
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self._pid_state = {}    # pid -> [name, cpu_ticks, sample_time, cpu_percent, rss_bytes, start_time]
+        self._pending = []      # pids still to be visited in the current sweep
+        self._seen = set()      # pids visited in the current sweep
+
+    def _start_sweep(self):
+        # Begin a new pass over /proc and forget processes that have exited
+        try:
+            pids = [int(d) for d in os.listdir(self.proc_path) if d.isdigit()]
+        except OSError:
+            pids = []
+        if self._seen:
+            for pid in list(self._pid_state):
+                if pid not in self._seen:
+                    del self._pid_state[pid]
+        self._seen = set()
+        self._pending = pids
+
+    def _read_process(self, pid, now):
+        # Read a single /proc/[pid]/stat line and update the per-pid state
+        stat = read_process_stat(pid, self.proc_path)
+        if stat is None:
+            self._pid_state.pop(pid, None)
+            return
+        rss_bytes = stat.rss_pages * self.page_size
+        state = self._pid_state.get(pid)
+        # A different start time means the pid was reused, the old name and tick baseline do not apply
+        if state is None or state[5] != stat.start_time:
+            self._pid_state[pid] = [stat.name, stat.cpu_ticks, now, 0.0, rss_bytes, stat.start_time]
+            return
+        state[4] = rss_bytes
+        elapsed = now - state[2]
+        # Too short an interval makes the clock tick granularity dominate the result
+        if elapsed >= self.min_interval:
+            state[3] = (stat.cpu_ticks - state[1]) / self.clock_ticks / elapsed * 100
+            state[1] = stat.cpu_ticks
+            state[2] = now
+
+    def sample(self):
+        """
+        Visit at most scan_budget processes, continuing the current sweep
+
+        Returns:
+            int: Number of processes read during this call
+        """
+        if not self._pending:
+            self._start_sweep()
+        now = time.monotonic()
+        count = 0
+        while self._pending and count < self.scan_budget:
+            pid = self._pending.pop()
+            self._seen.add(pid)
+            self._read_process(pid, now)
+            count += 1
+        return count
+
+    def get_top_cpu(self, count=5):
+        """
+        Get the processes with the highest CPU usage
+
+        Args:
+            count (int): Number of processes to return
+
+        Returns:
+            list: Tuples of (pid, name, cpu_percent, rss_mb), highest CPU first
+        """
+        top = heapq.nlargest(count, self._pid_state.items(), key=lambda item: item[1][3])
+        return [(pid, s[0], round(s[3], 1), round(s[4] / 1048576, 1)) for pid, s in top]
+
+    def get_top_memory(self, count=5):
+        """
+        Get the processes with the largest resident set size
+
+        Args:
+            count (int): Number of processes to return
+
+        Returns:
+            list: Tuples of (pid, name, cpu_percent, rss_mb), largest RSS first
+        """
+        top = heapq.nlargest(count, self._pid_state.items(), key=lambda item: item[1][4])
+        return [(pid, s[0], round(s[3], 1), round(s[4] / 1048576, 1)) for pid, s in top]
+
+
+class ThroughputMonitor(abc.ABC):
+    """Per-device rate tracker for pairs of cumulative byte counters read from /proc"""
+
+    def __init__(self, min_interval=1.0, smoothing=0.5):
+        """
+        Initialize throughput monitor
+
+        Args:
+            min_interval (float): Seconds during which the last computed rates are reused
+            smoothing (float): Weight of the newest sample in the moving average (0~1)
+        """
+        self.min_interval = min_interval
+        self.smoothing = min(1.0, max(0.0, smoothing))
+        self._last_counters = {}   # device -> (counter_a, counter_b)
+        self._last_time = None
+        self._rates = {}           # device -> [rate_a, rate_b] in bytes per second
+
+    @abc.abstractmethod
+    def read_counters(self):
+        """Return {device: (counter_a, counter_b)}, implemented by subclasses"""
+
+    def get_rates(self):
+        """
+        Get smoothed per-device rates, sampling /proc at most once per min_interval
+
+        Returns:
+            dict: {device: [rate_a, rate_b]} in bytes per second
+        """
+        now = time.monotonic()
+        if self._last_time is not None and now - self._last_time < self.min_interval:
+            return self._rates
+        try:
+            counters = self.read_counters()
+        except OSError:
+            return self._rates
+        if self._last_time is not None:
+            elapsed = now - self._last_time
+            rates = {}
+            for device, (a, b) in counters.items():
+                last = self._last_counters.get(device)
+                if last is None or a < last[0] or b < last[1]:
+                    # New device or counter reset, wait for the next sample
+                    continue
+                rate_a = (a - last[0]) / elapsed
+                rate_b = (b - last[1]) / elapsed
+                previous = self._rates.get(device)
+                if previous is not None:
+                    rate_a = previous[0] + self.smoothing * (rate_a - previous[0])
+                    rate_b = previous[1] + self.smoothing * (rate_b - previous[1])
+                rates[device] = [rate_a, rate_b]
+            self._rates = rates
+        self._last_counters = counters
+        self._last_time = now
+        return self._rates
+
+    def get_total_rate(self):
+        """
+        Get the rates summed over all devices
+
+        Returns:
+            list: [rate_a, rate_b] in bytes per second
+        """
+        rates = self.get_rates()
+        return [sum(r[0] for r in rates.values()), sum(r[1] for r in rates.values())]
+
+
+class DiskIOMonitor(ThroughputMonitor):
+    """Read/write throughput of whole block devices from /proc/diskstats"""
+
+    SECTOR_SIZE = 512
+    IGNORED_PREFIXES = ('loop', 'ram', 'zram')
+
+    def read_counters(self):
+        # Only whole disks appear in /sys/block, which avoids counting partitions twice; rescanned on
+        # every read so disks plugged in later are counted
+        try:
+            devices = {d for d in os.listdir('/sys/block') if not d.startswith(self.IGNORED_PREFIXES)}
+        except OSError:
+            devices = None
+        counters = {}
+        with open('/proc/diskstats', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 10:
+                    continue
+                name = fields[2]
+                if devices is not None:
+                    if name not in devices:
+                        continue
+                elif name.startswith(self.IGNORED_PREFIXES):
+                    continue
+                counters[name] = (int(fields[5]) * self.SECTOR_SIZE, int(fields[9]) * self.SECTOR_SIZE)
+        return counters
+
+
+class NetworkMonitor(ThroughputMonitor):
+    """Receive/transmit throughput of network interfaces from /proc/net/dev"""
+
+    IGNORED_INTERFACES = ('lo',)
+
+    def read_counters(self):
+        counters = {}
+        with open('/proc/net/dev', 'r') as f:
+            lines = f.readlines()[2:]   # Skip the two header lines
+        for line in lines:
+            name, _, data = line.partition(':')
+            name = name.strip()
+            if name in self.IGNORED_INTERFACES:
+                continue
+            fields = data.split()
+            if len(fields) < 9:
+                continue
+            counters[name] = (int(fields[0]), int(fields[8]))
+        return counters
+
 
 class SystemInformation:
 
     def __init__(self):
-        pass
+        self.clock = ClockProvider()
+        self.process_monitor = None  # Created on first use of get_raspberry_pi_top_processes
+        self.disk_io_monitor = None  # Created on first use of get_raspberry_pi_disk_io_rate
+        self.network_monitor = None  # Created on first use of get_raspberry_pi_network_rate
+        self._last_cpu_times = None   # (busy, total) jiffies from the previous snapshot
+        self._ip_address = None
+        self._ip_address_time = 0.0
+        self._mountpoints = None
+        self._mountpoints_time = 0.0
+        self._fan_pwm_path = None
 
     def get_raspberry_pi_ip_address(self):
         """Get the IP address of the Raspberry Pi"""
@@ -25,26 +346,33 @@ class SystemInformation:
             return "0.0.0.0"
 
     def get_raspberry_pi_date(self):
-        """Get the current date in YYYY-MM-DD format using native Python datetime"""
+        """Get the current date in YYYY-MM-DD format"""
         try:
-            return datetime.date.today().strftime('%Y-%m-%d')
+            return self.clock.get_fields()[0]
         except Exception:
             return "1990-1-1"
 
     def get_raspberry_pi_weekday(self):
-        """Get the current weekday name using native Python datetime"""
+        """Get the current weekday name"""
         try:
-            return datetime.date.today().strftime('%A')
+            return self.clock.get_fields()[1]
         except Exception:
             return "Error"
 
     def get_raspberry_pi_time(self):
-        """Get the current time in HH:MM:SS format using native Python datetime"""
+        """Get the current time in HH:MM:SS format"""
         try:
-            return datetime.datetime.now().strftime('%H:%M:%S')
+            return self.clock.get_fields()[2]
         except Exception:
             return '0:0:0'
 
+    def get_raspberry_pi_datetime(self):
+        """Get [date, weekday, time] taken from the same timestamp"""
+        try:
+            return list(self.clock.get_fields())
+        except Exception:
+            return ["1990-1-1", "Error", '0:0:0']
+
     def get_raspberry_pi_cpu_usage(self):
         """Get the CPU usage percentage"""
         try:
@@ -130,6 +458,175 @@ class SystemInformation:
         except Exception:
             return 0
 
+    def get_raspberry_pi_top_processes(self, count=3, sort_by='cpu'):
+        """Get the top processes by CPU ('cpu') or resident memory ('memory')"""
+        try:
+            if self.process_monitor is None:
+                self.process_monitor = ProcessMonitor()
+            self.process_monitor.sample()
+            if sort_by == 'memory':
+                return self.process_monitor.get_top_memory(count)
+            return self.process_monitor.get_top_cpu(count)
+        except Exception:
+            return []
+
+    def get_raspberry_pi_disk_io_rate(self):
+        """Get the disk [read, write] throughput in bytes per second"""
+        try:
+            if self.disk_io_monitor is None:
+                self.disk_io_monitor = DiskIOMonitor()
+            return self.disk_io_monitor.get_total_rate()
+        except Exception:
+            return [0, 0]
+
+    def get_raspberry_pi_network_rate(self):
+        """Get the network [receive, transmit] throughput in bytes per second"""
+        try:
+            if self.network_monitor is None:
+                self.network_monitor = NetworkMonitor()
+            return self.network_monitor.get_total_rate()
+        except Exception:
+            return [0, 0]
+
+    @staticmethod
+    def format_rate(bytes_per_second):
+        """Format a byte rate as a short human readable string"""
+        if math.isnan(bytes_per_second):
+            return "N/A"
+        if bytes_per_second < 1024:
+            return f"{bytes_per_second:.0f}B/s"
+        for unit in ('K/s', 'M/s'):
+            bytes_per_second /= 1024
+            if bytes_per_second < 1024:
+                return f"{bytes_per_second:.1f}{unit}"
+        return f"{bytes_per_second / 1024:.1f}G/s"
+
+    def _read_snapshot_cpu_usage(self):
+        # CPU usage since the previous snapshot from the aggregate line of /proc/stat
+        with open('/proc/stat', 'rb') as f:
+            fields = f.readline().split()[1:]
+        values = [int(v) for v in fields[:8]]
+        total = sum(values)
+        busy = total - values[3] - values[4]    # idle + iowait
+        last = self._last_cpu_times
+        self._last_cpu_times = (busy, total)
+        if last is None or total <= last[1]:
+            return NAN
+        return round((busy - last[0]) / (total - last[1]) * 100, 1)
+
+    def _read_snapshot_memory(self, record):
+        # Same meaning as psutil.virtual_memory(): percent from MemAvailable, used excludes buffers and cache
+        fields = {}
+        with open('/proc/meminfo', 'rb') as f:
+            for line in f:
+                name, value = line.split(b':', 1)
+                if name in MEMINFO_FIELDS:
+                    fields[name] = int(value.split()[0]) * 1024
+        total = fields.get(b'MemTotal')
+        available = fields.get(b'MemAvailable')
+        if not total or available is None:
+            return
+        free = fields.get(b'MemFree', 0)
+        used = total - free - fields.get(b'Buffers', 0) - fields.get(b'Cached', 0) - fields.get(b'SReclaimable', 0)
+        if used < 0:
+            used = total - free
+        record.memory_percent = round((total - available) / total * 100, 1)
+        record.memory_used_gb = round(used / (1024**3), 3)
+        record.memory_total_gb = round(total / (1024**3), 3)
+
+    def _read_snapshot_disk(self, record, now):
+        # The partition list rarely changes, refresh it once a minute and statvfs the cached mountpoints
+        if self._mountpoints is None or now - self._mountpoints_time > 60:
+            self._mountpoints = [p.mountpoint for p in psutil.disk_partitions()]
+            self._mountpoints_time = now
+        total_used = 0
+        total_size = 0
+        for mountpoint in self._mountpoints:
+            try:
+                st = os.statvfs(mountpoint)
+            except OSError:
+                continue
+            total_size += st.f_blocks * st.f_frsize
+            total_used += (st.f_blocks - st.f_bfree) * st.f_frsize
+        if total_size == 0:
+            return
+        record.disk_percent = round(total_used / total_size * 100, 2)
+        record.disk_used_gb = round(total_used / (1024**3), 3)
+        record.disk_total_gb = round(total_size / (1024**3), 3)
+
+    def _read_snapshot_fan_duty(self):
+        # Resolve the hwmon directory once and keep reading the same pwm1 file
+        if self._fan_pwm_path is None:
+            base_path = '/sys/devices/platform/cooling_fan/hwmon/'
+            hwmon_dirs = [d for d in os.listdir(base_path) if d.startswith('hwmon')]
+            if not hwmon_dirs:
+                return NAN
+            self._fan_pwm_path = os.path.join(base_path, hwmon_dirs[0], 'pwm1')
+        try:
+            with open(self._fan_pwm_path, 'rb') as f:
+                return max(0, min(255, int(f.read())))
+        except OSError:
+            self._fan_pwm_path = None
+            return NAN
+
+    def _sum_rates(self, monitor):
+        # Rates only exist from the second sample on, report NaN until then
+        rates = monitor.get_rates()
+        if not rates:
+            return NAN, NAN
+        return sum(r[0] for r in rates.values()), sum(r[1] for r in rates.values())
+
+    def snapshot(self, record=None, ip_refresh_interval=10.0):
+        """
+        Collect every system metric in one pass
+
+        Args:
+            record (SystemSnapshot): Existing record to overwrite, avoids allocating a new one per sample
+            ip_refresh_interval (float): Seconds the IP address lookup is reused
+
+        Returns:
+            SystemSnapshot: Filled record, metrics that could not be read are NaN
+        """
+        if record is None:
+            record = SystemSnapshot()
+        now = time.monotonic()
+        record.timestamp = now
+        record.date, record.weekday, record.time = self.clock.get_fields()
+        if self._ip_address is None or now - self._ip_address_time >= ip_refresh_interval:
+            self._ip_address = self.get_raspberry_pi_ip_address()
+            self._ip_address_time = now
+        record.ip_address = self._ip_address
+        try:
+            record.cpu_usage = self._read_snapshot_cpu_usage()
+        except (OSError, ValueError, IndexError):
+            record.cpu_usage = NAN
+        try:
+            with open('/sys/devices/virtual/thermal/thermal_zone0/temp', 'rb') as f:
+                record.cpu_temperature = int(f.read()) / 1000.0
+        except (OSError, ValueError):
+            record.cpu_temperature = NAN
+        try:
+            record.fan_duty = self._read_snapshot_fan_duty()
+        except (OSError, ValueError):
+            record.fan_duty = NAN
+        record.memory_percent = record.memory_used_gb = record.memory_total_gb = NAN
+        try:
+            self._read_snapshot_memory(record)
+        except (OSError, ValueError, IndexError):
+            pass
+        record.disk_percent = record.disk_used_gb = record.disk_total_gb = NAN
+        try:
+            self._read_snapshot_disk(record, now)
+        except Exception:
+            pass
+        if self.disk_io_monitor is None:
+            self.disk_io_monitor = DiskIOMonitor()
+        record.disk_read_rate, record.disk_write_rate = self._sum_rates(self.disk_io_monitor)
+        if self.network_monitor is None:
+            self.network_monitor = NetworkMonitor()
+        record.network_rx_rate, record.network_tx_rate = self._sum_rates(self.network_monitor)
+        return record
+
 
 if __name__ == "__main__":
     system_information = SystemInformation()
@@ -142,4 +639,8 @@ if __name__ == "__main__":
     print(system_information.get_raspberry_pi_disk_usage())
     print(system_information.get_raspberry_pi_fan_duty())
     print(system_information.get_raspberry_pi_cpu_temperature())
+    print(system_information.get_raspberry_pi_top_processes())
+    print(system_information.get_raspberry_pi_disk_io_rate())
+    print(system_information.get_raspberry_pi_network_rate())
+    print(system_information.snapshot())
     
\ No newline at end of file
@@ -0,0 +1,118 @@
+import time
+from collections import deque
+
+class TaskLog:
+    """
+    Bounded in-memory log of one task's output
+
+    Repeated identical lines are folded into the previous entry with a repeat count, and a token
+    bucket limits how many lines per second are kept; the rest are only counted, so a task printing
+    the same exception in a tight loop costs a counter increment per line instead of a journal entry.
+    """
+
+    def __init__(self, name, capacity=500, rate=10.0, burst=50, max_line=1024, echo=True):
+        """
+        Initialize the TaskLog
+
+        Args:
+            name (str): Task name, used as prefix when echoing
+            capacity (int): Entries kept in the ring buffer
+            rate (float): Lines per second accepted on average
+            burst (int): Lines accepted at once before rate limiting starts
+            max_line (int): Lines are truncated to this many characters
+            echo (bool): Print accepted lines to the manager's stdout (journald)
+        """
+        self.name = name
+        self.entries = deque(maxlen=capacity)   # [timestamp, text, repeat count]
+        self.rate = rate
+        self.burst = burst
+        self.max_line = max_line
+        self.echo = echo
+        self.tokens = float(burst)
+        self.token_time = time.monotonic()
+        self.partial = b''
+        self.suppressed = 0          # Lines dropped since the last accepted line
+        self.total_lines = 0
+        self.total_suppressed = 0
+        self.total_repeats = 0
+        self.ready_seen = False      # The task printed READY=1, reset by the manager per run
+
+    def feed(self, data):
+        """
+        Add raw output, complete lines are logged and an incomplete tail is kept for later
+
+        Args:
+            data (bytes): Bytes read from the task's output pipe
+        """
+        data = self.partial + data
+        lines = data.split(b'\n')
+        self.partial = lines.pop()
+        if len(self.partial) > self.max_line:
+            lines.append(self.partial)   # Never buffer more than one line's worth
+            self.partial = b''
+        for line in lines:
+            self.add_line(line.decode('utf-8', 'replace').rstrip('\r')[:self.max_line])
+
+    def flush(self):
+        # Log an incomplete last line, called when the pipe is closed
+        if self.partial:
+            self.add_line(self.partial.decode('utf-8', 'replace')[:self.max_line])
+            self.partial = b''
+
+    def add_line(self, text):
+        """
+        Log one line subject to deduplication and rate limiting
+
+        Args:
+            text (str): Line without the newline
+        """
+        self.total_lines += 1
+        if text == 'READY=1':
+            self.ready_seen = True
+        now = time.time()
+        if self.entries and self.entries[-1][1] == text and not self.suppressed:
+            self.entries[-1][2] += 1
+            self.total_repeats += 1
+            return
+        monotonic_now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (monotonic_now - self.token_time) * self.rate)
+        self.token_time = monotonic_now
+        if self.tokens < 1.0:
+            self.suppressed += 1
+            self.total_suppressed += 1
+            return
+        self.tokens -= 1.0
+        if self.suppressed:
+            self._append(now, f"... {self.suppressed} lines suppressed by rate limit")
+            self.suppressed = 0
+        self._append(now, text)
+
+    def _append(self, timestamp, text):
+        if self.entries and self.entries[-1][2] > 1 and self.echo:
+            print(f"[{self.name}] (previous line repeated {self.entries[-1][2] - 1} more times)")
+        self.entries.append([timestamp, text, 1])
+        if self.echo:
+            print(f"[{self.name}] {text}")
+
+    def get_lines(self, count=100):
+        """
+        Get the most recent log entries
+
+        Args:
+            count (int): Maximum number of entries
+
+        Returns:
+            list: Formatted lines "HH:MM:SS text", with "(xN)" for folded repeats
+        """
+        entries = list(self.entries)[-count:] if count else list(self.entries)
+        lines = []
+        for timestamp, text, repeat in entries:
+            stamp = time.strftime('%H:%M:%S', time.localtime(timestamp))
+            lines.append(f"{stamp} {text}" + (f" (x{repeat})" if repeat > 1 else ""))
+        if self.suppressed:
+            lines.append(f"... {self.suppressed} lines suppressed by rate limit")
+        return lines
+
+    def get_stats(self):
+        return {'lines': self.total_lines, 'kept': len(self.entries),
+                'suppressed': self.total_suppressed, 'repeats': self.total_repeats}
@@ -0,0 +1,196 @@
+import json
+import os
+import time
+from collections import deque
+from api_procfs import read_process_stat
+from api_runtime import write_file_atomic
+
+class TaskUsageSample:
+    """
+    Resource usage of one task over one sampling interval
+    """
+    __slots__ = ('timestamp', 'pid', 'cpu_percent', 'rss_mb', 'voluntary_switches_per_second',
+                 'involuntary_switches_per_second', 'i2c_per_second')
+
+    def __init__(self, timestamp, pid, cpu_percent, rss_mb, voluntary_switches_per_second,
+                 involuntary_switches_per_second, i2c_per_second):
+        self.timestamp = timestamp
+        self.pid = pid
+        self.cpu_percent = cpu_percent
+        self.rss_mb = rss_mb
+        self.voluntary_switches_per_second = voluntary_switches_per_second
+        self.involuntary_switches_per_second = involuntary_switches_per_second
+        self.i2c_per_second = i2c_per_second    # None when the task publishes no I2C counter
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class TaskUsageMonitor:
+    """
+    Sample CPU time, RSS, context switches and I2C transactions of the task processes
+
+    Counters are read from /proc/<pid>/stat and /proc/<pid>/status; rates are computed between
+    two consecutive samples of the same pid. I2C transactions are read from <i2c_stats_dir>/<pid>,
+    written by Expansion when EXPANSION_I2C_STATS_DIR is set in the task environment.
+    """
+
+    def __init__(self, history_length=60, i2c_stats_dir=None, proc_path='/proc'):
+        """
+        Initialize the TaskUsageMonitor
+
+        Args:
+            history_length (int): Samples kept per task
+            i2c_stats_dir (str): Directory with the per-pid I2C counters, None to skip I2C
+            proc_path (str): Mount point of procfs
+        """
+        self.history_length = history_length
+        self.i2c_stats_dir = i2c_stats_dir
+        self.proc_path = proc_path
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.history = {}        # task name -> deque of TaskUsageSample
+        self.counters = {}       # task name -> (pid, time, cpu ticks, voluntary, involuntary, i2c)
+
+    def read_counters(self, pid):
+        """
+        Read the cumulative counters of a process
+
+        Args:
+            pid (int): Process ID
+
+        Returns:
+            tuple: (cpu ticks, rss kB, voluntary switches, involuntary switches, i2c count or None),
+                   None if the process is gone
+        """
+        stat = read_process_stat(pid, self.proc_path)
+        if stat is None:
+            return None
+        try:
+            rss_kb = voluntary = involuntary = 0
+            with open(f'{self.proc_path}/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss_kb = int(line.split()[1])
+                    elif line.startswith('voluntary_ctxt_switches:'):
+                        voluntary = int(line.split()[1])
+                    elif line.startswith('nonvoluntary_ctxt_switches:'):
+                        involuntary = int(line.split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+        i2c_count = None
+        if self.i2c_stats_dir is not None:
+            try:
+                with open(os.path.join(self.i2c_stats_dir, str(pid)), 'r') as f:
+                    i2c_count = int(f.read())
+            except (OSError, ValueError):
+                pass
+        return stat.cpu_ticks, rss_kb, voluntary, involuntary, i2c_count
+
+    def sample(self, processes):
+        """
+        Take one sample of every running task
+
+        Args:
+            processes (dict): Task name -> process object with a pid attribute
+
+        Returns:
+            dict: Task name -> TaskUsageSample, for tasks with a previous sample of the same pid
+        """
+        now = time.monotonic()
+        samples = {}
+        for name, proc in processes.items():
+            counters = self.read_counters(proc.pid)
+            if counters is None:
+                continue
+            ticks, rss_kb, voluntary, involuntary, i2c_count = counters
+            previous = self.counters.get(name)
+            self.counters[name] = (proc.pid, now, ticks, voluntary, involuntary, i2c_count)
+            if previous is None or previous[0] != proc.pid or now <= previous[1]:
+                continue
+            elapsed = now - previous[1]
+            i2c_rate = None
+            if i2c_count is not None and previous[5] is not None:
+                # Without a previous count the total so far would show up as one burst
+                i2c_rate = (i2c_count - previous[5]) / elapsed
+            sample = TaskUsageSample(time.time(), proc.pid,
+                                     100.0 * (ticks - previous[2]) / self.clock_ticks / elapsed,
+                                     rss_kb / 1024.0,
+                                     (voluntary - previous[3]) / elapsed,
+                                     (involuntary - previous[4]) / elapsed,
+                                     i2c_rate)
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=self.history_length)
+            history.append(sample)
+            samples[name] = sample
+        return samples
+
+    def forget(self, name, pid=None):
+        """
+        Drop the rate baseline of a task whose process ended, keeping its history
+
+        Args:
+            name (str): Task name
+            pid (int): Process ID whose I2C counter file is removed
+        """
+        self.counters.pop(name, None)
+        if pid is not None and self.i2c_stats_dir is not None:
+            try:
+                os.unlink(os.path.join(self.i2c_stats_dir, str(pid)))
+            except OSError:
+                pass
+
+    def report(self):
+        """
+        Summarize the history of every task
+
+        Returns:
+            dict: Task name -> {"latest", "avg_cpu_percent", "peak_rss_mb", "history"}
+        """
+        report = {}
+        for name, history in self.history.items():
+            if not history:
+                continue
+            i2c_rates = [sample.i2c_per_second for sample in history if sample.i2c_per_second is not None]
+            report[name] = {
+                'latest': history[-1].to_dict(),
+                'avg_cpu_percent': sum(sample.cpu_percent for sample in history) / len(history),
+                'peak_rss_mb': max(sample.rss_mb for sample in history),
+                'avg_i2c_per_second': sum(i2c_rates) / len(i2c_rates) if i2c_rates else None,
+                'history': [sample.to_dict() for sample in history],
+            }
+        return report
+
+    def dump_json(self, path=None):
+        """
+        Serialize the report as JSON
+
+        Args:
+            path (str): File to write atomically, None to only return the text
+
+        Returns:
+            str: JSON text
+        """
+        text = json.dumps({'generated': time.time(), 'tasks': self.report()}, indent=1)
+        if path is not None:
+            write_file_atomic(path, text)
+        return text
+
+def format_usage_table(report):
+    """
+    Format a usage report as a table
+
+    Args:
+        report (dict): Output of TaskUsageMonitor.report or the "tasks" of its JSON dump
+
+    Returns:
+        str: Table text
+    """
+    lines = [f"{'Task':<12}{'PID':>8}{'CPU%':>7}{'avg%':>7}{'RSS MB':>8}{'peak':>7}{'vcs/s':>8}{'ivcs/s':>8}{'I2C/s':>8}"]
+    for name, entry in report.items():
+        latest = entry['latest']
+        i2c = latest['i2c_per_second']
+        lines.append(f"{name:<12}{latest['pid']:>8}{latest['cpu_percent']:>7.1f}{entry['avg_cpu_percent']:>7.1f}"
+                     f"{latest['rss_mb']:>8.1f}{entry['peak_rss_mb']:>7.1f}"
+                     f"{latest['voluntary_switches_per_second']:>8.1f}{latest['involuntary_switches_per_second']:>8.1f}"
+                     f"{'-' if i2c is None else format(i2c, '.1f'):>8}")
+    return "\n".join(lines)
@@ -0,0 +1,320 @@
+import threading
+from api_config_schema import parse_bool
+
+class TaskDefinition:
+    """
+    One task the TaskManager can run: a script or a module entry point with its arguments
+    """
+    __slots__ = ('name', 'script', 'module', 'args', 'priority', 'limits', 'enabled', 'section',
+                 'depends_on', 'ready', 'ready_timeout', 'oneshot')
+
+    def __init__(self, name, script=None, module=None, args=None, priority=0, limits=None,
+                 enabled=True, section='Tasks', depends_on=None, ready='started', ready_timeout=10.0,
+                 oneshot=False):
+        """
+        Args:
+            name (str): Unique task name
+            script (str): Python file relative to the Code directory, or None when module is set
+            module (str): Module run with python -m, or None when script is set
+            args (list): Extra command line arguments
+            priority (int): Higher priority tasks are started first and stopped last
+            limits (dict): Resource limits applied to the task process
+            enabled (bool): Whether the task runs
+            section (str): Configuration section holding the enabled flag
+            depends_on (list): Names of tasks that must be ready before this one starts
+            ready (str): 'started' when the task is ready once spawned, 'notify' when it prints READY=1
+            ready_timeout (float): Seconds after which a 'notify' task counts as ready anyway
+            oneshot (bool): The task is expected to finish, exit code 0 is not restarted
+        """
+        self.name = name
+        self.script = script
+        self.module = module
+        self.args = list(args or [])
+        self.priority = priority
+        self.limits = dict(limits or {})
+        self.enabled = enabled
+        self.section = section
+        self.depends_on = list(depends_on or [])
+        self.ready = ready
+        self.ready_timeout = ready_timeout
+        self.oneshot = oneshot
+
+    @property
+    def path(self):
+        # Display name of the entry point
+        return self.script if self.script is not None else f"-m {self.module}"
+
+    def command(self, python):
+        """
+        Build the command line of the task
+
+        Args:
+            python (str): Interpreter path
+
+        Returns:
+            list: Command line
+        """
+        if self.script is not None:
+            return [python, self.script] + self.args
+        return [python, '-m', self.module] + self.args
+
+    def _key(self):
+        return (self.name, self.script, self.module, tuple(self.args), self.priority,
+                sorted(self.limits.items()), self.enabled, self.section, tuple(self.depends_on),
+                self.ready, self.ready_timeout, self.oneshot)
+
+    def __eq__(self, other):
+        return isinstance(other, TaskDefinition) and self._key() == other._key()
+
+    def __repr__(self):
+        return f"TaskDefinition({self.name!r}, {self.path!r}, enabled={self.enabled}, priority={self.priority})"
+
+class TaskRegistry:
+    """
+    Index of all task definitions, rebuilt only when the configuration changes
+
+    Tasks come from the "Tasks" section, a mapping of name to definition:
+
+        "Tasks": {
+            "exporter": {"script": "my_exporter.py", "args": ["--port", "9100"], "priority": 5,
+                         "limits": {"nice": 10, "cpu_affinity": [3], "rss_limit_mb": 80},
+                         "enabled": true},
+            "controller": {"module": "mypkg.controller", "enabled": false}
+        }
+
+    The LED, Fan and OLED sections keep working as built-in tasks named after their section;
+    a "Tasks" entry with the same name overrides the built-in definition.
+
+    depends_on lists tasks that must be ready first. A task is ready once started, or with
+    "ready": "notify" once it prints a READY=1 line (or after ready_timeout seconds).
+    Any exit the manager did not ask for is restarted, except exit code 0 of a "oneshot" task.
+
+    Limits: nice, cpu_affinity (CPU list), sched_policy (other, batch, idle, fifo, rr) with
+    sched_priority (1-99, default 1 for fifo and rr), memory_limit_mb (address space ceiling)
+    and rss_limit_mb (watchdog budget).
+    """
+
+    # section -> default priority of the built-in task, the fan controller outranks the others
+    LEGACY_SECTIONS = {'Fan': 20, 'LED': 10, 'OLED': 0}
+    # Cosmetic built-in tasks yield the CPU to real workloads
+    LEGACY_LIMITS = {'LED': {'nice': 10}, 'OLED': {'nice': 10}}
+    # The fan task prints READY=1 once the board is configured
+    LEGACY_READY = {'Fan': 'notify'}
+    DEFINITION_KEYS = {'script', 'module', 'args', 'priority', 'limits', 'enabled',
+                       'depends_on', 'ready', 'ready_timeout', 'oneshot'}
+    READY_MODES = ('started', 'notify')
+    # limits key -> accepted type, see api_limits.apply_limits
+    LIMIT_KEYS = {'nice': int, 'cpu_affinity': list, 'sched_policy': str, 'sched_priority': int,
+                  'memory_limit_mb': int, 'rss_limit_mb': int}
+    SCHED_POLICIES = ('other', 'batch', 'idle', 'fifo', 'rr')
+
+    def __init__(self, config_manager):
+        """
+        Initialize the TaskRegistry
+
+        Args:
+            config_manager (ConfigManager): Source of the configuration
+        """
+        self.config_manager = config_manager
+        self.tasks = {}          # name -> TaskDefinition, ordered by priority
+        self.by_script = {}      # script or module -> name, for lookups by file
+        self.generation = None   # ConfigManager.generation the index was built from
+        self.build_count = 0
+        self.lock = threading.RLock()   # The monitor thread and API callers refresh concurrently
+
+    def _parse_definition(self, name, data):
+        if not isinstance(data, dict):
+            print(f"Task {name}: definition must be an object, ignored")
+            return None
+        unknown = set(data) - self.DEFINITION_KEYS
+        if unknown:
+            print(f"Task {name}: unknown keys {sorted(unknown)} ignored")
+        script = data.get('script')
+        module = data.get('module')
+        if (script is None) == (module is None):
+            print(f"Task {name}: exactly one of 'script' or 'module' is required, ignored")
+            return None
+        args = data.get('args', [])
+        if not isinstance(args, list):
+            print(f"Task {name}: 'args' must be a list, ignored")
+            return None
+        limits = self._parse_limits(name, data.get('limits', {}))
+        try:
+            priority = int(data.get('priority', 0))
+        except (TypeError, ValueError):
+            print(f"Task {name}: 'priority' must be an integer, using 0")
+            priority = 0
+        depends_on = data.get('depends_on', [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        if not isinstance(depends_on, list) or not all(isinstance(dep, str) for dep in depends_on):
+            print(f"Task {name}: 'depends_on' must list task names, using none")
+            depends_on = []
+        ready = data.get('ready', 'started')
+        if ready not in self.READY_MODES:
+            print(f"Task {name}: 'ready' must be one of {', '.join(self.READY_MODES)}, using started")
+            ready = 'started'
+        try:
+            ready_timeout = float(data.get('ready_timeout', 10.0))
+        except (TypeError, ValueError):
+            print(f"Task {name}: 'ready_timeout' must be a number, using 10")
+            ready_timeout = 10.0
+        return TaskDefinition(name, script, module, [str(arg) for arg in args], priority, limits,
+                              self._parse_flag(name, data, 'enabled', True), depends_on=depends_on, ready=ready,
+                              ready_timeout=ready_timeout, oneshot=self._parse_flag(name, data, 'oneshot', False))
+
+    def _parse_flag(self, name, data, key, default):
+        try:
+            return parse_bool(data.get(key, default))
+        except ValueError:
+            print(f"Task {name}: {key!r} must be true or false, using {str(default).lower()}")
+            return default
+
+    def _parse_limits(self, name, limits):
+        if not isinstance(limits, dict):
+            print(f"Task {name}: 'limits' must be an object, using none")
+            return {}
+        valid = {}
+        for key, value in limits.items():
+            expected = self.LIMIT_KEYS.get(key)
+            if expected is None:
+                print(f"Task {name}: unknown limit {key!r} ignored")
+            elif not isinstance(value, expected) or isinstance(value, bool):
+                print(f"Task {name}: limit {key!r} must be {expected.__name__}, ignored")
+            elif key == 'sched_policy' and value not in self.SCHED_POLICIES:
+                print(f"Task {name}: sched_policy must be one of {', '.join(self.SCHED_POLICIES)}, ignored")
+            elif key == 'cpu_affinity' and not all(isinstance(cpu, int) and cpu >= 0 for cpu in value):
+                print(f"Task {name}: cpu_affinity must list CPU numbers, ignored")
+            else:
+                valid[key] = value
+        return valid
+
+    def build(self):
+        """
+        Build the index from the configuration
+
+        Returns:
+            dict: Task name -> TaskDefinition
+        """
+        tasks = {}
+        for section, priority in self.LEGACY_SECTIONS.items():
+            config = self.config_manager.get_section(section)
+            if config and 'task_name' in config:
+                tasks[section] = TaskDefinition(section, script=config['task_name'], priority=priority,
+                                                limits=self.LEGACY_LIMITS.get(section),
+                                                enabled=self._parse_flag(section, config, 'is_run_on_startup', True),
+                                                section=section, ready=self.LEGACY_READY.get(section, 'started'))
+        custom = self.config_manager.get_section('Tasks')
+        if isinstance(custom, dict):
+            for name, data in custom.items():
+                definition = self._parse_definition(name, data)
+                if definition is not None:
+                    tasks[name] = definition
+        elif custom:
+            print("'Tasks' section must be an object, ignored")
+        self._break_cycles(tasks)
+        ordered = sorted(tasks.values(), key=lambda task: (-task.priority, task.name))
+        return {task.name: task for task in ordered}
+
+    def _break_cycles(self, tasks):
+        # A dependency cycle would keep its tasks waiting forever; report it and drop its edges
+        state = {}   # name -> 1 while on the DFS stack, 2 when done
+
+        def visit(name, stack):
+            state[name] = 1
+            stack.append(name)
+            for dep in tasks[name].depends_on:
+                if dep not in tasks:
+                    continue
+                if state.get(dep) == 1:
+                    cycle = stack[stack.index(dep):]
+                    print(f"Dependency cycle {' -> '.join(cycle + [dep])} ignored")
+                    for member in cycle:
+                        tasks[member].depends_on = [d for d in tasks[member].depends_on if d not in cycle]
+                elif dep not in state:
+                    visit(dep, stack)
+            stack.pop()
+            state[name] = 2
+
+        for name in list(tasks):
+            if name not in state:
+                visit(name, [])
+
+    def refresh(self):
+        """
+        Rebuild the index if the configuration changed since the last build
+
+        Returns:
+            bool: True if any task definition changed
+        """
+        with self.lock:
+            self.config_manager.reload_if_changed()
+            if self.generation == self.config_manager.generation:
+                return False
+            self.generation = self.config_manager.generation
+            if self.config_manager.load_error is not None and self.tasks:
+                # An unreadable file must not look like a configuration without tasks
+                print(f"Keeping the previous task definitions: {self.config_manager.load_error}")
+                return False
+            tasks = self.build()
+            self.build_count += 1
+            if tasks == self.tasks:
+                return False
+            by_script = {}
+            for task in tasks.values():
+                by_script.setdefault(task.script or task.module, task.name)
+            self.tasks = tasks
+            self.by_script = by_script
+            return True
+
+    def get(self, name):
+        """
+        Find a task by name, or by script/module for compatibility with path based callers
+
+        Args:
+            name (str): Task name, script file or module name
+
+        Returns:
+            TaskDefinition or None
+        """
+        self.refresh()
+        task = self.tasks.get(name)
+        if task is None and name in self.by_script:
+            task = self.tasks.get(self.by_script[name])
+        return task
+
+    def all(self):
+        """
+        Returns:
+            list: All task definitions, highest priority first
+        """
+        self.refresh()
+        return list(self.tasks.values())
+
+    def enabled(self):
+        return [task for task in self.all() if task.enabled]
+
+    def disabled(self):
+        return [task for task in self.all() if not task.enabled]
+
+    def set_enabled(self, name, enabled):
+        """
+        Enable or disable a task in the configuration, without saving
+
+        Args:
+            name (str): Task name, script file or module name
+            enabled (bool): New state
+
+        Returns:
+            TaskDefinition or None: The updated task, None if it does not exist
+        """
+        task = self.get(name)
+        if task is None:
+            return None
+        if task.section == 'Tasks':
+            self.config_manager.set_value('Tasks', task.name, dict(self.config_manager.get_section('Tasks')[task.name],
+                                                                   enabled=bool(enabled)))
+        else:
+            self.config_manager.set_value(task.section, 'is_run_on_startup', bool(enabled))
+        self.refresh()
+        return self.tasks.get(task.name)
@@ -1,6 +1,7 @@
 # app_ui.py
 import os
 import sys
+import math
 import time
 import subprocess
 
@@ -14,8 +15,10 @@ from app_ui_fan import FanTab                        # Import fan control interf
 from app_ui_setting import SettingTab                # Import settings interface
 
 from api_json import ConfigManager                   # Import configuration management module
+from api_config_schema import get_range              # Import configuration schema ranges
 from api_expansion import Expansion                  # Import expansion module
-from api_systemInfo import SystemInformation         # Import system information module
+from api_reconcile import BoardReconciler            # Import board reconciliation module
+from api_systemInfo import SystemInformation, SystemSnapshot  # Import system information module
 from api_service import ServiceGenerator             # Import background task generator module
 
 class MainWindow(QMainWindow):
@@ -24,14 +27,18 @@ class MainWindow(QMainWindow):
         self.ui_factor = 1.0
         self.ui_main_width = width
         self.ui_main_height = height
-        self.ui_fan_temp_mode_threshold_range = [[10, 40], [50, 80], [1, 5]]     # Fan temperature mode threshold range
+        self.ui_fan_temp_mode_threshold_range = [get_range('Fan', 'mode2_low_temp_threshold'),      # Fan temperature mode threshold range
+                                                 get_range('Fan', 'mode2_high_temp_threshold'),
+                                                 get_range('Fan', 'mode2_temp_schmitt')]
         self.setWindowTitle("Freenove_Computer_Case_Kit_Pro_for_Raspberry_Pi")   # Set window title
         self.setGeometry(0, 0, self.ui_main_width, self.ui_main_height)          # Set window size
         self.setMinimumSize(round(self.ui_main_width*self.ui_factor), round(self.ui_main_height*self.ui_factor))  # Set minimum size
 
-        self.config_manager = ConfigManager()                        # Create configuration management object
         self.expansion = Expansion()                                 # Create expansion module object
+        self.config_manager = ConfigManager(expansion=self.expansion) # Create configuration management object, sharing the bus handle
+        self.board_reconciler = BoardReconciler(self.expansion, self.config_manager)  # Minimal-diff board writes
         self.system_info = SystemInformation()                       # Create system information object
+        self.system_snapshot = SystemSnapshot()                      # Reused record for monitor samples
         self.service_generator = ServiceGenerator()                  # Create background task generator object
 
         self.screen_direction = 0                                    # Screen orientation
@@ -138,29 +145,21 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.tab_widget)
     def load_ui_config(self):
         """Load configuration"""
-        self.ui_follow_led_color = self.config_manager.get_value('Monitor', 'follow_led_color') or 0
+        config = self.config_manager.get_typed_config()             # Validated and range-checked once at load
+        self.ui_follow_led_color = config.monitor.follow_led_color
     
-        self.led_mode = self.config_manager.get_value('LED', 'mode') or 0
-        self.led_slider_color[0] = self.config_manager.get_value('LED', 'red_value') or 0
-        self.led_slider_color[1] = self.config_manager.get_value('LED', 'green_value') or 0
-        self.led_slider_color[2] = self.config_manager.get_value('LED', 'blue_value') or 255
-
-        self.fan_mode = self.config_manager.get_value('Fan', 'mode') or 0
-        self.fan_manual_mode_duty[0] = self.config_manager.get_value('Fan', 'mode1_fan_group1') or 75
-        self.fan_manual_mode_duty[1] = self.config_manager.get_value('Fan', 'mode1_fan_group2') or 75
-        self.fan_manual_mode_duty[2] = self.config_manager.get_value('Fan', 'mode1_fan_group3') or 75
-        self.fan_temp_mode_threshold[0] = self.config_manager.get_value('Fan', 'mode2_low_temp_threshold') or 30
-        self.fan_temp_mode_threshold[1] = self.config_manager.get_value('Fan', 'mode2_high_temp_threshold') or 50
-        self.fan_temp_mode_threshold[2] = self.config_manager.get_value('Fan', 'mode2_temp_schmitt') or 3
-        self.fan_temp_mode_duty[0] = self.config_manager.get_value('Fan', 'mode2_low_speed') or 75
-        self.fan_temp_mode_duty[1] = self.config_manager.get_value('Fan', 'mode2_middle_speed') or 125
-        self.fan_temp_mode_duty[2] = self.config_manager.get_value('Fan', 'mode2_high_speed') or 175
-        self.fan_pi_follows_duty_map[0] = self.config_manager.get_value('Fan', 'mode3_min_speed_mapping') or 0
-        self.fan_pi_follows_duty_map[1] = self.config_manager.get_value('Fan', 'mode3_max_speed_mapping') or 255
-
-        self.setting_led_task_is_running = self.config_manager.get_value('LED', 'is_run_on_startup') or False
-        self.setting_fan_task_is_running = self.config_manager.get_value('Fan', 'is_run_on_startup') or False
-        self.setting_oled_task_is_running = self.config_manager.get_value('OLED', 'is_run_on_startup') or False
+        self.led_mode = config.led.mode
+        self.led_slider_color = [config.led.red_value, config.led.green_value, config.led.blue_value]
+
+        self.fan_mode = config.fan.mode
+        self.fan_manual_mode_duty = [config.fan.mode1_fan_group1, config.fan.mode1_fan_group2, config.fan.mode1_fan_group3]
+        self.fan_temp_mode_threshold = [config.fan.mode2_low_temp_threshold, config.fan.mode2_high_temp_threshold, config.fan.mode2_temp_schmitt]
+        self.fan_temp_mode_duty = [config.fan.mode2_low_speed, config.fan.mode2_middle_speed, config.fan.mode2_high_speed]
+        self.fan_pi_follows_duty_map = [config.fan.mode3_min_speed_mapping, config.fan.mode3_max_speed_mapping]
+
+        self.setting_led_task_is_running = config.led.is_run_on_startup
+        self.setting_fan_task_is_running = config.fan.is_run_on_startup
+        self.setting_oled_task_is_running = config.oled.is_run_on_startup
 
         if self.service_generator.check_service_is_exist():
             self.setting_service_is_exist = True
@@ -326,38 +325,36 @@ class MainWindow(QMainWindow):
     def update_monitor_data_event(self):
         """Periodically update monitor interface display data"""
         try:
-            # Get system information
-            rpi_temp = self.system_info.get_raspberry_pi_cpu_temperature()  # Raspberry Pi CPU temperature
+            # Get system information in one pass
+            snapshot = self.system_info.snapshot(self.system_snapshot)
             case_temp = self.expansion.get_temp()                           # Case temperature
-            cpu_usage = self.system_info.get_raspberry_pi_cpu_usage()       # CPU usage
-            memory_info = self.system_info.get_raspberry_pi_memory_usage()  # Memory usage information
-            ram_usage = memory_info[0] if isinstance(memory_info, list) else memory_info
-            disk_info = self.system_info.get_raspberry_pi_disk_usage()      # Disk usage information
-            disk_usage = disk_info[0] if isinstance(disk_info, list) else disk_info
             
             # Get expansion board information
-            rpi_fan_pwm = self.system_info.get_raspberry_pi_fan_duty()      # Raspberry Pi fan PWM
             case_fan_pwm = self.expansion.get_fan_duty()[:2]                # Case fan PWM values
             
             # Update progress controls
             # CPU usage
-            self.monitoring_tab.setCircleProgressValue(0, cpu_usage, self.metric_labels[0], f"{cpu_usage:.1f}%")
+            self.set_monitor_value(0, snapshot.cpu_usage, f"{snapshot.cpu_usage:.1f}%")
             
             # Memory usage
-            self.monitoring_tab.setCircleProgressValue(1, ram_usage, self.metric_labels[1], f"{ram_usage:.1f}%")
+            self.set_monitor_value(1, snapshot.memory_percent, f"{snapshot.memory_percent:.1f}%")
 
             # Raspberry Pi temperature 
-            self.monitoring_tab.setCircleProgressValue(2, min(100, rpi_temp/80*100), self.metric_labels[2], f"{rpi_temp:.1f}°C")
+            cpu_temperature = snapshot.cpu_temperature
+            if math.isnan(cpu_temperature):
+                self.set_monitor_value(2, cpu_temperature, "N/A")
+            else:
+                self.set_monitor_value(2, min(100, cpu_temperature/80*100), f"{cpu_temperature:.1f}°C")
             
             # Case temperature (using Raspberry Pi temperature as placeholder, can be replaced with actual sensor data)
             self.monitoring_tab.setCircleProgressValue(3, min(100, case_temp/80*100), self.metric_labels[3], f"{case_temp:.1f}°C")
             
             # Storage usage
-            self.monitoring_tab.setCircleProgressValue(4, disk_usage, self.metric_labels[4], f"{disk_usage:.1f}%")
+            self.set_monitor_value(4, snapshot.disk_percent, f"{snapshot.disk_percent:.1f}%")
             
             # Raspberry Pi fan PWM (0-255 range)
-            rpi_fan_percent = (rpi_fan_pwm / 255) * 100 if rpi_fan_pwm >= 0 else 0
-            self.monitoring_tab.setCircleProgressValue(5, rpi_fan_percent, self.metric_labels[5], f"{rpi_fan_percent:.1f}%")
+            rpi_fan_percent = (snapshot.fan_duty / 255) * 100
+            self.set_monitor_value(5, rpi_fan_percent, f"{rpi_fan_percent:.1f}%")
             
             # Case fan PWM values
             if case_fan_pwm and len(case_fan_pwm) >= 2:
@@ -372,9 +369,27 @@ class MainWindow(QMainWindow):
                 # If unable to get fan data, display default values
                 self.monitoring_tab.setCircleProgressValue(6, 0, self.metric_labels[6], "N/A")
                 self.monitoring_tab.setCircleProgressValue(7, 0, self.metric_labels[7], "N/A")
+
+            # Top CPU consumers
+            top_processes = self.system_info.get_raspberry_pi_top_processes(3)
+            top_text = "  ".join(f"{p[1]} {p[2]:.0f}%" for p in top_processes)
+
+            # Disk and network throughput
+            format_rate = self.system_info.format_rate
+            io_text = (f"Disk R {format_rate(snapshot.disk_read_rate)} W {format_rate(snapshot.disk_write_rate)}   "
+                       f"Net Rx {format_rate(snapshot.network_rx_rate)} Tx {format_rate(snapshot.network_tx_rate)}")
+            self.monitoring_tab.setInfoText(f"Top: {top_text}\n{io_text}" if top_text else io_text)
                 
         except Exception as e:
             print(f"Error updating data: {e}")
+
+    def set_monitor_value(self, index, percentage, display_text):
+        """Update one monitor dial, unavailable (NaN) metrics are shown as N/A"""
+        if math.isnan(percentage):
+            self.monitoring_tab.setCircleProgressValue(index, 0, self.metric_labels[index], "N/A")
+        else:
+            self.monitoring_tab.setCircleProgressValue(index, percentage, self.metric_labels[index], display_text)
+
     def update_monitor_colors_event(self):
         """Periodically update LED colors to circular progress bars"""
         try:
@@ -415,20 +430,13 @@ class MainWindow(QMainWindow):
             elif self.led_process is not None and self.led_process.poll() is not None:
                 self.led_process = None
     def send_led_mode_to_expansion(self, led_mode):
-        """Send LED mode to expansion board"""
-        if led_mode == 0:
-            self.expansion.set_led_mode(4)                 
-        elif led_mode == 1:
-            self.expansion.set_led_mode(3)
-            self.expansion.set_all_led_color(self.led_slider_color[0],self.led_slider_color[1],self.led_slider_color[2])  
-        elif led_mode == 2:
-            self.expansion.set_led_mode(2)
-            self.expansion.set_all_led_color(self.led_slider_color[0],self.led_slider_color[1],self.led_slider_color[2])    
-        elif led_mode == 3:
-            self.expansion.set_led_mode(1)
-            self.expansion.set_all_led_color(self.led_slider_color[0],self.led_slider_color[1],self.led_slider_color[2])  
-        elif led_mode == 5:
-            self.expansion.set_led_mode(0)
+        """Send LED mode to expansion board, writing only registers that differ"""
+        self.board_reconciler.reconcile_section('LED', {
+            'mode': led_mode,
+            'red_value': self.led_slider_color[0],
+            'green_value': self.led_slider_color[1],
+            'blue_value': self.led_slider_color[2]
+        })
     def led_radio_clicked_event(self):
         """Handle LED radio button click event"""
         sender_button = self.sender()
@@ -472,7 +480,8 @@ class MainWindow(QMainWindow):
         self.led_save_config_event()
     def led_save_config_event(self):
         """Handle LED save configuration button click event"""
-        self.config_manager.set_value('LED', 'mode', self.led_mode)
+        if self.led_mode != 4:                                       # Custom code runs from the UI only, keep the saved board mode
+            self.config_manager.set_value('LED', 'mode', self.led_mode)
         self.config_manager.set_value('LED', 'red_value', self.led_slider_color[0])
         self.config_manager.set_value('LED', 'green_value', self.led_slider_color[1])
         self.config_manager.set_value('LED', 'blue_value', self.led_slider_color[2])
@@ -541,35 +550,21 @@ class MainWindow(QMainWindow):
             elif self.fan_process is not None and self.fan_process.poll() is not None:
                 self.fan_process = None
     def send_fan_mode_to_expansion(self, mode):
-        """Send fan mode to expansion board"""
-        if mode == 0:
-            self.expansion.set_fan_mode(2)  
-            self.expansion.set_fan_threshold(
-                self.fan_temp_mode_threshold[0],
-                self.fan_temp_mode_threshold[1],
-                self.fan_temp_mode_threshold[2]
-            )
-            self.expansion.set_fan_temp_mode_speed(
-                self.fan_temp_mode_duty[0],
-                self.fan_temp_mode_duty[1],
-                self.fan_temp_mode_duty[2]
-            )
-        elif mode == 1:
-            self.expansion.set_fan_mode(3)
-            self.expansion.set_fan_pi_following(
-                self.fan_pi_follows_duty_map[0],
-                self.fan_pi_follows_duty_map[1]
-            )
-        elif mode == 2:
-            self.expansion.set_fan_mode(1)
-            self.expansion.set_fan_duty(
-                self.fan_manual_mode_duty[0],
-                self.fan_manual_mode_duty[1],
-                self.fan_manual_mode_duty[2]
-            )
-        elif mode == 4:
-            self.expansion.set_fan_mode(0)
-            self.expansion.set_fan_duty(0,0,0)
+        """Send fan mode to expansion board, writing only registers that differ"""
+        self.board_reconciler.reconcile_section('Fan', {
+            'mode': mode,
+            'mode1_fan_group1': self.fan_manual_mode_duty[0],
+            'mode1_fan_group2': self.fan_manual_mode_duty[1],
+            'mode1_fan_group3': self.fan_manual_mode_duty[2],
+            'mode2_low_temp_threshold': self.fan_temp_mode_threshold[0],
+            'mode2_high_temp_threshold': self.fan_temp_mode_threshold[1],
+            'mode2_temp_schmitt': self.fan_temp_mode_threshold[2],
+            'mode2_low_speed': self.fan_temp_mode_duty[0],
+            'mode2_middle_speed': self.fan_temp_mode_duty[1],
+            'mode2_high_speed': self.fan_temp_mode_duty[2],
+            'mode3_min_speed_mapping': self.fan_pi_follows_duty_map[0],
+            'mode3_max_speed_mapping': self.fan_pi_follows_duty_map[1]
+        })
     def fan_radio_clicked_event(self):
         """Handle FAN mode switch event"""
         sender_button = self.sender()
@@ -907,7 +902,7 @@ class MainWindow(QMainWindow):
             if self.setting_service_is_exist and self.setting_led_task_is_running: 
                 self.setting_led_task_is_running = False 
                 self.config_manager.set_value('LED', 'is_run_on_startup', self.setting_led_task_is_running)           
-                self.config_manager.save_config()
+                self.config_manager.save_config(immediate=True)        # Task manager must see this before we take over the board
                 self.setting_tab.btn_led_switch.setChecked(self.setting_led_task_is_running)                           
                 self.setting_tab.set_custom_task_led_button_state(self.setting_service_is_exist, self.setting_led_task_is_running)
                 self.led_tab.set_led_mode(self.led_mode)
@@ -934,7 +929,7 @@ class MainWindow(QMainWindow):
             if self.setting_service_is_exist and self.setting_fan_task_is_running: # If background service is running fan task
                 self.setting_fan_task_is_running = False 
                 self.config_manager.set_value('Fan', 'is_run_on_startup', self.setting_fan_task_is_running)            # Stop fan task by modifying config file
-                self.config_manager.save_config()
+                self.config_manager.save_config(immediate=True)
                 self.setting_tab.btn_fan_switch.setChecked(self.setting_fan_task_is_running)
                 self.setting_tab.set_custom_task_fan_button_state(self.setting_service_is_exist, self.setting_fan_task_is_running)
                 self.fan_tab.set_fan_mode(self.fan_mode)
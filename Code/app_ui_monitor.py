@@ -181,8 +181,13 @@ class MonitoringTab(QWidget):
         self.grid_layout.setRowStretch(1, 1)         # Equal row heights
         self.grid_layout.setContentsMargins(0, 0, 0, 5)
 
+        self.info_label = QLabel("")                 # Process/throughput summary line below the dials
+        self.info_label.setStyleSheet("color: #FFFFFF; font-size: 12px; border: none;")
+        self.info_label.setAlignment(Qt.AlignCenter)
+
         self.vbox_layout = QVBoxLayout()             # Create vertical layout
         self.vbox_layout.addLayout(self.grid_layout) # Add grid layout to vertical layout
+        self.vbox_layout.addWidget(self.info_label)  # Add summary line under the grid
         self.setLayout(self.vbox_layout)             # Set vertical layout as window layout
 
     def closeEvent(self, event):
@@ -197,6 +202,9 @@ class MonitoringTab(QWidget):
         self.progress_widgets[index].bg_color = QColor(color_combinations[1])
         self.progress_widgets[index].update()
 
+    def setInfoText(self, text):
+        self.info_label.setText(text)
+
     def setDefaultCircleProgressColor(self):
         for i in range(len(self.color_combinations)):
             self.setCircleProgressColor(i, self.color_combinations[i])
@@ -251,7 +259,6 @@ class MonitoringTab(QWidget):
 
 # Program entry point
 if __name__ == "__main__":
-    import time
     from api_json import ConfigManager
     app = QApplication(sys.argv)
     app_ui_config = ConfigManager()
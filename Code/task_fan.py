@@ -1,31 +1,53 @@
 from api_expansion import Expansion
 from api_systemInfo import SystemInformation
+from api_json import ConfigManager
+from api_fan_control import PIDController, FanCurve
+from api_config_schema import SCHEMA
 import threading
 import atexit
 import signal
 import time
 import sys
+import os
 
 class FAN_TASK:
+    TEMPERATURE_SOURCES = ('cpu', 'case', 'max')
+    CONTROLLERS = ('pid', 'curve')
 
-    def __init__(self):
-        self.expansion = None
+    def __init__(self, expansion=None, system_information=None, install_signal_handlers=True, config_manager=None):
+        # expansion/system_information/config_manager: shared objects when hosted in-process, None to create our own
+        self.expansion = expansion
+        self.owns_expansion = expansion is None
+        self.system_information = system_information
+        self.config_manager = config_manager
         self.cleanup_done = False
         self.stop_event = threading.Event()  # Keep for signal handling
+        self.fan_config = None               # FanConfig the controllers were set up from
+        self.controllers = []                # One PIDController or FanCurve per fan group
+        self.sources = []                    # Temperature source per fan group
+        self.last_duties = None              # Duties last written to the board
+        self.duty_write_count = 0
 
-        try:
-            self.expansion = Expansion()                            # Initialize Expansion object
-        except Exception as e:
-            sys.exit(1)
+        if self.owns_expansion:
+            try:
+                self.expansion = Expansion()                            # Initialize Expansion object
+            except Exception as e:
+                sys.exit(1)
 
-        try:
-            self.system_information = SystemInformation()
-        except Exception as e:
-            sys.exit(1)
+        if self.system_information is None:
+            try:
+                self.system_information = SystemInformation()
+            except Exception as e:
+                sys.exit(1)
 
-        atexit.register(self.cleanup)
-        signal.signal(signal.SIGTERM, self.handle_signal)
-        signal.signal(signal.SIGINT, self.handle_signal)
+        if self.config_manager is None:
+            config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app_config.json')
+            self.config_manager = ConfigManager(config_file, expansion=self.expansion)
+
+        if install_signal_handlers:
+            atexit.register(self.cleanup)
+            signal.signal(signal.SIGTERM, self.handle_signal)
+            signal.signal(signal.SIGINT, self.handle_signal)
 
     def cleanup(self):
         # Perform cleanup operations
@@ -43,7 +65,7 @@ class FAN_TASK:
         except Exception as e:
             print(e)
         try:
-            if self.expansion:
+            if self.expansion and self.owns_expansion:
                 self.expansion.end()
         except Exception as e:
             print(e)
@@ -54,24 +76,129 @@ class FAN_TASK:
         self.cleanup()
         sys.exit(0)
 
+    def apply_fan_config(self, fan):
+        """Set up one controller per fan group, keeping controller state across parameter changes"""
+        controller_type = fan.controller
+        if controller_type not in self.CONTROLLERS:
+            print(f"Unknown fan controller {controller_type!r}, using pid")
+            controller_type = 'pid'
+        sources = []
+        for group in range(1, 4):
+            source = getattr(fan, f'pid_group{group}_source')
+            if source not in self.TEMPERATURE_SOURCES:
+                print(f"Fan group {group}: unknown temperature source {source!r}, using cpu")
+                source = 'cpu'
+            sources.append(source)
+        controllers = []
+        for group in range(1, 4):
+            previous = self.controllers[group - 1] if len(self.controllers) >= group else None
+            if controller_type == 'curve':
+                controller = self.configure_curve(fan, group, previous)
+            else:
+                controller = self.configure_pid(fan, group, previous)
+            if controller is previous and sources[group - 1] != self.sources[group - 1]:
+                controller.reset()    # A different sensor makes the history meaningless
+            controllers.append(controller)
+        self.controllers = controllers
+        self.sources = sources
+        self.fan_config = fan
+
+    def configure_pid(self, fan, group, previous):
+        """Update the group's PIDController in place, or create one"""
+        setpoint = getattr(fan, f'pid_group{group}_setpoint')
+        min_duty = min(fan.pid_min_duty, fan.pid_max_duty)
+        if not isinstance(previous, PIDController):
+            return PIDController(setpoint, fan.pid_kp, fan.pid_ki, fan.pid_kd, min_duty, fan.pid_max_duty)
+        previous.setpoint = setpoint
+        previous.kp, previous.ki, previous.kd = fan.pid_kp, fan.pid_ki, fan.pid_kd
+        previous.set_limits(min_duty, fan.pid_max_duty)
+        return previous
+
+    def configure_curve(self, fan, group, previous):
+        """Update the group's FanCurve in place, or create one; invalid points fall back to the default curve"""
+        key = f'curve_group{group}_points'
+        points = getattr(fan, key)
+        try:
+            FanCurve.parse_points(points)
+        except ValueError as e:
+            print(f"Fan group {group}: {e}, using the default curve")
+            points = SCHEMA['Fan'][key].default
+        if not isinstance(previous, FanCurve):
+            return FanCurve(points, fan.curve_hysteresis, fan.curve_ramp_up, fan.curve_ramp_down)
+        previous.configure(points, fan.curve_hysteresis, fan.curve_ramp_up, fan.curve_ramp_down)
+        return previous
+
+    def read_temperatures(self):
+        """Read the temperatures the fan groups need, None for a sensor that cannot be read"""
+        temperatures = {}
+        if any(source in ('cpu', 'max') for source in self.sources):
+            cpu = self.system_information.get_raspberry_pi_cpu_temperature()
+            temperatures['cpu'] = cpu if cpu else None    # 0 means the thermal zone is unreadable
+        if any(source in ('case', 'max') for source in self.sources):
+            try:
+                temperatures['case'] = self.expansion.get_temp()
+            except Exception as e:
+                print(f"Error reading case temperature: {e}")
+                temperatures['case'] = None
+        if 'max' in self.sources:
+            available = [temperatures[name] for name in ('cpu', 'case') if temperatures[name] is not None]
+            temperatures['max'] = max(available) if available else None
+        return temperatures
+
+    def write_duties(self, duties, min_change):
+        """Write the group duties only if one moved by at least min_change or reached a limit, a failed write is retried next time"""
+        if self.last_duties is not None:
+            changed = False
+            for duty, last, controller in zip(duties, self.last_duties, self.controllers):
+                if abs(duty - last) >= min_change:
+                    changed = True
+                elif duty != last and duty in (round(controller.output_min), round(controller.output_max)):
+                    changed = True    # Let small steps settle exactly on the limits
+            if not changed:
+                return False
+        if not self.expansion.set_fan_duty(*duties):
+            return False
+        self.last_duties = duties
+        self.duty_write_count += 1
+        return True
+
+    def control_step(self, now=None):
+        """Run one sample of the control loop, returns the duties the board should have"""
+        fan = self.config_manager.get_typed_config().fan
+        if fan is not self.fan_config:
+            self.apply_fan_config(fan)
+        temperatures = self.read_temperatures()
+        duties = []
+        for source, controller in zip(self.sources, self.controllers):
+            temperature = temperatures[source]
+            if temperature is None:
+                # Without a reading the safe choice is full cooling
+                controller.reset()
+                duties.append(int(controller.output_max))
+            else:
+                duties.append(int(round(controller.update(temperature, now))))
+        self.write_duties(duties, fan.pid_min_change)
+        return duties
+
     def run_fan_loop(self):
-        """Main monitoring loop - single-threaded infinite loop for both OLED display and fan control"""
-        self.expansion.set_fan_mode(1)
+        """Main control loop - closed-loop control of the three fan groups by PID or fan curve"""
+        self.expansion.set_fan_mode(1)       # Manual mode, the duties come from this loop
         self.expansion.set_fan_frequency(50000) 
-        self.expansion.set_fan_duty(50, 50, 50)
-        self.expansion.set_fan_threshold(50, 100)
-        self.expansion.set_fan_temp_mode_speed(75, 125, 175)
-        self.expansion.set_fan_pi_following(0, 100)
         self.expansion.set_fan_power_switch(1)
+        self.control_step()
+        print("READY=1", flush=True)   # Tells the task manager the fans are under control
+        next_time = time.monotonic()
         while not self.stop_event.is_set():
-            pi_duty = self.system_information.get_raspberry_pi_fan_duty()
-            for i in range(0,255,1):
-                self.expansion.set_fan_duty(i, i, i)
-                time.sleep(0.01)
-            for i in range(255,0,-1):
-                self.expansion.set_fan_duty(i, i, i)
-                time.sleep(0.01)
-            
+            next_time += self.fan_config.pid_sample_interval
+            now = time.monotonic()
+            if next_time < now:
+                next_time = now          # Do not try to catch up after a stall
+            if self.stop_event.wait(next_time - now):
+                break
+            try:
+                self.control_step()
+            except Exception as e:
+                print(f"Fan control error: {e}")
 
 if __name__ == "__main__":
     fan_task= None
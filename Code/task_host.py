@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+import argparse
+import importlib
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from api_json import ConfigManager
+from api_tasks import TaskRegistry
+from api_procfs import read_process_stat
+
+class HostedTask:
+    """
+    One task running as a thread inside the TaskHost
+    """
+    __slots__ = ('path', 'thread', 'instance', 'state', 'start_time',
+                 'error_count', 'last_error', 'stop_event')
+
+    def __init__(self, path):
+        self.path = path
+        self.thread = None
+        self.instance = None
+        self.state = 'stopped'      # running, restarting, exited or stopped
+        self.start_time = None
+        self.error_count = 0
+        self.last_error = None
+        self.stop_event = threading.Event()
+
+class TaskHost:
+    """
+    Run the LED, Fan and OLED tasks as threads of one process instead of one interpreter each
+
+    All tasks share a single Expansion (one I2C bus handle, serialized by its lock) and a single
+    SystemInformation sampler, and the heavy imports (PIL, luma, smbus) are paid once.
+    An exception in one task is logged and that task alone is restarted after a delay.
+    """
+
+    # task file -> (module, class, loop method, shared host attributes passed besides the expansion)
+    BUILTIN_TASKS = {
+        'task_led.py':  ('task_led',  'LED_TASK',  'run_led_loop',  ()),
+        'task_fan.py':  ('task_fan',  'FAN_TASK',  'run_fan_loop',  ('system_information', 'config_manager')),
+        'task_oled.py': ('task_oled', 'OLED_TASK', 'run_oled_loop', ('system_information',)),
+    }
+
+    def __init__(self, config_file="app_config.json", restart_delay=2.0, max_restart_delay=60.0, stop_timeout=3.0):
+        """
+        Initialize the TaskHost
+
+        Args:
+            config_file (str): Path to the configuration file
+            restart_delay (float): Delay before restarting a task that raised, doubled per failure
+            max_restart_delay (float): Upper bound of the restart delay
+            stop_timeout (float): Seconds to wait for a task thread to return when stopping it
+        """
+        self.config_manager = ConfigManager(config_file)
+        self.registry = TaskRegistry(self.config_manager)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stop_timeout = stop_timeout
+        self.expansion = None
+        self.system_information = None
+        self.reconciler = None        # Corrects board drift of sections no hosted task owns
+        self.board_reconcile_interval = 60.0
+        self.tasks = {}               # task path -> HostedTask
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+
+    def open_shared_resources(self):
+        """
+        Open the Expansion board and system sampler shared by every hosted task
+        """
+        if self.expansion is None:
+            from api_expansion import Expansion
+            self.expansion = Expansion()
+        if self.system_information is None:
+            from api_systemInfo import SystemInformation
+            self.system_information = SystemInformation()
+
+    def close_shared_resources(self):
+        try:
+            if self.expansion is not None:
+                self.expansion.end()
+        except Exception as e:
+            print(e)
+        self.expansion = None
+
+    def get_task_states(self):
+        """
+        Get the configured tasks the host knows how to run
+
+        Returns:
+            dict: Task script -> enabled
+        """
+        states = {}
+        for task in self.registry.all():
+            if task.script in self.BUILTIN_TASKS and not task.args:
+                states[task.script] = task.enabled
+            else:
+                print(f"Warning: {task.name} ({task.path}) cannot be hosted in-process, skipped")
+        return states
+
+    def _create_instance(self, task_path):
+        module_name, class_name, _, shared = self.BUILTIN_TASKS[task_path]
+        module = importlib.import_module(module_name)
+        task_class = getattr(module, class_name)
+        kwargs = {'expansion': self.expansion, 'install_signal_handlers': False}
+        for name in shared:
+            kwargs[name] = getattr(self, name)
+        return task_class(**kwargs)
+
+    def _cleanup_instance(self, hosted):
+        if hosted.instance is None:
+            return
+        try:
+            hosted.instance.stop_event.set()
+            hosted.instance.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up {hosted.path}: {e}")
+        hosted.instance = None
+
+    def _run_task(self, hosted):
+        # Thread body: run the task loop, restarting it with backoff when it raises
+        loop_name = self.BUILTIN_TASKS[hosted.path][2]
+        delay = self.restart_delay
+        while not hosted.stop_event.is_set():
+            hosted.start_time = time.monotonic()
+            try:
+                hosted.instance = self._create_instance(hosted.path)
+                hosted.state = 'running'
+                if hosted.stop_event.is_set():
+                    break
+                getattr(hosted.instance, loop_name)()
+                if not hosted.stop_event.is_set():
+                    hosted.state = 'exited'
+                    print(f"Task {hosted.path} returned")
+                break
+            except (Exception, SystemExit) as e:
+                # SystemExit too: the task constructors call sys.exit() when the hardware is missing
+                hosted.error_count += 1
+                hosted.last_error = repr(e)
+                print(f"Task {hosted.path} failed: {e!r}")
+                traceback.print_exc()
+            finally:
+                self._cleanup_instance(hosted)
+            if time.monotonic() - hosted.start_time >= 30.0:
+                delay = self.restart_delay
+            hosted.state = 'restarting'
+            print(f"Restarting task {hosted.path} in {delay:.1f}s")
+            if hosted.stop_event.wait(delay):
+                break
+            delay = min(self.max_restart_delay, delay * 2)
+        if hosted.state != 'exited':
+            hosted.state = 'stopped'
+
+    def start_task(self, task_path):
+        """
+        Start a hosted task thread
+
+        Args:
+            task_path (str): Task file name, one of BUILTIN_TASKS
+        """
+        with self.lock:
+            hosted = self.tasks.get(task_path)
+            if hosted is not None and hosted.thread is not None and hosted.thread.is_alive():
+                return
+            print(f"Starting task: {task_path}")
+            hosted = self.tasks[task_path] = HostedTask(task_path)
+            hosted.thread = threading.Thread(target=self._run_task, args=(hosted,), name=task_path, daemon=True)
+            hosted.thread.start()
+
+    def stop_task(self, task_path):
+        """
+        Stop a hosted task thread and wait for it to return
+
+        Args:
+            task_path (str): Task file name
+        """
+        with self.lock:
+            hosted = self.tasks.pop(task_path, None)
+        if hosted is None:
+            return
+        hosted.stop_event.set()
+        instance = hosted.instance
+        if instance is not None:
+            instance.stop_event.set()
+        if hosted.thread is not None:
+            hosted.thread.join(self.stop_timeout)
+            if hosted.thread.is_alive():
+                print(f"Warning: task {task_path} did not stop within {self.stop_timeout}s")
+        print(f"Stopped task: {task_path}")
+
+    def reconcile(self):
+        """
+        Start enabled tasks and stop disabled ones
+        """
+        with self.lock:
+            for task_path, enabled in self.get_task_states().items():
+                if enabled:
+                    self.start_task(task_path)
+                else:
+                    self.stop_task(task_path)
+
+    def _on_config_change(self, section, old, new):
+        if self.registry.refresh():
+            self.reconcile()
+
+    def list_tasks(self):
+        """
+        Print hosted tasks with their status
+        """
+        with self.lock:
+            for task_path, hosted in self.tasks.items():
+                print(f"  {task_path} [{hosted.state}] errors: {hosted.error_count}"
+                      + (f", last: {hosted.last_error}" if hosted.last_error else ""))
+
+    def run(self):
+        """
+        Host the enabled tasks until stop() is called
+        """
+        self.open_shared_resources()
+        self.config_manager.subscribe(self._on_config_change)
+        self.config_manager.start_watching()
+        if self.board_reconcile_interval > 0:
+            from api_reconcile import BoardReconciler
+            self.reconciler = BoardReconciler(self.expansion, self.config_manager)
+            self.reconciler.start(self.board_reconcile_interval, watch=False)
+        try:
+            self.reconcile()
+            self.stop_event.wait()
+        finally:
+            if self.reconciler is not None:
+                self.reconciler.stop()
+                self.reconciler = None
+            self.config_manager.stop_watching()
+            self.config_manager.unsubscribe(self._on_config_change)
+            for task_path in list(self.tasks):
+                self.stop_task(task_path)
+            self.close_shared_resources()
+
+    def stop(self):
+        self.stop_event.set()
+
+def read_process_usage(pid):
+    """
+    Read the resident memory and consumed CPU time of a process
+
+    Args:
+        pid (int): Process ID
+
+    Returns:
+        tuple: (rss_kb, cpu_seconds), (0, 0.0) if the process is gone
+    """
+    stat = read_process_stat(pid)
+    if stat is None:
+        return 0, 0.0
+    return stat.rss_pages * os.sysconf('SC_PAGE_SIZE') // 1024, stat.cpu_ticks / os.sysconf('SC_CLK_TCK')
+
+def get_process_tree(root_pid):
+    """
+    Get a process and all of its descendants
+
+    Args:
+        root_pid (int): PID at the top of the tree
+
+    Returns:
+        list: PIDs including root_pid
+    """
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        stat = read_process_stat(name)
+        if stat is None:
+            continue
+        children.setdefault(stat.ppid, []).append(int(name))
+    pids, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, ()))
+    return pids
+
+def measure_command(command, duration, warmup):
+    """
+    Run a command and measure its whole process tree
+
+    Args:
+        command (list): Command line to run
+        duration (float): Measurement window in seconds, after warmup
+        warmup (float): Seconds to let the tasks start before measuring
+
+    Returns:
+        dict: processes, rss_kb at the end of the window, cpu_percent over the window
+    """
+    proc = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(warmup)
+        start_cpu = {pid: read_process_usage(pid)[1] for pid in get_process_tree(proc.pid)}
+        start = time.monotonic()
+        time.sleep(duration)
+        elapsed = time.monotonic() - start
+        pids = get_process_tree(proc.pid)
+        rss_kb, cpu_seconds = 0, 0.0
+        for pid in pids:
+            rss, cpu = read_process_usage(pid)
+            rss_kb += rss
+            cpu_seconds += cpu - start_cpu.get(pid, 0.0)
+        return {'processes': len(pids), 'rss_kb': rss_kb, 'cpu_percent': 100.0 * cpu_seconds / elapsed}
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+def run_benchmark(duration=30.0, warmup=5.0):
+    """
+    Compare total RSS and CPU of the multi-process TaskManager against the in-process TaskHost
+
+    Args:
+        duration (float): Measurement window per mode in seconds
+        warmup (float): Start-up time excluded from the measurement
+    """
+    modes = [
+        ("multi-process (task_manager.py)", [sys.executable, 'task_manager.py']),
+        ("in-process (task_host.py)", [sys.executable, 'task_host.py']),
+    ]
+    print(f"Measuring each mode for {duration:.0f}s after a {warmup:.0f}s warmup")
+    print(f"{'Mode':<34}{'Processes':>10}{'RSS (MB)':>10}{'CPU (%)':>9}")
+    for label, command in modes:
+        result = measure_command(command, duration, warmup)
+        print(f"{label:<34}{result['processes']:>10}{result['rss_kb'] / 1024:>10.1f}{result['cpu_percent']:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the LED, Fan and OLED tasks in one process")
+    parser.add_argument('--config', default='app_config.json', help="Configuration file")
+    parser.add_argument('--benchmark', type=float, metavar='SECONDS', nargs='?', const=30.0,
+                        help="Compare RSS and CPU against the multi-process task manager")
+    args = parser.parse_args()
+
+    if args.benchmark is not None:
+        run_benchmark(args.benchmark)
+        sys.exit(0)
+
+    host = TaskHost(args.config)
+    signal.signal(signal.SIGTERM, lambda signum, frame: host.stop())
+    try:
+        # Run the host in a thread so the main thread stays free to receive signals
+        host_thread = threading.Thread(target=host.run, daemon=True)
+        host_thread.start()
+        while host_thread.is_alive():
+            host_thread.join(1)
+    except KeyboardInterrupt:
+        print("\nReceived interrupt signal, shutting down...")
+        host.stop()
+        host_thread.join()
@@ -1,25 +1,28 @@
 import threading
 import atexit
 import signal
-import time
 import sys
 from api_expansion import Expansion
 
 class LED_TASK:
 
-    def __init__(self):
-        self.expansion = None
+    def __init__(self, expansion=None, install_signal_handlers=True):
+        # expansion: shared Expansion object when hosted in-process, None to open our own
+        self.expansion = expansion
+        self.owns_expansion = expansion is None
         self.cleanup_done = False
         self.stop_event = threading.Event()  # Keep for signal handling
 
-        try:
-            self.expansion = Expansion()                            # Initialize Expansion object
-        except Exception as e:
-            sys.exit(1)
+        if self.owns_expansion:
+            try:
+                self.expansion = Expansion()                            # Initialize Expansion object
+            except Exception as e:
+                sys.exit(1)
 
-        atexit.register(self.cleanup)
-        signal.signal(signal.SIGTERM, self.handle_signal)
-        signal.signal(signal.SIGINT, self.handle_signal)
+        if install_signal_handlers:
+            atexit.register(self.cleanup)
+            signal.signal(signal.SIGTERM, self.handle_signal)
+            signal.signal(signal.SIGINT, self.handle_signal)
 
     def cleanup(self):
         # Perform cleanup operations
@@ -37,7 +40,7 @@ class LED_TASK:
         except Exception as e:
             print(e)
         try:
-            if self.expansion:
+            if self.expansion and self.owns_expansion:
                 self.expansion.end()
         except Exception as e:
             print(e)
@@ -71,7 +74,8 @@ class LED_TASK:
             for i in range(len(rainbow_colors)):
                 r,g,b = rainbow_colors[i]
                 self.expansion.set_all_led_color(r,g,b)
-                time.sleep(0.5)
+                if self.stop_event.wait(0.5):
+                    break
 
     def wheel(self, pos):
         wheel_pos = pos % 255
@@ -99,7 +103,8 @@ class LED_TASK:
             for i in range(255):
                 r,g,b = self.wheel(i)
                 self.expansion.set_all_led_color(r,g,b)
-                time.sleep(0.05)
+                if self.stop_event.wait(0.05):
+                    break
 
 
     def run_led_loop(self):
@@ -1,190 +1,456 @@
 #!/usr/bin/env python3
+import argparse
+import json
 import os
+import select
+import selectors
+import signal
+import socket
 import subprocess
 import sys
 import threading
 import time
+from collections import deque
 from api_json import ConfigManager
+from api_service import SystemdNotifier
+from api_tasks import TaskRegistry
+from api_task_usage import TaskUsageMonitor, format_usage_table
+from api_task_log import TaskLog
+from api_limits import has_spawn_limits, limits_command
+from api_runtime import RUNTIME_DIR, ensure_private_dir
+
+# Runtime files (usage dump, I2C counters, sockets) live in a private directory, see api_runtime
+USAGE_FILE = os.path.join(RUNTIME_DIR, 'task_usage.json')
+CONTROL_SOCKET = os.path.join(RUNTIME_DIR, 'control.sock')
+
+class ControlClient:
+    """
+    One control connection served by the monitor loop without blocking it
+    """
+    __slots__ = ('data', 'reply', 'deadline')
+
+    def __init__(self, deadline):
+        self.data = b''              # Request bytes received so far
+        self.reply = None            # Reply bytes still to send, None while reading the request
+        self.deadline = deadline     # Monotonic time after which the connection is dropped
+
+class TaskRecord:
+    """
+    Supervision state of one task: current process, exit history and restart backoff
+    """
+    __slots__ = ('name', 'state', 'pid', 'start_time', 'last_exit_code', 'last_uptime',
+                 'exit_codes', 'crash_times', 'restart_count', 'backoff', 'next_restart',
+                 'last_stop_latency', 'watchdog_kills', 'watchdog_pid', 'ready_time', 'ready_deadline')
+
+    def __init__(self, name):
+        self.name = name
+        self.state = 'stopped'       # running, waiting, backoff, exited, failed or stopped
+        self.pid = None
+        self.start_time = None
+        self.last_exit_code = None
+        self.last_uptime = None
+        self.exit_codes = deque(maxlen=10)
+        self.crash_times = deque(maxlen=32)
+        self.restart_count = 0
+        self.backoff = 0.0
+        self.next_restart = None
+        self.last_stop_latency = None
+        self.watchdog_kills = 0      # Restarts forced by the RSS watchdog
+        self.watchdog_pid = None     # Process the watchdog already sent SIGTERM to
+        self.ready_time = None       # When the current run became ready, None while starting
+        self.ready_deadline = None   # When a task that did not print READY=1 counts as ready anyway
+
+    def uptime(self, now=None):
+        if self.state != 'running' or self.start_time is None:
+            return 0.0
+        return (now if now is not None else time.monotonic()) - self.start_time
+
+    def describe(self):
+        """
+        Short human readable status
+
+        Returns:
+            str: e.g. "running pid 812 up 3m12s, 1 restarts, last exit -11"
+        """
+        if self.state == 'running':
+            uptime = int(self.uptime())
+            text = f"running pid {self.pid} up {uptime // 60}m{uptime % 60:02d}s"
+            if self.ready_time is None:
+                text += " (not ready)"
+        elif self.state == 'waiting':
+            text = "waiting for dependencies"
+        elif self.state == 'backoff':
+            text = f"restarting in {max(0.0, self.next_restart - time.monotonic()):.1f}s"
+        else:
+            text = self.state
+        if self.restart_count:
+            text += f", {self.restart_count} restarts"
+        if self.watchdog_kills:
+            text += f", {self.watchdog_kills} over memory budget"
+        if self.last_exit_code is not None:
+            text += f", last exit {self.last_exit_code} after {self.last_uptime:.1f}s"
+        return text
 
 class TaskManager:
     """
     A class to manage and execute tasks using external ConfigManager
     """
     
-    def __init__(self, config_file="app_config.json"):
+    def __init__(self, config_file="app_config.json", use_zygote=False):
         """
         Initialize the TaskManager
         
         Args:
             config_file (str): Path to the configuration file
+            use_zygote (bool): Fork tasks from a preloaded zygote instead of starting fresh interpreters
         """
         self.config_manager = ConfigManager(config_file)
+        self.registry = TaskRegistry(self.config_manager)
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         self.config_path = os.path.join(self.script_dir, config_file)
-        self.running_processes = {}  # Store running processes
+        self.running_processes = {}  # task name -> running process
+        self.process_fds = {}        # task name -> pidfd that becomes readable when the process exits
         self.monitor_thread = None
         self.monitoring = False
+        self.selector = None
+        self.wakeup_pipe = None      # Written to wake the monitor loop for a reconcile or shutdown
+        self.fallback_interval = 1.0 # Poll interval when inotify or pidfd is unavailable
+        self.task_records = {}       # task name -> TaskRecord
+        self.restart_backoff_initial = 1.0   # First restart delay after a crash, doubled per crash
+        self.restart_backoff_max = 60.0
+        self.crash_loop_limit = 5            # Crashes within crash_loop_window before giving up
+        self.crash_loop_window = 120.0
+        self.stable_uptime = 30.0            # A run at least this long resets the backoff
+        self.stop_timeout = 3.0              # Deadline for stopping all tasks at shutdown
+        self.accounting_interval = 5.0       # Seconds between resource samples, 0 disables accounting
+        self.next_sample = 0.0
+        self.usage_file = USAGE_FILE
+        i2c_stats_dir = os.path.join(RUNTIME_DIR, 'i2c_stats')
+        try:
+            ensure_private_dir(RUNTIME_DIR)
+            ensure_private_dir(i2c_stats_dir)
+            os.environ['EXPANSION_I2C_STATS_DIR'] = i2c_stats_dir   # Inherited by tasks and the zygote
+        except OSError as e:
+            print(f"I2C accounting disabled: {e}")
+            i2c_stats_dir = None
+        self.usage_monitor = TaskUsageMonitor(i2c_stats_dir=i2c_stats_dir)
+        self.control_socket_path = CONTROL_SOCKET
+        self.board_reconcile_interval = 60.0 # Seconds between board drift checks, 0 disables them
+        self.reconciler = None
+        self.control_socket = None
+        self.control_clients = {}            # connection -> ControlClient
+        self.control_timeout = 3.0           # Seconds a client may take to send its request and read the reply
+        self.overrides = {}                  # task name -> run state forced through the control socket
+        self.task_logs = {}                  # task name -> TaskLog, kept across restarts
+        self.log_pipes = {}                  # read end of a task's output pipe -> task name
+        self.log_echo = True                 # Also print kept log lines, prefixed with the task name
+        self.notifier = SystemdNotifier()
+        self.watchdog_interval = self.notifier.watchdog_interval()
+        for name in ('NOTIFY_SOCKET', 'WATCHDOG_USEC', 'WATCHDOG_PID'):
+            os.environ.pop(name, None)      # Like sd_notify's unset_environment, tasks must not inherit them
+        self.next_watchdog = 0.0
+        self.ready_sent = False
+        self.last_status = None
+        self.zygote = None
+        if use_zygote:
+            from task_zygote import ZygoteClient
+            self.zygote = ZygoteClient()
     
     def get_enabled_tasks(self):
         """
         Get tasks that are enabled for startup
         
         Returns:
-            list: Tasks with is_run_on_startup set to True
+            list: TaskDefinition objects that are enabled, highest priority first
         """
-        # Get all tasks from config file
-        tasks = []
-        
-        # Get task configs for each module
-        led_config = self.config_manager.get_section('LED')
-        fan_config = self.config_manager.get_section('Fan')
-        oled_config = self.config_manager.get_section('OLED')
-        
-        # Add LED task
-        if led_config and 'task_name' in led_config:
-            tasks.append({
-                'path': led_config['task_name'],
-                'is_run_on_startup': led_config.get('is_run_on_startup', True)
-            })
-        
-        # Add Fan task
-        if fan_config and 'task_name' in fan_config:
-            tasks.append({
-                'path': fan_config['task_name'],
-                'is_run_on_startup': fan_config.get('is_run_on_startup', True)
-            })
-        
-        # Add OLED task
-        if oled_config and 'task_name' in oled_config:
-            tasks.append({
-                'path': oled_config['task_name'],
-                'is_run_on_startup': oled_config.get('is_run_on_startup', True)
-            })
-        
-        # Return enabled tasks
-        return [task for task in tasks if task.get("is_run_on_startup", True)]
+        return self.registry.enabled()
 
     def get_disabled_tasks(self):
         """
         Get tasks that are disabled for startup
         
         Returns:
-            list: Tasks with is_run_on_startup set to False
+            list: TaskDefinition objects that are disabled
         """
-        # Get all tasks from config file
-        tasks = []
-        
-        # Get task configs for each module
-        led_config = self.config_manager.get_section('LED')
-        fan_config = self.config_manager.get_section('Fan')
-        oled_config = self.config_manager.get_section('OLED')
-        
-        # Add LED task
-        if led_config and 'task_name' in led_config:
-            tasks.append({
-                'path': led_config['task_name'],
-                'is_run_on_startup': led_config.get('is_run_on_startup', False)
-            })
-        
-        # Add Fan task
-        if fan_config and 'task_name' in fan_config:
-            tasks.append({
-                'path': fan_config['task_name'],
-                'is_run_on_startup': fan_config.get('is_run_on_startup', False)
-            })
-        
-        # Add OLED task
-        if oled_config and 'task_name' in oled_config:
-            tasks.append({
-                'path': oled_config['task_name'],
-                'is_run_on_startup': oled_config.get('is_run_on_startup', False)
-            })
-        
-        # Return disabled tasks
-        return [task for task in tasks if not task.get("is_run_on_startup", False)]
+        return self.registry.disabled()
 
     def list_tasks(self):
         """
         Print all tasks with their status
         """
-        tasks = []
-        
-        # Get task configs for each module
-        led_config = self.config_manager.get_section('LED')
-        fan_config = self.config_manager.get_section('Fan')
-        oled_config = self.config_manager.get_section('OLED')
-        
-        # Add LED task
-        if led_config and 'task_name' in led_config:
-            tasks.append({
-                'path': led_config['task_name'],
-                'is_run_on_startup': led_config.get('is_run_on_startup', False)
-            })
-        
-        # Add Fan task
-        if fan_config and 'task_name' in fan_config:
-            tasks.append({
-                'path': fan_config['task_name'],
-                'is_run_on_startup': fan_config.get('is_run_on_startup', False)
-            })
-        
-        # Add OLED task
-        if oled_config and 'task_name' in oled_config:
-            tasks.append({
-                'path': oled_config['task_name'],
-                'is_run_on_startup': oled_config.get('is_run_on_startup', False)
-            })
-        
+        tasks = self.registry.all()
         if not tasks:
             print("No tasks configured")
             return
         
         print("Configured tasks:")
         for i, task in enumerate(tasks, 1):
-            status = "ON" if task["is_run_on_startup"] else "OFF"
-            print(f"  {i}. {task['path']} [{status}]")
+            status = "ON" if task.enabled else "OFF"
+            record = self.task_records.get(task.name)
+            state = record.describe() if record is not None else "stopped"
+            print(f"  {i}. {task.name} ({task.path}) [{status}] {state}")
 
     def start_task(self, task):
         """
         Start a single task
         
         Args:
-            task (dict): Task configuration
+            task (TaskDefinition): Task definition
             
         Returns:
             subprocess.Popen or None: Process object if started successfully
         """
-        task_path = os.path.join(self.script_dir, task["path"])
-        if os.path.exists(task_path):
-            print(f"Starting task: {task['path']}")
-            proc = subprocess.Popen([sys.executable, task["path"]], cwd=self.script_dir)
-            return proc
-        else:
-            print(f"Warning: Task file {task['path']} not found")
+        if task.script is not None and not os.path.exists(os.path.join(self.script_dir, task.script)):
+            print(f"Warning: Task file {task.script} not found")
+            self._start_failed(task.name)
             return None
+        print(f"Starting task: {task.name} ({task.path})")
+        # stdout and stderr go through a pipe into the task's ring buffer instead of the journal
+        read_fd, write_fd = os.pipe2(os.O_CLOEXEC)
+        os.set_blocking(read_fd, False)
+        proc = None
+        try:
+            if self.zygote is not None:
+                try:
+                    if self.zygote.start_server():
+                        proc = self.zygote.spawn(task.script, task.args, cwd=self.script_dir, module=task.module,
+                                                 output_fd=write_fd, limits=task.limits)
+                except OSError as e:
+                    print(f"Zygote spawn failed, starting a fresh interpreter: {e}")
+            if proc is None:
+                try:
+                    command = task.command(sys.executable)
+                    if has_spawn_limits(task.limits):
+                        # Applied by a wrapper before exec, so the task never runs without them
+                        command = limits_command(task.limits, command)
+                    proc = subprocess.Popen(command, cwd=self.script_dir,
+                                            stdout=write_fd, stderr=subprocess.STDOUT,
+                                            env=dict(os.environ, PYTHONUNBUFFERED='1'))
+                except OSError as e:
+                    print(f"Error starting task {task.name}: {e}")
+                    os.close(read_fd)
+                    self._start_failed(task.name)
+                    return None
+        finally:
+            os.close(write_fd)
+        if task.name not in self.task_logs:
+            self.task_logs[task.name] = TaskLog(task.name, echo=self.log_echo)
+        self.task_logs[task.name].ready_seen = False
+        self.log_pipes[read_fd] = task.name
+        if self.selector is not None:
+            self._watch_log(read_fd)
+        record = self.task_records.get(task.name)
+        if record is None:
+            record = self.task_records[task.name] = TaskRecord(task.name)
+        record.state = 'running'
+        record.pid = proc.pid
+        record.start_time = time.monotonic()
+        record.next_restart = None
+        if task.ready == 'notify':
+            record.ready_time = None
+            record.ready_deadline = record.start_time + task.ready_timeout
+        else:
+            record.ready_time = record.start_time
+            record.ready_deadline = None
+        return proc
+
+    def _start_failed(self, name):
+        # A task that cannot be spawned will not become ready, so it must not hold back its dependents
+        record = self.task_records.setdefault(name, TaskRecord(name))
+        record.state = 'failed'
+        record.next_restart = None
+
+    def _mark_ready(self, name, timed_out=False):
+        """
+        Record that the current run of a task is ready
+
+        Args:
+            name (str): Task name
+            timed_out (bool): The task did not print READY=1 within its ready_timeout
+
+        Returns:
+            bool: True if the task was not ready before
+        """
+        record = self.task_records.get(name)
+        if record is None or record.state != 'running' or record.ready_time is not None:
+            return False
+        record.ready_time = time.monotonic()
+        record.ready_deadline = None
+        elapsed = record.ready_time - record.start_time
+        if timed_out:
+            print(f"Task {name} did not signal readiness within {elapsed:.1f}s, starting its dependents anyway")
+        else:
+            print(f"Task {name} ready after {elapsed:.2f}s")
+        return True
+
+    def _check_ready_deadlines(self):
+        # Returns True if a task became ready by timing out, its dependents may start now
+        now = time.monotonic()
+        changed = False
+        for name, record in self.task_records.items():
+            if record.state == 'running' and record.ready_time is None and record.ready_deadline is not None \
+                    and now >= record.ready_deadline:
+                changed = self._mark_ready(name, timed_out=True) or changed
+        return changed
+
+    def _dependency_state(self, dep, enabled_names):
+        """
+        Classify one dependency of a task that is about to start
+
+        Args:
+            dep (str): Name of the task depended on
+            enabled_names (set): Tasks that are currently enabled
+
+        Returns:
+            str: 'ready', 'pending' or 'skipped' (disabled, unknown, finished or failed)
+        """
+        if dep not in enabled_names:
+            return 'skipped'
+        record = self.task_records.get(dep)
+        if dep in self.running_processes:
+            return 'ready' if record is not None and record.ready_time is not None else 'pending'
+        if record is not None and record.state in ('exited', 'failed'):
+            return 'skipped'
+        return 'pending'
+
+    def check_rss_budgets(self, samples):
+        """
+        Terminate tasks whose RSS exceeds their rss_limit_mb, they are restarted like a crash
+
+        Args:
+            samples (dict): Task name -> TaskUsageSample from the latest sampling
+
+        Returns:
+            list: Names of the tasks that were signalled
+        """
+        signalled = []
+        for name, sample in samples.items():
+            task = self.registry.tasks.get(name)
+            budget = task.limits.get('rss_limit_mb') if task is not None else None
+            proc = self.running_processes.get(name)
+            if budget is None or proc is None or sample.rss_mb <= budget:
+                continue
+            record = self.task_records.setdefault(name, TaskRecord(name))
+            # SIGTERM first so the task can clean up, SIGKILL if it is still running at the next sample
+            if record.watchdog_pid == proc.pid:
+                proc.kill()
+            else:
+                record.watchdog_pid = proc.pid
+                record.watchdog_kills += 1
+                proc.terminate()
+            print(f"Task {name} uses {sample.rss_mb:.1f} MB RSS, over its {budget} MB budget, restarting")
+            signalled.append(name)
+        return signalled
 
     def stop_task(self, task_path):
         """
         Stop a running task
         
         Args:
-            task_path (str): Path to the task file
+            task_path (str): Task name
         """
-        if task_path in self.running_processes:
-            proc = self.running_processes[task_path]
-            if proc.poll() is None:  # Check if process is still running
-                proc.terminate()
-                try:
-                    proc.wait(timeout=2)  # Wait up to 2 seconds
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-                    proc.wait()  # Wait for force kill to complete
-            del self.running_processes[task_path]
-            print(f"Stopped task: {task_path}")
+        self.stop_tasks([task_path], timeout=2.0)
+
+    def _wait_for_exit(self, procs, deadline, exited):
+        """
+        Wait until the given processes exit or the deadline passes
+
+        Args:
+            procs (dict): Task name -> process, still running entries are waited for
+            deadline (float): time.monotonic() value to give up at
+            exited (dict): Task name -> monotonic exit time, filled in as processes exit
+        """
+        fds = {}
+        for name, proc in procs.items():
+            try:
+                if hasattr(proc, 'fileno'):
+                    fds[os.dup(proc.fileno())] = name
+                elif hasattr(os, 'pidfd_open'):
+                    fds[os.pidfd_open(proc.pid)] = name
+            except OSError:
+                pass    # Already reaped or no pidfd support, polled below
+        try:
+            while True:
+                for name, proc in procs.items():
+                    if name not in exited and proc.poll() is not None:
+                        exited[name] = time.monotonic()
+                pending = [fd for fd, name in fds.items() if name not in exited]
+                running = [name for name in procs if name not in exited]
+                remaining = deadline - time.monotonic()
+                if not running or remaining <= 0:
+                    return
+                # Processes without a pollable fd are checked every 20 ms
+                timeout = remaining if len(pending) == len(running) else min(remaining, 0.02)
+                select.select(pending, [], [], timeout)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def stop_tasks(self, task_names, timeout=None):
+        """
+        Stop several tasks concurrently under one deadline
+
+        Every task gets SIGTERM at once, lowest priority first. Tasks still running shortly before
+        the deadline are killed, again lowest priority first, so the fan controller is the last
+        one forced down; the remaining time is left for the kernel to reap the killed processes
+        and the call returns by the deadline.
+
+        Args:
+            task_names (list): Names of the tasks to stop
+            timeout (float): Global deadline in seconds, defaults to stop_timeout
+
+        Returns:
+            dict: Task name -> (stop latency in seconds, True if it had to be killed)
+        """
+        start = time.monotonic()
+        timeout = self.stop_timeout if timeout is None else timeout
+        deadline = start + timeout
+        kill_time = deadline - min(0.5, timeout * 0.2)   # Reserve time to reap killed processes
+
+        def priority(name):
+            task = self.registry.tasks.get(name)
+            return task.priority if task is not None else 0
+
+        names = sorted((name for name in task_names if name in self.running_processes), key=priority)
+        procs = {}
+        signal_time = {}
+        for name in names:
+            if self.selector is not None:
+                self._unwatch_process(name)
+            procs[name] = self.running_processes[name]
+            signal_time[name] = time.monotonic()
+            if procs[name].poll() is None:  # Check if process is still running
+                procs[name].terminate()
+        exited = {}
+        self._wait_for_exit(procs, kill_time, exited)
+        killed = [name for name in names if name not in exited]
+        for name in killed:
+            procs[name].kill()
+        if killed:
+            self._wait_for_exit({name: procs[name] for name in killed}, deadline, exited)
+
+        report = {}
+        for name in names:
+            latency = exited.get(name, time.monotonic()) - signal_time[name]
+            report[name] = (latency, name in killed)
+            del self.running_processes[name]
+            self.usage_monitor.forget(name, procs[name].pid)
+            record = self.task_records.get(name)
+            if record is not None:
+                record.state = 'stopped'
+                record.pid = None
+                record.last_stop_latency = latency
+            print(f"Stopped task: {name} in {latency * 1000:.0f} ms" + (" (killed)" if name in killed else ""))
+        if len(report) > 1:
+            print(f"Stopped {len(report)} tasks in {(time.monotonic() - start) * 1000:.0f} ms")
+        return report
 
     def execute_enabled_tasks(self):
         """
         Execute all tasks that are enabled (is_run_on_startup = True)
+
+        Tasks without pending dependencies are all spawned at once, highest priority first;
+        the monitor thread starts the others as their dependencies become ready.
         """
         # Get the list of enabled tasks
         enabled_tasks = self.get_enabled_tasks()
@@ -193,72 +459,576 @@ class TaskManager:
             print("No tasks enabled for execution")
             return
             
-        # Start all enabled tasks as separate processes
-        for task in enabled_tasks:
-            task_path = task["path"]
-            if task_path not in self.running_processes:
+        self._start_ready_tasks(enabled_tasks)
+
+    def wake_monitor(self):
+        """
+        Ask the monitor thread to reconcile tasks against the configuration now
+        """
+        if self.wakeup_pipe is not None:
+            try:
+                os.write(self.wakeup_pipe[1], b'x')
+            except BlockingIOError:
+                pass    # A wakeup is already pending
+
+    def _watch_process(self, task_path, proc):
+        # Register a pidfd so the selector reports the process exit without polling,
+        # zygote children report their exit on their connection instead
+        if self.selector is None:
+            return False
+        try:
+            if hasattr(proc, 'fileno'):
+                fd = os.dup(proc.fileno())
+            elif hasattr(os, 'pidfd_open'):
+                fd = os.pidfd_open(proc.pid)
+            else:
+                return False
+        except OSError:
+            return False
+        self.process_fds[task_path] = fd
+        self.selector.register(fd, selectors.EVENT_READ, ('exit', task_path))
+        return True
+
+    def _watch_log(self, fd):
+        if fd not in self.selector.get_map():
+            self.selector.register(fd, selectors.EVENT_READ, ('log', fd))
+
+    def _read_log(self, fd, final=False):
+        """
+        Move available output of a task into its ring buffer, closing the pipe at end of file
+
+        Args:
+            fd (int): Read end of the task's output pipe
+            final (bool): The manager is shutting down, close the pipe even without end of file
+
+        Returns:
+            bool: True if the output contained the task's READY=1 line
+        """
+        name = self.log_pipes.get(fd)
+        log = self.task_logs.get(name)
+        closed = False
+        try:
+            for _ in range(16):          # At most 64 KiB per wakeup so one chatty task cannot starve the loop
+                data = os.read(fd, 4096)
+                if not data:
+                    closed = True
+                    break
+                log.feed(data)
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            print(f"Error reading output of {name}: {e}")
+            closed = True
+        if closed or final:
+            log.flush()
+            if self.selector is not None and fd in self.selector.get_map():
+                self.selector.unregister(fd)
+            del self.log_pipes[fd]
+            os.close(fd)
+        if log.ready_seen and not closed:
+            return self._mark_ready(name)
+        return False
+
+    def get_logs(self, name, count=100):
+        """
+        Get the recent output of a task
+
+        Args:
+            name (str): Task name
+            count (int): Maximum number of lines, 0 for the whole buffer
+
+        Returns:
+            list: Formatted log lines, None if the task never ran
+        """
+        log = self.task_logs.get(name)
+        return log.get_lines(count) if log is not None else None
+
+    def _unwatch_process(self, task_path):
+        fd = self.process_fds.pop(task_path, None)
+        if fd is not None:
+            self.selector.unregister(fd)
+            os.close(fd)
+
+    def _reconcile_tasks(self, last_state):
+        """
+        Start newly enabled tasks and stop disabled ones
+
+        Args:
+            last_state (list): [enabled paths, disabled paths] seen last time, updated in place
+        """
+        # Manual overrides from the control socket win over the configuration until the next reload
+        tasks = self.registry.all()
+        enabled_tasks = [task for task in tasks if self.overrides.get(task.name, task.enabled)]
+        disabled_tasks = [task for task in tasks if not self.overrides.get(task.name, task.enabled)]
+        current_enabled_paths = set(task.name for task in enabled_tasks)
+        current_disabled_paths = set(task.name for task in disabled_tasks)
+        if current_enabled_paths != last_state[0] or current_disabled_paths != last_state[1]:
+            print(f"Current configuration - Enabled tasks: {list(current_enabled_paths)}")
+            print(f"Current configuration - Disabled tasks: {list(current_disabled_paths)}")
+            last_state[0] = current_enabled_paths
+            last_state[1] = current_disabled_paths
+
+        # Start newly enabled tasks and crashed tasks whose backoff has expired
+        self._start_ready_tasks(enabled_tasks)
+
+        # Stop disabled tasks, disabling also clears a crash loop so re-enabling retries
+        self.stop_tasks([task.name for task in disabled_tasks if task.name in self.running_processes])
+        for task in disabled_tasks:
+            task_path = task.name
+            record = self.task_records.get(task_path)
+            if record is not None and record.state != 'stopped':
+                record.state = 'stopped'
+                record.crash_times.clear()
+                record.backoff = 0.0
+                record.next_restart = None
+
+        # Stop tasks that were removed from the configuration
+        self.stop_tasks([name for name in self.running_processes if name not in self.registry.tasks])
+
+        for fd in self.log_pipes:
+            self._watch_log(fd)
+
+        # Watch every running process that has no exit notification yet
+        for task_path, proc in self.running_processes.items():
+            if task_path not in self.process_fds and proc.poll() is None:
+                self._watch_process(task_path, proc)
+
+    def _start_ready_tasks(self, enabled_tasks):
+        """
+        Start every enabled task that is not running and whose dependencies are ready
+
+        A pass starts all such tasks without waiting for any of them, highest priority first, so
+        independent tasks come up in parallel. Passes repeat while they start something, since a
+        task that is ready as soon as it is spawned releases its dependents in the same call.
+        Tasks that still wait are marked 'waiting' and retried when a dependency becomes ready.
+        Dependencies only order the start: a dependent keeps running if its dependency exits later.
+
+        Args:
+            enabled_tasks (list): Enabled TaskDefinitions, highest priority first
+        """
+        enabled_names = set(task.name for task in enabled_tasks)
+        started = True
+        while started:
+            started = False
+            waiting = {}
+            now = time.monotonic()
+            for task in enabled_tasks:
+                task_path = task.name
+                if task_path in self.running_processes:
+                    continue
+                record = self.task_records.get(task_path)
+                restarting = False
+                if record is not None:
+                    if record.state in ('failed', 'exited'):
+                        continue
+                    if record.state == 'backoff' and record.next_restart > now:
+                        continue
+                    restarting = record.state == 'backoff'
+                states = {dep: self._dependency_state(dep, enabled_names) for dep in task.depends_on}
+                pending = [dep for dep, state in states.items() if state == 'pending']
+                if pending:
+                    waiting[task_path] = pending
+                    continue
+                skipped = [dep for dep, state in states.items() if state == 'skipped' and dep in self.task_records
+                           and self.task_records[dep].state == 'failed']
+                if skipped:
+                    print(f"Task {task_path}: dependency {', '.join(skipped)} failed, starting anyway")
+                if restarting:
+                    record.restart_count += 1
+                    print(f"Restarting task {task_path} (restart {record.restart_count})")
                 proc = self.start_task(task)
                 if proc:
                     self.running_processes[task_path] = proc
+                    started = True
+        for task_path, pending in waiting.items():
+            record = self.task_records.setdefault(task_path, TaskRecord(task_path))
+            if record.state != 'waiting':
+                print(f"Task {task_path} waits for {', '.join(pending)}")
+            record.state = 'waiting'
+            record.next_restart = None
+
+    def _handle_process_exit(self, task_path):
+        """
+        Reap an exited task, record its exit and schedule a restart with exponential backoff
+
+        Args:
+            task_path (str): Task name
+
+        Returns:
+            bool: True if the task exited and was removed from running_processes
+        """
+        if self.selector is not None:
+            self._unwatch_process(task_path)
+        proc = self.running_processes.get(task_path)
+        if proc is None or proc.poll() is None:
+            return False
+        del self.running_processes[task_path]
+        self.usage_monitor.forget(task_path, proc.pid)
+        now = time.monotonic()
+        record = self.task_records.setdefault(task_path, TaskRecord(task_path))
+        record.last_exit_code = proc.returncode
+        record.last_uptime = now - record.start_time if record.start_time is not None else 0.0
+        record.exit_codes.append(proc.returncode)
+        record.pid = None
+        record.ready_time = None
+        record.ready_deadline = None
+        print(f"Task {task_path} exited with code {proc.returncode} after {record.last_uptime:.1f}s")
+
+        # Tasks exit 0 on SIGTERM too, so only a one-shot task's exit 0 means it finished;
+        # tasks the manager stops itself never get here, stop_tasks reaps them
+        # A process the RSS watchdog terminated is restarted whatever it exited with
+        over_budget = record.watchdog_pid == proc.pid
+        record.watchdog_pid = None
+        task = self.registry.tasks.get(task_path)
+        if proc.returncode == 0 and task is not None and task.oneshot and not over_budget:
+            record.state = 'exited'
+            return True
+
+        if record.last_uptime >= self.stable_uptime:
+            record.backoff = 0.0
+        record.crash_times.append(now)
+        recent = [t for t in record.crash_times if now - t <= self.crash_loop_window]
+        if len(recent) >= self.crash_loop_limit:
+            record.state = 'failed'
+            print(f"Task {task_path} crashed {len(recent)} times in {self.crash_loop_window:.0f}s, "
+                  f"giving up until it is disabled and enabled again")
+            return True
+        record.backoff = min(self.restart_backoff_max,
+                             record.backoff * 2 if record.backoff else self.restart_backoff_initial)
+        record.state = 'backoff'
+        record.next_restart = now + record.backoff
+        print(f"Task {task_path} will restart in {record.backoff:.1f}s")
+        return True
+
+    def _next_timeout(self, base_timeout):
+        # Wake up in time for the earliest pending restart, readiness timeout and resource sample
+        pending = [r.next_restart for r in self.task_records.values() if r.state == 'backoff']
+        pending += [r.ready_deadline for r in self.task_records.values()
+                    if r.state == 'running' and r.ready_time is None and r.ready_deadline is not None]
+        if self.accounting_interval > 0 and self.running_processes:
+            pending.append(self.next_sample)
+        if self.watchdog_interval:
+            pending.append(self.next_watchdog)
+        pending += [client.deadline for client in self.control_clients.values()]
+        if not pending:
+            return base_timeout
+        delay = max(0.0, min(pending) - time.monotonic())
+        return delay if base_timeout is None else min(delay, base_timeout)
+
+    def _notify_systemd(self):
+        # READY once every startable task is ready, STATUS when it changes, WATCHDOG pings from this loop
+        if not self.notifier.enabled:
+            return
+        starting = [record.name for record in self.task_records.values()
+                    if record.state == 'waiting' or (record.state == 'running' and record.ready_time is None)]
+        running = len(self.running_processes)
+        failed = sum(1 for record in self.task_records.values() if record.state in ('failed', 'backoff'))
+        status = f"{running} tasks running" + (f", {failed} failing" if failed else "")
+        if not self.ready_sent and starting:
+            status = f"starting {', '.join(starting)}"
+            if status != self.last_status:
+                self.notifier.status(status)
+        elif not self.ready_sent:
+            self.notifier.ready(status)
+            self.ready_sent = True
+        elif status != self.last_status:
+            self.notifier.status(status)
+        self.last_status = status
+        if self.watchdog_interval and time.monotonic() >= self.next_watchdog:
+            self.notifier.watchdog()
+            self.next_watchdog = time.monotonic() + self.watchdog_interval
+
+    def sample_usage(self):
+        """
+        Sample the resource usage of every running task, enforce RSS budgets and refresh the JSON dump
+        """
+        self.next_sample = time.monotonic() + self.accounting_interval
+        samples = self.usage_monitor.sample(self.running_processes)
+        self.check_rss_budgets(samples)
+        try:
+            self.usage_monitor.dump_json(self.usage_file)
+        except OSError as e:
+            print(f"Error writing {self.usage_file}: {e}")
+
+    def get_usage_report(self):
+        """
+        Get the resource usage history of the tasks
+
+        Returns:
+            dict: Task name -> latest sample, averages, peak RSS and history
+        """
+        return self.usage_monitor.report()
 
     def _monitor_tasks(self):
         """
-        Monitor thread function that checks for task status changes every 0.3 seconds
+        Monitor thread function, blocks until the configuration file changes, a task exits
+        or wake_monitor() is called, and reconciles tasks only then
         """
-        # Save previous config status
-        last_enabled_tasks = set()
-        last_disabled_tasks = set()
-        
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.wakeup_pipe[0], selectors.EVENT_READ, ('wakeup', None))
+        try:
+            watcher = self.config_manager.create_watcher()
+            self.selector.register(watcher.fileno(), selectors.EVENT_READ, ('config', None))
+            timeout = None
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, polling configuration every {self.fallback_interval}s: {e}")
+            timeout = self.fallback_interval
+        if not hasattr(os, 'pidfd_open'):
+            timeout = self.fallback_interval
+
+        self._open_control_socket()
+
+        last_state = [set(), set()]
+        reconcile = True
         while self.monitoring:
             try:
-                # Get current enabled and disabled tasks
-                enabled_tasks = self.get_enabled_tasks()
-                disabled_tasks = self.get_disabled_tasks()
-                
-                # Extract task paths for comparison
-                current_enabled_paths = set(task['path'] for task in enabled_tasks)
-                current_disabled_paths = set(task['path'] for task in disabled_tasks)
-                
-                # Check if config has changed
-                if (current_enabled_paths != last_enabled_tasks or 
-                    current_disabled_paths != last_disabled_tasks):
-                    
-                    # Print current config status
-                    print(f"Current configuration - Enabled tasks: {list(current_enabled_paths)}")
-                    print(f"Current configuration - Disabled tasks: {list(current_disabled_paths)}")
-                    
-                    # Update saved status
-                    last_enabled_tasks = current_enabled_paths
-                    last_disabled_tasks = current_disabled_paths
-                
-                # Start newly enabled tasks
-                for task in enabled_tasks:
-                    task_path = task["path"]
-                    if task_path not in self.running_processes:
-                        proc = self.start_task(task)
-                        if proc:
-                            self.running_processes[task_path] = proc
-                
-                # Stop disabled tasks
-                for task in disabled_tasks:
-                    task_path = task["path"]
-                    if task_path in self.running_processes:
-                        self.stop_task(task_path)
-                
-                time.sleep(0.3)  # Check every 0.3 seconds
-                
+                if reconcile:
+                    self._reconcile_tasks(last_state)
+                reconcile = False
+                self._notify_systemd()
+                events = self.selector.select(self._next_timeout(timeout))
+                if self.control_clients:
+                    self._expire_control_clients()
+                if self.accounting_interval > 0 and time.monotonic() >= self.next_sample:
+                    self.sample_usage()
+                # A task that timed out on readiness releases its dependents
+                reconcile = self._check_ready_deadlines()
+                if not events:
+                    # Restart deadline or fallback polling: look for configuration changes and exited processes
+                    reconcile = self.registry.refresh() or reconcile
+                    for task_path in list(self.running_processes):
+                        if task_path not in self.process_fds:
+                            self._handle_process_exit(task_path)
+                    reconcile = reconcile or any(r.state == 'backoff' for r in self.task_records.values())
+                    continue
+                for key, _ in events:
+                    kind, task_path = key.data
+                    if kind == 'wakeup':
+                        os.read(self.wakeup_pipe[0], 4096)
+                        reconcile = True
+                    elif kind == 'config':
+                        # Reconcile only when a task definition changed, not on every config write
+                        self.config_manager.process_watch_events()
+                        if self.registry.refresh():
+                            reconcile = True
+                    elif kind == 'exit':
+                        if self._handle_process_exit(task_path):
+                            reconcile = True
+                    elif kind == 'control':
+                        self._handle_control_connection()
+                    elif kind == 'client':
+                        self._serve_control_client(task_path)
+                    elif kind == 'log':
+                        if self._read_log(task_path):
+                            reconcile = True    # Dependents of the task may start now
             except Exception as e:
                 print(f"Error in monitor thread: {e}")
-                time.sleep(0.3)
-                
+                time.sleep(self.fallback_interval)
+
+        for task_path in list(self.process_fds):
+            self._unwatch_process(task_path)
+        self._close_control_socket()
+        self.selector.close()
+        self.selector = None
+
+    def _open_control_socket(self):
+        # Listen for control commands, served from the monitor thread's selector
+        try:
+            ensure_private_dir(os.path.dirname(self.control_socket_path))
+            try:
+                os.unlink(self.control_socket_path)
+            except FileNotFoundError:
+                pass
+            self.control_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Create the socket file as 0600 right away, a chmod after bind() leaves a window
+            old_umask = os.umask(0o177)
+            try:
+                self.control_socket.bind(self.control_socket_path)
+            finally:
+                os.umask(old_umask)
+            self.control_socket.listen(4)
+            self.control_socket.setblocking(False)
+            self.selector.register(self.control_socket, selectors.EVENT_READ, ('control', None))
+        except OSError as e:
+            print(f"Control socket unavailable: {e}")
+            self._close_control_socket()
+
+    def _close_control_socket(self):
+        for conn in list(self.control_clients):
+            self._close_control_client(conn)
+        if self.control_socket is not None:
+            try:
+                self.selector.unregister(self.control_socket)
+            except (KeyError, ValueError):
+                pass
+            self.control_socket.close()
+            self.control_socket = None
+            try:
+                os.unlink(self.control_socket_path)
+            except OSError:
+                pass
+
+    def _handle_control_connection(self):
+        # Accept a client and serve it from the selector, one request line in, one reply line out
+        try:
+            conn, _ = self.control_socket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        conn.setblocking(False)
+        self.control_clients[conn] = ControlClient(time.monotonic() + self.control_timeout)
+        self.selector.register(conn, selectors.EVENT_READ, ('client', conn))
+
+    def _serve_control_client(self, conn):
+        # Read whatever the client sent, answer once the request line is complete, send what fits
+        client = self.control_clients.get(conn)
+        if client is None:
+            return
+        try:
+            if client.reply is None:
+                chunk = conn.recv(4096)
+                client.data += chunk
+                if chunk and not client.data.endswith(b'\n') and len(client.data) < 65536:
+                    return
+                try:
+                    request = json.loads(client.data.decode('utf-8'))
+                    reply = self.handle_command(request)
+                except ValueError as e:
+                    reply = {'ok': False, 'error': f"invalid request: {e}"}
+                client.reply = (json.dumps(reply) + '\n').encode('utf-8')
+                self.selector.modify(conn, selectors.EVENT_WRITE, ('client', conn))
+            sent = conn.send(client.reply)
+            client.reply = client.reply[sent:]
+            if client.reply:
+                return
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            print(f"Control connection error: {e}")
+        self._close_control_client(conn)
+
+    def _expire_control_clients(self):
+        # Drop clients that stopped talking, they must not pile up
+        now = time.monotonic()
+        for conn, client in list(self.control_clients.items()):
+            if now >= client.deadline:
+                print("Control connection timed out")
+                self._close_control_client(conn)
+
+    def _close_control_client(self, conn):
+        if self.control_clients.pop(conn, None) is None:
+            return
+        try:
+            self.selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        conn.close()
+
+    def _task_status(self, task):
+        record = self.task_records.get(task.name)
+        proc = self.running_processes.get(task.name)
+        return {
+            'name': task.name,
+            'path': task.path,
+            'enabled': task.enabled,
+            'override': self.overrides.get(task.name),
+            'state': record.state if record is not None else 'stopped',
+            'pid': proc.pid if proc is not None else None,
+            'status': record.describe() if record is not None else 'stopped',
+        }
+
+    def _start_now(self, task):
+        # Start a task immediately, clearing a crash loop or pending backoff
+        record = self.task_records.get(task.name)
+        if record is not None and task.name not in self.running_processes:
+            record.state = 'stopped'
+            record.crash_times.clear()
+            record.backoff = 0.0
+            record.next_restart = None
+        if task.name in self.running_processes:
+            return True
+        proc = self.start_task(task)
+        if proc is None:
+            return False
+        self.running_processes[task.name] = proc
+        self._watch_process(task.name, proc)
+        return True
+
+    def handle_command(self, request):
+        """
+        Execute one control command
+
+        Commands: list, status [name], start name, stop name, restart name, logs name [lines], reload.
+        start and stop are manual overrides that hold until the next reload.
+
+        Args:
+            request (dict): {"command": ..., "name": ..., "lines": ...}
+
+        Returns:
+            dict: Reply with "ok" and the command's data or an "error"
+        """
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "request must be an object"}
+        command = request.get('command')
+        name = request.get('name')
+        if command == 'list':
+            return {'ok': True, 'tasks': [self._task_status(task) for task in self.registry.all()]}
+        if command == 'reload':
+            self.overrides.clear()
+            self.config_manager.reload_if_changed()
+            self.registry.generation = None    # Force a rebuild even if nothing changed on disk
+            self.registry.refresh()
+            self.wake_monitor()
+            return {'ok': True}
+        if command == 'logs':
+            count = request.get('lines', 100)
+            if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+                return {'ok': False, 'error': f"invalid line count {count!r}, expected 0 (all) or more"}
+            task = self.registry.get(name) if name else None
+            lines = self.get_logs(task.name if task is not None else name, count)
+            if lines is None:
+                return {'ok': False, 'error': f"no output recorded for {name!r}"}
+            log = self.task_logs[task.name if task is not None else name]
+            return {'ok': True, 'lines': lines, 'stats': log.get_stats()}
+        if command not in ('status', 'start', 'stop', 'restart'):
+            return {'ok': False, 'error': f"unknown command {command!r}"}
+
+        task = self.registry.get(name) if name else None
+        if command == 'status':
+            if name and task is None:
+                return {'ok': False, 'error': f"unknown task {name!r}"}
+            usage = self.get_usage_report()
+            tasks = [task] if task is not None else self.registry.all()
+            status = {}
+            for item in tasks:
+                status[item.name] = self._task_status(item)
+                status[item.name]['usage'] = usage.get(item.name)
+            return {'ok': True, 'tasks': status}
+        if task is None:
+            return {'ok': False, 'error': f"unknown task {name!r}"}
+        if command == 'stop':
+            self.overrides[task.name] = False
+            report = self.stop_tasks([task.name])
+            return {'ok': True, 'stop_latency': report.get(task.name, (None,))[0]}
+        if command == 'restart':
+            if not self.overrides.get(task.name, task.enabled):
+                return {'ok': False, 'error': f"task {task.name} is disabled, use start"}
+            self.stop_tasks([task.name])
+        else:
+            self.overrides[task.name] = True
+        if not self._start_now(task):
+            return {'ok': False, 'error': f"task {task.name} failed to start"}
+        return {'ok': True, 'pid': self.running_processes[task.name].pid}
+
     def start_monitoring(self):
         """
         Start the monitoring thread
         """
         if not self.monitoring:
             self.monitoring = True
+            self.wakeup_pipe = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
             self.monitor_thread = threading.Thread(target=self._monitor_tasks, daemon=True)
             self.monitor_thread.start()
+            self._start_board_reconciler()
             print("Task monitoring started")
 
     def stop_monitoring(self):
@@ -266,60 +1036,167 @@ class TaskManager:
         Stop the monitoring thread and all running tasks
         """
         self.monitoring = False
+        self.notifier.stopping()
+        self._stop_board_reconciler()
+        self.wake_monitor()
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join()
+        if self.wakeup_pipe is not None:
+            os.close(self.wakeup_pipe[0])
+            os.close(self.wakeup_pipe[1])
+            self.wakeup_pipe = None
         
-        # Stop all running tasks
-        for task_path in list(self.running_processes.keys()):
-            self.stop_task(task_path)
+        # Stop all running tasks concurrently, the fan controller last
+        self.stop_tasks(list(self.running_processes))
+        for fd in list(self.log_pipes):
+            self._read_log(fd, final=True)
+        if self.zygote is not None:
+            self.zygote.stop_server()
         print("Task monitoring stopped")
 
+    def _start_board_reconciler(self):
+        # Correct drift of the board registers no task owns, e.g. after a board reset. Config changes
+        # reach it through the subscription, the monitor loop already reloads the file
+        if self.board_reconcile_interval <= 0 or self.reconciler is not None:
+            return
+        expansion = None
+        try:
+            from api_expansion import Expansion
+            from api_reconcile import BoardReconciler
+            expansion = Expansion()
+            self.reconciler = BoardReconciler(expansion, self.config_manager)
+            self.reconciler.start(self.board_reconcile_interval, watch=False)
+        except Exception as e:
+            print(f"Board reconcile disabled: {e}")
+            self.reconciler = None
+            if expansion is not None:
+                expansion.end()
+
+    def _stop_board_reconciler(self):
+        if self.reconciler is None:
+            return
+        self.reconciler.stop()
+        try:
+            self.reconciler.expansion.end()
+        except Exception as e:
+            print(e)
+        self.reconciler = None
+
     def set_task_status(self, task_path, is_run_on_startup):
         """
         Update the startup status of a task
         
         Args:
-            task_path (str): Path to the task file
+            task_path (str): Task name, or its script file for compatibility
             is_run_on_startup (bool): New startup status
             
         Returns:
             bool: True if task was updated, False if it didn't exist
         """
-        # Find and update the corresponding task status
-        config_updated = False
-        
-        # Check LED config
-        led_config = self.config_manager.get_section('LED')
-        if led_config and led_config.get('task_name') == task_path:
-            self.config_manager.set_value('LED', 'is_run_on_startup', is_run_on_startup)
-            config_updated = True
-        
-        # Check Fan config
-        fan_config = self.config_manager.get_section('Fan')
-        if fan_config and fan_config.get('task_name') == task_path:
-            self.config_manager.set_value('Fan', 'is_run_on_startup', is_run_on_startup)
-            config_updated = True
-        
-        # Check OLED config
-        oled_config = self.config_manager.get_section('OLED')
-        if oled_config and oled_config.get('task_name') == task_path:
-            self.config_manager.set_value('OLED', 'is_run_on_startup', is_run_on_startup)
-            config_updated = True
-        
-        if config_updated:
-            self.config_manager.save_config()
-            status = "enabled" if is_run_on_startup else "disabled"
-            print(f"Task {task_path} {status} for startup")
-            return True
-        else:
+        task = self.registry.set_enabled(task_path, is_run_on_startup)
+        if task is None:
             print(f"Task {task_path} not found in config")
             return False
+        self.config_manager.save_config()
+        self.wake_monitor()    # Our own write does not produce a reload, reconcile directly
+        status = "enabled" if is_run_on_startup else "disabled"
+        print(f"Task {task.name} {status} for startup")
+        return True
     
 
+def print_usage_status(usage_file=USAGE_FILE, as_json=False):
+    """
+    Print the resource usage dumped by a running TaskManager
+
+    Args:
+        usage_file (str): JSON dump written by TaskManager.sample_usage
+        as_json (bool): Print the raw JSON instead of a table
+    """
+    try:
+        with open(usage_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"No usage data available ({e}), is the task manager running?")
+        return
+    if as_json:
+        print(json.dumps(data, indent=1))
+        return
+    print(f"Sampled {time.time() - data['generated']:.0f}s ago")
+    print(format_usage_table(data['tasks']))
+
+def send_command(command, name=None, socket_path=CONTROL_SOCKET, timeout=10.0, **extra):
+    """
+    Send a command to a running TaskManager over its control socket
+
+    Args:
+        command (str): list, status, start, stop, restart, logs or reload
+        name (str): Task name for commands that take one
+        extra: Additional request fields, e.g. lines for logs
+        socket_path (str): Control socket of the manager
+        timeout (float): Seconds to wait for the reply
+
+    Returns:
+        dict: Reply of the manager
+
+    Raises:
+        OSError: The manager is not reachable
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(dict(extra, command=command, name=name)) + '\n').encode('utf-8'))
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data.decode('utf-8'))
+
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run and supervise the configured tasks")
+    parser.add_argument('command', nargs='?', default='run',
+                        choices=['run', 'list', 'status', 'start', 'stop', 'restart', 'logs', 'reload', 'usage'],
+                        help="run the manager (default), or control a running one")
+    parser.add_argument('name', nargs='?', help="Task name for status, start, stop, restart and logs")
+    parser.add_argument('-n', '--lines', type=int, default=100, help="logs: number of lines, 0 for all")
+    parser.add_argument('--zygote', action='store_true', help="Fork tasks from a preloaded zygote")
+    parser.add_argument('--json', action='store_true', help="Print the raw JSON reply")
+    args = parser.parse_args()
+
+    if args.command == 'usage':
+        print_usage_status(as_json=args.json)
+        sys.exit(0)
+    if args.command != 'run':
+        if args.command in ('start', 'stop', 'restart', 'logs') and not args.name:
+            parser.error(f"{args.command} needs a task name")
+        try:
+            reply = send_command(args.command, args.name, lines=args.lines)
+        except OSError as e:
+            print(f"Task manager not reachable on {CONTROL_SOCKET}: {e}")
+            sys.exit(1)
+        if args.json or args.command == 'status':
+            print(json.dumps(reply, indent=1))
+        elif not reply.get('ok'):
+            print(f"Error: {reply.get('error')}")
+        elif args.command == 'logs':
+            print("\n".join(reply['lines']))
+            stats = reply['stats']
+            print(f"-- {stats['lines']} lines, {stats['repeats']} repeats folded, {stats['suppressed']} suppressed")
+        elif args.command == 'list':
+            for task in reply['tasks']:
+                override = "" if task['override'] is None else f" (forced {'on' if task['override'] else 'off'})"
+                print(f"  {task['name']:<12} [{'ON' if task['enabled'] else 'OFF'}]{override} {task['status']}")
+        else:
+            print("OK")
+        sys.exit(0 if reply.get('ok') else 1)
+
+    # systemd stops the service with SIGTERM, shut the tasks down like on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     # Create an instance of the manager
-    manager = TaskManager()
+    manager = TaskManager(use_zygote=args.zygote)
     
     print("\n=== Starting Enabled Tasks ===")
     # Start tasks enabled in config file
@@ -337,4 +1214,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nReceived interrupt signal, shutting down...")
     finally:
-        manager.stop_monitoring()
\ No newline at end of file
+        manager.stop_monitoring()
@@ -1,6 +1,7 @@
 from api_oled import OLED
 from api_expansion import Expansion
-from api_systemInfo import SystemInformation
+from api_systemInfo import SystemInformation, SystemSnapshot
+import math
 import threading
 import atexit
 import signal
@@ -9,10 +10,13 @@ import sys
 
 class OLED_TASK:
 
-    def __init__(self):
+    def __init__(self, expansion=None, system_information=None, install_signal_handlers=True):
         # Initialize OLED and Expansion objects
+        # expansion/system_information: shared objects when hosted in-process, None to create our own
         self.oled = None
-        self.expansion = None
+        self.expansion = expansion
+        self.owns_expansion = expansion is None
+        self.system_information = system_information
         self.font_size = 12
         self.cleanup_done = False
         self.stop_event = threading.Event()  # Keep for signal handling
@@ -25,19 +29,22 @@ class OLED_TASK:
         except Exception as e:
             sys.exit(1)
 
-        try:
-            self.expansion = Expansion()                            # Initialize Expansion object
-        except Exception as e:
-            sys.exit(1)
+        if self.owns_expansion:
+            try:
+                self.expansion = Expansion()                            # Initialize Expansion object
+            except Exception as e:
+                sys.exit(1)
 
-        try:
-            self.system_information = SystemInformation()
-        except Exception as e:
-            sys.exit(1)
+        if self.system_information is None:
+            try:
+                self.system_information = SystemInformation()
+            except Exception as e:
+                sys.exit(1)
 
-        atexit.register(self.cleanup)
-        signal.signal(signal.SIGTERM, self.handle_signal)
-        signal.signal(signal.SIGINT, self.handle_signal)
+        if install_signal_handlers:
+            atexit.register(self.cleanup)
+            signal.signal(signal.SIGTERM, self.handle_signal)
+            signal.signal(signal.SIGINT, self.handle_signal)
 
 
     def get_computer_temperature(self):
@@ -75,6 +82,10 @@ class OLED_TASK:
         except Exception as e:
             print(e)
 
+    def metric_value(self, value, default=0):
+        """Replace an unavailable (NaN) snapshot metric with a drawable default"""
+        return default if math.isnan(value) else value
+
     def cleanup(self):
         # Perform cleanup operations
         if self.cleanup_done:
@@ -158,48 +169,78 @@ class OLED_TASK:
         self.oled.draw_text("{}%".format(percentage_value[2]), position=((86,48),(128,64)), directory="center", offset=(0, 0), font_size=self.font_size)
         self.oled.show()
 
+    def oled_ui_5_show(self, top_processes):
+        self.oled.clear()
+        # Draw basic interface outline, title row plus three process rows
+        self.oled.draw_rectangle((0, 0, self.oled.width-1, self.oled.height-1), outline="white")
+        self.oled.draw_line(((0, 16), (self.oled.width-1, 16)), fill="white")
+        self.oled.draw_text("Top CPU", position=((0,0),(128,16)), directory="center", offset=(0, 0), font_size=self.font_size)
+        # Each row shows process name on the left and its CPU usage on the right
+        for i, process in enumerate(top_processes[:3]):
+            y = 16 + i * 16
+            self.oled.draw_text(process[1][:12], position=((2,y),(90,y+16)), directory="left", offset=(0, 0), font_size=self.font_size)
+            self.oled.draw_text("{}%".format(round(process[2])), position=((90,y),(126,y+16)), directory="right", offset=(0, 0), font_size=self.font_size)
+        self.oled.show()
+
+    def oled_ui_6_show(self, disk_rate, network_rate):
+        self.oled.clear()
+        # Draw basic interface outline, left column for disk, right column for network
+        self.oled.draw_rectangle((0, 0, self.oled.width-1, self.oled.height-1), outline="white")
+        self.oled.draw_line(((0, 16), (self.oled.width-1, 16)), fill="white")
+        self.oled.draw_line(((64, 0), (64, self.oled.height-1)), fill="white")
+        self.oled.draw_text("Disk", position=((0,0),(64,16)), directory="center", offset=(0, 0), font_size=self.font_size)
+        self.oled.draw_text("Net", position=((65,0),(128,16)), directory="center", offset=(0, 0), font_size=self.font_size)
+        # Read/write rates for disk, receive/transmit rates for network
+        format_rate = self.system_information.format_rate
+        self.oled.draw_text("R " + format_rate(disk_rate[0]), position=((0,20),(64,36)), directory="center", offset=(0, 0), font_size=self.font_size)
+        self.oled.draw_text("W " + format_rate(disk_rate[1]), position=((0,40),(64,56)), directory="center", offset=(0, 0), font_size=self.font_size)
+        self.oled.draw_text("Rx " + format_rate(network_rate[0]), position=((65,20),(128,36)), directory="center", offset=(0, 0), font_size=self.font_size)
+        self.oled.draw_text("Tx " + format_rate(network_rate[1]), position=((65,40),(128,56)), directory="center", offset=(0, 0), font_size=self.font_size)
+        self.oled.show()
+
     def run_oled_loop(self):
         """Main monitoring loop - single-threaded infinite loop for both OLED display and fan control"""
         oled_counter = 0  # Counter to control OLED update frequency
         screen_start_time = time.time()  # 记录当前屏幕开始显示的时间
         current_screen = 0  # 当前显示的屏幕索引
         screen_duration = 3.0  # 每个屏幕显示3秒
+        snapshot = SystemSnapshot()  # Reused for every sample to avoid per-loop allocations
         
         while not self.stop_event.is_set():
             # Update data every 0.3 seconds
-            current_date = self.system_information.get_raspberry_pi_date()
-            current_weekday = self.system_information.get_raspberry_pi_weekday()
-            current_time = self.system_information.get_raspberry_pi_time()
-            ip_address = self.system_information.get_raspberry_pi_ip_address()
-            cpu_usage = self.system_information.get_raspberry_pi_cpu_usage()
-            memory_usage = self.system_information.get_raspberry_pi_memory_usage()
-            disk_usage = self.system_information.get_raspberry_pi_disk_usage()
-            cpu_temperature = self.system_information.get_raspberry_pi_cpu_temperature()
+            snapshot = self.system_information.snapshot(snapshot)
 
             computer_temperature = self.get_computer_temperature()
             led_mode = self.get_computer_led_mode() 
             fan_mode = self.get_computer_fan_mode()
             computer_fan_duty = self.get_computer_fan_duty()
-            current_pi_duty = self.system_information.get_raspberry_pi_fan_duty()
             
             # 检查是否需要切换屏幕（基于时间而不是计数器）
             elapsed_time = time.time() - screen_start_time
             if elapsed_time >= screen_duration:
-                current_screen = (current_screen + 1) % 4
+                current_screen = (current_screen + 1) % 6
                 screen_start_time = time.time()
             
             # Update OLED every 0.3 seconds
             try:
                 # 使用稳定的current_screen变量来决定显示哪个界面
                 if current_screen == 0:
-                    self.oled_ui_1_show(current_date, current_weekday, current_time)
+                    self.oled_ui_1_show(snapshot.date, snapshot.weekday, snapshot.time)
                 elif current_screen == 1:
-                    self.oled_ui_2_show(ip_address, cpu_usage, memory_usage[0], disk_usage[0])
+                    self.oled_ui_2_show(snapshot.ip_address, self.metric_value(snapshot.cpu_usage),
+                                        self.metric_value(snapshot.memory_percent), self.metric_value(snapshot.disk_percent))
                 elif current_screen == 2:
-                    self.oled_ui_3_show(cpu_temperature, computer_temperature)
+                    self.oled_ui_3_show(self.metric_value(snapshot.cpu_temperature), computer_temperature)
                 elif current_screen == 3:
-                    duty = [current_pi_duty, computer_fan_duty[0], computer_fan_duty[1]]
+                    duty = [self.metric_value(snapshot.fan_duty), computer_fan_duty[0], computer_fan_duty[1]]
                     self.oled_ui_4_show(duty)
+                elif current_screen == 4:
+                    # Only this screen needs the process list, so only it advances the /proc sweep
+                    self.oled_ui_5_show(self.system_information.get_raspberry_pi_top_processes(3))
+                elif current_screen == 5:
+                    disk_rate = [snapshot.disk_read_rate, snapshot.disk_write_rate]
+                    network_rate = [snapshot.network_rx_rate, snapshot.network_tx_rate]
+                    self.oled_ui_6_show(disk_rate, network_rate)
             except Exception as e:
                 print(e)
             
@@ -222,7 +263,11 @@ class OLED_TASK:
             #     print("")
             
             # oled_counter += 1
-            time.sleep(0.3)  # Base interval of 0.3 second
+            if current_screen == 0:
+                # The clock screen only changes on the second tick, so redraw exactly then
+                self.system_information.clock.sleep_until_next_second(self.stop_event)
+            else:
+                self.stop_event.wait(0.3)  # Base interval of 0.3 second
 
 
 if __name__ == "__main__":
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+import argparse
+import atexit
+import errno
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+import traceback
+from api_runtime import RUNTIME_DIR, ensure_private_dir
+from api_procfs import read_process_stat
+from api_limits import apply_limits
+
+DEFAULT_SOCKET_PATH = os.path.join(RUNTIME_DIR, 'zygote.sock')
+
+# Imported once in the zygote so forked tasks start with them already loaded
+PRELOAD_MODULES = [
+    'PIL.Image', 'PIL.ImageDraw', 'PIL.ImageFont',
+    'luma.core.interface.serial', 'luma.oled.device',
+    'psutil', 'smbus',
+    'api_expansion', 'api_systemInfo', 'api_oled', 'api_json',
+]
+
+def get_peer_credentials(sock):
+    """
+    Get the process on the other end of a Unix socket, as the kernel recorded it at connect time
+
+    Args:
+        sock (socket.socket): Connected Unix stream socket
+
+    Returns:
+        tuple: (pid, uid, gid)
+    """
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)
+
+class ZygoteServer:
+    """
+    Fork-server that pre-imports the heavy task dependencies once and forks task children on request
+
+    Protocol: a client connects, sends one JSON line {"script": ..., "args": [...], "cwd": ...}
+    and receives {"pid": N} (or {"error": ...}); "module" instead of "script" runs a module like
+    python -m. The connection then stays open and the server sends {"exit": code} when the child
+    terminates, negative codes meaning killed by that signal. Each child leads its own process
+    group, so a client that loses the zygote can still kill the task and whatever it started.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, preload=None):
+        """
+        Initialize the ZygoteServer
+
+        Args:
+            socket_path (str): Unix socket to listen on
+            preload (list): Modules to import before serving, defaults to PRELOAD_MODULES
+        """
+        self.socket_path = socket_path
+        self.preload = PRELOAD_MODULES if preload is None else preload
+        self.listener = None
+        self.children = {}            # pid -> client connection waiting for the exit code
+        self.wakeup_pipe = None
+        self.running = False
+
+    def preload_modules(self):
+        """
+        Import the preload modules, missing optional ones are skipped
+
+        Returns:
+            list: Names of the modules that were imported
+        """
+        loaded = []
+        for name in self.preload:
+            try:
+                importlib.import_module(name)
+                loaded.append(name)
+            except Exception as e:
+                print(f"Zygote: not preloading {name}: {e}")
+        return loaded
+
+    def _bind(self):
+        ensure_private_dir(os.path.dirname(self.socket_path))
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket file as 0600 right away, a chmod after bind() leaves a window
+        old_umask = os.umask(0o177)
+        try:
+            self.listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.listener.listen(8)
+
+    def _read_request(self, conn):
+        # The first chunk may carry an output fd for the child (SCM_RIGHTS)
+        data, fds, _, _ = socket.recv_fds(conn, 65536, 1)
+        while data and not data.endswith(b'\n'):
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        request = json.loads(data.decode('utf-8'))
+        request['output_fd'] = fds[0] if fds else None
+        return request
+
+    def _run_child(self, conn, request):
+        # Runs in the forked child: drop the server state and execute the script as __main__
+        code = 0
+        try:
+            os.setpgid(0, 0)
+            signal.set_wakeup_fd(-1)
+            for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            atexit._clear()   # The server's exit handlers belong to the server
+            self.listener.close()
+            conn.close()      # Only the zygote may hold the connection, or its loss would go unnoticed
+            for other in self.children.values():
+                other.close()
+            os.close(self.wakeup_pipe[0])
+            os.close(self.wakeup_pipe[1])
+            if request['output_fd'] is not None:
+                # Send the task's stdout and stderr to the pipe of the requesting manager
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(request['output_fd'], 1)
+                os.dup2(request['output_fd'], 2)
+                os.close(request['output_fd'])
+                sys.stdout.reconfigure(line_buffering=True)
+            if request.get('limits'):
+                try:
+                    apply_limits(request['limits'])
+                except (OSError, ValueError) as e:
+                    print(f"Could not apply limits {request['limits']}: {e}", file=sys.stderr)
+
+            if request.get('module'):
+                os.chdir(request.get('cwd') or os.getcwd())
+                sys.argv = [request['module']] + list(request.get('args', []))
+                sys.path[0] = os.getcwd()
+                runpy.run_module(request['module'], run_name='__main__', alter_sys=True)
+            else:
+                script = request['script']
+                cwd = request.get('cwd') or os.path.dirname(os.path.abspath(script))
+                os.chdir(cwd)
+                script_path = os.path.abspath(script)
+                sys.argv = [script_path] + list(request.get('args', []))
+                sys.path[0] = os.path.dirname(script_path)
+                runpy.run_path(script_path, run_name='__main__')
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        try:
+            atexit._run_exitfuncs()
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+    def _spawn(self, conn):
+        request = None
+        try:
+            if get_peer_credentials(conn)[1] != os.geteuid():
+                raise PermissionError("only the zygote's own user may fork tasks")
+            request = self._read_request(conn)
+            if not request.get('module') and not os.path.exists(os.path.join(request.get('cwd') or '', request['script'])):
+                raise FileNotFoundError(request['script'])
+        except Exception as e:
+            if request is not None and request['output_fd'] is not None:
+                os.close(request['output_fd'])
+            try:
+                conn.sendall((json.dumps({'error': str(e)}) + '\n').encode('utf-8'))
+            except OSError:
+                pass
+            conn.close()
+            return
+        pid = os.fork()
+        if pid == 0:
+            self._run_child(conn, request)
+        try:
+            os.setpgid(pid, pid)    # Also done by the child, whichever runs first wins the race
+        except OSError:
+            pass
+        if request['output_fd'] is not None:
+            os.close(request['output_fd'])
+        self.children[pid] = conn
+        try:
+            conn.sendall((json.dumps({'pid': pid}) + '\n').encode('utf-8'))
+        except OSError:
+            pass
+
+    def _reap_children(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            conn = self.children.pop(pid, None)
+            if conn is None:
+                continue
+            code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+            try:
+                conn.sendall((json.dumps({'exit': code}) + '\n').encode('utf-8'))
+            except OSError:
+                pass
+            conn.close()
+
+    def serve_forever(self):
+        """
+        Preload modules and serve fork requests until SIGTERM or SIGINT
+        """
+        self.preload_modules()
+        self._bind()
+        self.wakeup_pipe = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        signal.set_wakeup_fd(self.wakeup_pipe[1])
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        self.running = True
+        print(f"Zygote ready on {self.socket_path}")
+        sys.stdout.flush()
+        try:
+            while self.running:
+                try:
+                    readable, _, _ = select.select([self.listener, self.wakeup_pipe[0]], [], [])
+                except InterruptedError:
+                    continue
+                if self.wakeup_pipe[0] in readable:
+                    try:
+                        os.read(self.wakeup_pipe[0], 4096)
+                    except BlockingIOError:
+                        pass
+                    self._reap_children()
+                if self.listener in readable:
+                    try:
+                        conn, _ = self.listener.accept()
+                    except OSError:
+                        continue
+                    self._spawn(conn)
+        finally:
+            self.close()
+
+    def _handle_stop(self, signum, frame):
+        self.running = False
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+class ZygoteProcess:
+    """
+    Popen-like handle of a task forked by the zygote
+
+    The exit code arrives on the request connection, so fileno() becomes readable when the
+    child terminates and can be registered in a selector like a pidfd. If the zygote dies first
+    the connection closes while the child keeps running; its process group is then killed so the
+    manager cannot start a duplicate task next to the orphan.
+    """
+
+    def __init__(self, sock, pid):
+        self.sock = sock
+        self.pid = pid
+        self.returncode = None
+        self.pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                self.pidfd = os.pidfd_open(pid)
+            except OSError:
+                pass
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def _read_exit(self, timeout):
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if not readable:
+            return None
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        try:
+            self.returncode = int(json.loads(data.decode('utf-8'))['exit'])
+        except (ValueError, KeyError):
+            self._kill_orphan()    # Zygote went away
+            self.returncode = -signal.SIGKILL
+        self._close()
+        return self.returncode
+
+    def _kill_orphan(self):
+        # The child was reparented to init, kill its group and wait until the task itself is gone
+        try:
+            if self.pidfd is not None:
+                signal.pidfd_send_signal(self.pidfd, 0)   # Fails once the pid is gone, so no reused pid is hit
+            os.killpg(self.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            return
+        if self.pidfd is not None:
+            select.select([self.pidfd], [], [], 2.0)
+        else:
+            deadline = time.monotonic() + 2.0
+            while time.monotonic() < deadline:
+                try:
+                    os.kill(self.pid, 0)
+                except ProcessLookupError:
+                    break
+                time.sleep(0.02)
+
+    def _close(self):
+        self.sock.close()
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+
+    def poll(self):
+        if self.returncode is None:
+            self._read_exit(0)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is None and self._read_exit(timeout) is None:
+            raise subprocess.TimeoutExpired(f"zygote child {self.pid}", timeout)
+        return self.returncode
+
+    def send_signal(self, signum):
+        if self.returncode is not None:
+            return
+        try:
+            if self.pidfd is not None:
+                signal.pidfd_send_signal(self.pidfd, signum)
+            else:
+                os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+class ZygoteClient:
+    """
+    Start (if needed) and talk to a ZygoteServer
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self.server_process = None
+
+    def start_server(self, timeout=30.0):
+        """
+        Launch the zygote as a child process and wait until its socket accepts connections
+
+        Args:
+            timeout (float): Seconds to wait for the preload to finish
+
+        Returns:
+            bool: True if the zygote is ready
+        """
+        if self.server_process is not None and self.server_process.poll() is None:
+            return True
+        self.server_process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve',
+                                                '--socket', self.socket_path],
+                                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.server_process.poll() is not None:
+                return False
+            try:
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                probe.connect(self.socket_path)
+                probe.close()
+                return True
+            except OSError:
+                probe.close()
+                time.sleep(0.05)
+        return False
+
+    def stop_server(self):
+        if self.server_process is not None and self.server_process.poll() is None:
+            self.server_process.terminate()
+            try:
+                self.server_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.server_process.kill()
+                self.server_process.wait()
+        self.server_process = None
+
+    def spawn(self, script, args=None, cwd=None, module=None, output_fd=None, limits=None):
+        """
+        Fork a task from the zygote
+
+        Args:
+            script (str): Script path, relative to cwd, None when module is given
+            args (list): Extra command line arguments
+            cwd (str): Working directory of the child
+            module (str): Module to run as __main__ instead of a script
+            output_fd (int): File descriptor the child's stdout and stderr are redirected to
+            limits (dict): Task limits the child applies to itself before running the task
+
+        Returns:
+            ZygoteProcess: Handle of the forked child
+
+        Raises:
+            OSError: The zygote is not reachable or refused the request
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            # Whoever answers decides which pid we signal later, so it must be our zygote
+            server_pid, server_uid, _ = get_peer_credentials(sock)
+            if server_uid != os.geteuid() or (self.server_process is not None and server_pid != self.server_process.pid):
+                raise OSError(errno.EPERM, f"socket served by pid {server_pid} uid {server_uid}, not our zygote")
+            request = {'script': script, 'module': module, 'args': list(args or []), 'cwd': cwd or os.getcwd(),
+                       'limits': dict(limits or {})}
+            payload = (json.dumps(request) + '\n').encode('utf-8')
+            if output_fd is not None:
+                sent = socket.send_fds(sock, [payload], [output_fd])
+                sock.sendall(payload[sent:])
+            else:
+                sock.sendall(payload)
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            reply = json.loads(data.decode('utf-8')) if data else {'error': 'zygote closed the connection'}
+        except (OSError, ValueError) as e:
+            sock.close()
+            raise OSError(errno.ECONNREFUSED, f"zygote unavailable: {e}")
+        if not isinstance(reply.get('pid'), int) or isinstance(reply['pid'], bool):
+            sock.close()
+            raise OSError(errno.EINVAL, f"zygote refused {script}: {reply.get('error')}")
+        proc = ZygoteProcess(sock, reply['pid'])
+        # The pidfd is open now, so a pid reused after this check cannot be confused with the child
+        stat = read_process_stat(proc.pid)
+        if stat is not None and stat.ppid != server_pid:
+            proc._close()
+            raise OSError(errno.EPERM, f"pid {proc.pid} reported by the zygote is not its child")
+        return proc
+
+def run_probe(script, result_path):
+    """
+    Run a task script and record the monotonic time of its first Expansion.write
+
+    The first write is performed, then SystemExit stops the task so its normal cleanup runs.
+
+    Args:
+        script (str): Task script to run as __main__
+        result_path (str): File receiving the timestamp
+    """
+    import api_expansion
+    original_write = api_expansion.Expansion.write
+
+    def probe_write(self, reg, values):
+        api_expansion.Expansion.write = original_write
+        original_write(self, reg, values)
+        with open(result_path, 'w') as f:
+            f.write(repr(time.monotonic()))
+        raise SystemExit(0)
+
+    api_expansion.Expansion.write = probe_write
+    sys.argv = [os.path.abspath(script)]
+    runpy.run_path(script, run_name='__main__')
+
+def measure_first_write(script='task_led.py', runs=5):
+    """
+    Compare time-to-first-I2C-write of a task started as a fresh interpreter and from the zygote
+
+    Args:
+        script (str): Task script to measure
+        runs (int): Launches per mode, the median is reported
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    ensure_private_dir(RUNTIME_DIR)
+    result_path = os.path.join(RUNTIME_DIR, 'first_write_probe')
+    probe_args = ['probe', script, '--result', result_path]
+
+    def launch_fresh():
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__)] + probe_args, cwd=here)
+
+    client = ZygoteClient(os.path.join(RUNTIME_DIR, 'zygote_measure.sock'))
+    if not client.start_server():
+        print("Zygote failed to start")
+        return
+
+    def launch_zygote():
+        return client.spawn(os.path.abspath(__file__), probe_args, cwd=here)
+
+    try:
+        print(f"Time to first I2C write of {script}, median of {runs} runs:")
+        for label, launch in (("fresh interpreter", launch_fresh), ("zygote fork", launch_zygote)):
+            samples = []
+            for _ in range(runs):
+                try:
+                    os.unlink(result_path)
+                except FileNotFoundError:
+                    pass
+                start = time.monotonic()
+                proc = launch()
+                proc.wait(timeout=60)
+                try:
+                    with open(result_path, 'r') as f:
+                        samples.append(float(f.read()) - start)
+                except (OSError, ValueError):
+                    print(f"  {label}: no write recorded (exit code {proc.returncode})")
+                    break
+            if samples:
+                samples.sort()
+                print(f"  {label:<18} {samples[len(samples) // 2] * 1000:8.1f} ms")
+    finally:
+        client.stop_server()
+        try:
+            os.unlink(result_path)
+        except FileNotFoundError:
+            pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fork-server for fast task starts")
+    subparsers = parser.add_subparsers(dest='command')
+    serve_parser = subparsers.add_parser('serve', help="Run the zygote")
+    serve_parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    measure_parser = subparsers.add_parser('measure', help="Measure time to first I2C write")
+    measure_parser.add_argument('script', nargs='?', default='task_led.py')
+    measure_parser.add_argument('--runs', type=int, default=5)
+    probe_parser = subparsers.add_parser('probe')
+    probe_parser.add_argument('script')
+    probe_parser.add_argument('--result', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        ZygoteServer(args.socket).serve_forever()
+    elif args.command == 'measure':
+        measure_first_write(args.script, args.runs)
+    elif args.command == 'probe':
+        run_probe(args.script, args.result)
+    else:
+        parser.print_help()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live flat in Code/ and import each other by name, as the tasks do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
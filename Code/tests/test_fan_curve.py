@@ -0,0 +1,72 @@
+import pytest
+from api_fan_control import FanCurve
+
+POINTS = [[40, 40], [50, 80], [60, 160], [70, 255]]
+
+@pytest.mark.parametrize("points", [
+    [],
+    "40,40",
+    [[40]],
+    [[40, 40, 1]],
+    [["40", 40]],
+    [[True, 40]],
+    [[-41, 40]],
+    [[151, 40]],
+    [[40, -1]],
+    [[40, 256]],
+])
+def test_parse_points_rejects_invalid(points):
+    with pytest.raises(ValueError):
+        FanCurve.parse_points(points)
+
+def test_parse_points_sorts_and_keeps_last_duplicate():
+    assert FanCurve.parse_points([[60, 100], [40, 20], [60, 120]]) == [(40.0, 20.0), (60.0, 120.0)]
+
+def test_lookup_matches_curve():
+    curve = FanCurve(POINTS)
+    assert curve.lookup(20) == 40          # Below the first point
+    assert curve.lookup(40) == 40
+    assert curve.lookup(45) == pytest.approx(60)
+    assert curve.lookup(55.5) == pytest.approx(124)
+    assert curve.lookup(70) == 255
+    assert curve.lookup(90) == 255         # Above the last point
+
+def test_table_lookup_matches_exact_curve():
+    curve = FanCurve(POINTS)
+    for tenth in range(300, 800):
+        temperature = tenth / 10
+        assert curve.lookup(temperature) == pytest.approx(curve._evaluate(temperature))
+
+def test_single_point_is_constant():
+    curve = FanCurve([[50, 120]])
+    assert curve.lookup(0) == 120
+    assert curve.lookup(100) == 120
+
+def test_hysteresis_holds_duty_until_temperature_falls_far_enough():
+    curve = FanCurve(POINTS, hysteresis=2)
+    assert curve.update(55, now=0.0) == pytest.approx(120)
+    # Rising temperatures are followed at once
+    assert curve.update(56, now=1.0) == pytest.approx(128)
+    # A fall within the hysteresis keeps the duty
+    assert curve.update(54.5, now=2.0) == pytest.approx(128)
+    # A larger fall follows, trailing by the hysteresis
+    assert curve.update(52, now=3.0) == pytest.approx(curve.lookup(54))
+
+def test_ramp_limits_bound_the_change_per_second():
+    curve = FanCurve(POINTS, ramp_up=10, ramp_down=5)
+    assert curve.update(40, now=0.0) == 40     # The first output is not limited
+    assert curve.update(70, now=2.0) == pytest.approx(60)
+    assert curve.update(70, now=3.0) == pytest.approx(70)
+    assert curve.update(40, now=5.0) == pytest.approx(60)
+
+def test_zero_ramp_is_unlimited():
+    curve = FanCurve(POINTS)
+    curve.update(40, now=0.0)
+    assert curve.update(70, now=0.1) == 255
+    assert curve.update(40, now=0.2) == 40
+
+def test_reset_forgets_reference_and_output():
+    curve = FanCurve(POINTS, hysteresis=5, ramp_down=1)
+    curve.update(70, now=0.0)
+    curve.reset()
+    assert curve.update(40, now=1.0) == 40
@@ -0,0 +1,56 @@
+import pytest
+from api_fan_control import PIDController
+
+def test_first_update_is_proportional_from_output_min():
+    pid = PIDController(50, kp=10, ki=1, kd=5, output_min=40, output_max=255)
+    # No elapsed time yet: no integration and no derivative
+    assert pid.update(52, now=0.0) == pytest.approx(40 + 20)
+
+def test_output_clamped_to_limits():
+    pid = PIDController(50, kp=100, ki=0, kd=0, output_min=30, output_max=200)
+    assert pid.update(90, now=0.0) == 200
+    assert pid.update(10, now=1.0) == 30
+
+def test_integral_accumulates_while_not_saturated():
+    pid = PIDController(50, kp=0, ki=2, kd=0)
+    outputs = [pid.update(55, now=float(t)) for t in range(4)]
+    assert outputs == pytest.approx([0, 10, 20, 30])
+
+def test_conditional_integration_prevents_windup():
+    pid = PIDController(50, kp=50, ki=10, kd=0, output_min=0, output_max=255)
+    for t in range(100):
+        assert pid.update(80, now=float(t)) == 255
+    # Pinned at full speed the integral was held, not wound up
+    assert pid.integral == 0
+    # So the output falls as soon as the temperature is back under the setpoint
+    assert pid.update(49, now=100.0) == 0
+
+def test_integral_clamped_to_output_range():
+    pid = PIDController(50, kp=0, ki=100, kd=0, output_min=0, output_max=100)
+    for t in range(10):
+        pid.update(51, now=float(t))
+    assert pid.integral == 100
+    pid.set_limits(0, 60)
+    assert pid.integral == 60
+
+def test_derivative_acts_on_measurement():
+    pid = PIDController(50, kp=0, ki=0, kd=10, derivative_smoothing=0)
+    pid.update(50, now=0.0)
+    assert pid.update(52, now=1.0) == pytest.approx(20)
+    # A setpoint change alone does not kick the output
+    pid.setpoint = 40
+    assert pid.update(52, now=2.0) == pytest.approx(0)
+
+def test_derivative_is_smoothed():
+    pid = PIDController(50, kp=0, ki=0, kd=10, derivative_smoothing=0.5)
+    pid.update(50, now=0.0)
+    assert pid.update(52, now=1.0) == pytest.approx(10)
+    assert pid.update(54, now=2.0) == pytest.approx(15)
+
+def test_reset_forgets_history():
+    pid = PIDController(50, kp=0, ki=5, kd=10, output_min=20)
+    pid.update(60, now=0.0)
+    pid.update(70, now=1.0)
+    pid.reset()
+    assert pid.integral == 20
+    assert pid.update(70, now=5.0) == 20
@@ -0,0 +1,77 @@
+import os
+import socket
+import pytest
+from api_service import SystemdNotifier
+
+@pytest.fixture
+def notify_socket(tmp_path, monkeypatch):
+    # Stands in for systemd: a datagram socket at $NOTIFY_SOCKET
+    path = str(tmp_path / 'notify')
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+    sock.settimeout(1.0)
+    monkeypatch.setenv('NOTIFY_SOCKET', path)
+    yield sock
+    sock.close()
+
+def receive(sock):
+    return sock.recv(4096).decode('utf-8')
+
+def test_messages_reach_notify_socket(notify_socket):
+    notifier = SystemdNotifier()
+    try:
+        assert notifier.enabled
+        assert notifier.ready()
+        assert receive(notify_socket) == "READY=1"
+        assert notifier.ready("3 tasks running")
+        assert receive(notify_socket) == "READY=1\nSTATUS=3 tasks running"
+        assert notifier.status("Reloading")
+        assert receive(notify_socket) == "STATUS=Reloading"
+        assert notifier.watchdog()
+        assert receive(notify_socket) == "WATCHDOG=1"
+        assert notifier.stopping()
+        assert receive(notify_socket) == "STOPPING=1"
+    finally:
+        notifier.close()
+
+def test_abstract_socket_address():
+    name = f'freenove-notify-test-{os.getpid()}'
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind('\0' + name)
+    sock.settimeout(1.0)
+    notifier = SystemdNotifier('@' + name)
+    try:
+        assert notifier.ready()
+        assert receive(sock) == "READY=1"
+    finally:
+        notifier.close()
+        sock.close()
+
+def test_disabled_without_notify_socket(monkeypatch):
+    monkeypatch.delenv('NOTIFY_SOCKET', raising=False)
+    notifier = SystemdNotifier()
+    assert not notifier.enabled
+    assert notifier.ready() is False
+    assert notifier.watchdog_interval() is None
+
+def test_unreachable_socket_reports_failure(tmp_path):
+    notifier = SystemdNotifier(str(tmp_path / 'missing'))
+    try:
+        assert notifier.enabled
+        assert notifier.watchdog() is False
+    finally:
+        notifier.close()
+
+def test_watchdog_interval(notify_socket, monkeypatch):
+    notifier = SystemdNotifier()
+    try:
+        monkeypatch.setenv('WATCHDOG_USEC', '30000000')
+        monkeypatch.delenv('WATCHDOG_PID', raising=False)
+        assert notifier.watchdog_interval() == 15
+        # The watchdog belongs to another process
+        monkeypatch.setenv('WATCHDOG_PID', str(os.getpid() + 1))
+        assert notifier.watchdog_interval() is None
+        monkeypatch.setenv('WATCHDOG_PID', str(os.getpid()))
+        assert notifier.watchdog_interval() == 15
+    finally:
+        notifier.close()